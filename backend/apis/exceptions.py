@@ -46,4 +46,43 @@ class InvalidGameError(RunCreationError):
         super().__init__()
     
     def __str__(self) -> str:
-        return f"Invalid game name: {self.game_name}" 
\ No newline at end of file
+        return f"Invalid game name: {self.game_name}" 
+
+class ResourceRangeNotSatisfiableError(Exception):
+    """Raised when a requested byte range is outside of a resource image."""
+    status_code = 416
+
+    def __init__(self, s3_key: str, byte_range: str):
+        self.s3_key = s3_key
+        self.byte_range = byte_range
+        super().__init__()
+    
+    def __str__(self) -> str:
+        return f"Range '{self.byte_range}' is not satisfiable for '{self.s3_key}'"
+
+
+class InvalidResourceDerivativeError(Exception):
+    """Raised when an invalid size or format of a resource image is requested."""
+    status_code = 400
+
+    def __init__(self, size: str, image_format: str, valid_sizes: list[int], valid_formats: list[str]):
+        self.size = size
+        self.image_format = image_format
+        self.valid_sizes = valid_sizes
+        self.valid_formats = valid_formats
+        super().__init__()
+    
+    def __str__(self) -> str:
+        return f"Invalid image size '{self.size}' or format '{self.image_format}'. Available sizes: {self.valid_sizes}, formats: {self.valid_formats}"
+
+
+class ResourcesBusyError(Exception):
+    """Raised when too many resource requests are already in progress."""
+    status_code = 503
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        super().__init__()
+    
+    def __str__(self) -> str:
+        return f"Too many resource requests in progress (limit {self.max_pending}), retry later"
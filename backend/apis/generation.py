@@ -1,10 +1,10 @@
 from typing import List, Optional, Tuple
 from models.run import fetch_run, update_run
-from models.run_pokemons_options import mark_caught_pokemon, list_runs_options_by_query, delete_run_pokemons
+from models.run_pokemons_options import set_caught_pokemons, list_runs_options_by_query, delete_run_pokemons
 from models.report import save_report, Report
 from models.pokemon import Pokemon
 from games import get_game, Game
-from core.lockes import LOCKE_INSTANCES, BaseLocke
+from core.lockes import get_locke, BaseLocke
 from core.lockes.genlocke.utils import get_generation_potential_games, REGION_TO_GEN, SELECTED_LOCKE
 from core.lockes.genlocke.run_creator import GenRunCreator
 from core.lockes.genlocke.gen_locke import GenLocke
@@ -15,8 +15,7 @@ from pokemendel_core.data import get_pokemon_evolves_from, fetch_pokemon
 
 def jump_to_next_gen(run_id: str, game_name: Optional[str]) -> Tuple[bool, List[str]]:
     db_run = fetch_run(run_id)
-    locke = LOCKE_INSTANCES[db_run.locke]
-    locke.extra_info = db_run.locke_extra_info
+    locke = get_locke(db_run.locke, db_run.locke_extra_info)
     core_run = convert_db_run_to_core_run(db_run, run_id)
     return (
         _jump_to_next_gen(core_run, get_game(db_run.game), get_game(game_name))
@@ -73,8 +72,7 @@ def _generate_report(run: Run, game: Game):
 
 
 def _remark_caught_pokemons(run_id: str, base_pokemons: List[str]):
-    for pokemon_name in base_pokemons:
-        mark_caught_pokemon(run_id, pokemon_name)
+    set_caught_pokemons(run_id, base_pokemons, caught=True)
 
 
 def _populate_run_party(run: Run, original_party: List[Pokemon]):
@@ -0,0 +1,25 @@
+from typing import Dict, Any
+from core.metrics import get_timings
+from models.cache import get_cache_stats
+from core.resource_index import get_resource_index
+from core.image_cache import get_image_cache
+from core.resource_executor import get_resource_executor
+from apis.resources import get_single_flight_stats
+
+
+def get_metrics_api() -> Dict[str, Any]:
+    """Get the metrics collected by this process.
+    
+    Returns:
+        A dictionary with the recorded timings (e.g. run creation latency per locke type)
+        and the hit/miss counters of the run caches, the resource index, the image cache,
+        the coalesced resource fetches and the resources I/O executor.
+    """
+    return {
+        'timings': get_timings(),
+        'caches': get_cache_stats(),
+        'resource_index': get_resource_index().stats(),
+        'image_cache': get_image_cache().stats(),
+        'single_flights': get_single_flight_stats(),
+        'resource_executor': get_resource_executor().stats(),
+    }
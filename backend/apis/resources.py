@@ -1,5 +1,12 @@
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import mimetypes
 import os
+import threading
+from botocore.exceptions import ClientError
 from pokemendel_core.utils.download_images import (
     download_pokemon_from_google_search,
     download_gym_from_google_search,
@@ -12,14 +19,45 @@ from pokemendel_core.data import (
     GEN4_NAME_TO_POKEMON,
 )
 from core.r2 import (
+    RESOURCES_PREFIX,
     check_file_exists,
     upload_file,
-    download_file,
+    upload_data,
+    delete_files,
+    ObjectStream,
+    open_object_stream,
     is_s3_path,
     extract_base_name_and_extension
 )
+from core.resource_index import RESOURCE_EXTENSIONS, get_resource_index, get_resource_name
+from core.image_cache import get_image_cache
+from core.image_derivatives import (
+    DEFAULT_DERIVATIVE_FORMAT,
+    DERIVATIVE_CONTENT_TYPES,
+    DERIVATIVE_SIZES,
+    DerivativeFormats,
+    build_derivatives,
+    get_derivative_key,
+)
+from core.single_flight import SingleFlight
+from core.sprite_atlas import SpriteBundles, build_sprite_atlas, build_sprite_zip
+from core.resource_prefetch import ResourceKinds, ResourceTarget
+from apis.exceptions import InvalidResourceDerivativeError, ResourceRangeNotSatisfiableError
 
 _ALL_POKEMON_DICTS = [GEN1_NAME_TO_POKEMON, GEN2_NAME_TO_POKEMON, GEN3_NAME_TO_POKEMON, GEN4_NAME_TO_POKEMON]
+# Concurrent requests for the same missing image share a single download and upload
+_RESOURCE_FETCHES = SingleFlight("resource_fetches")
+_DERIVATIVE_BUILDS = SingleFlight("derivative_builds")
+# Number of sprites fetched concurrently, shared by all the bundle requests of the process
+_SPRITE_BUNDLE_WORKERS = 8
+_sprite_bundle_executor: Optional[ThreadPoolExecutor] = None
+_sprite_bundle_executor_lock = threading.Lock()
+
+# How long browsers may use a resource image before revalidating it (its ETag only changes with force=true)
+RESOURCE_MAX_AGE_SECONDS = int(os.getenv("RESOURCE_MAX_AGE_SECONDS", 7 * 24 * 60 * 60))
+
+# Not in the mimetypes database of every platform
+mimetypes.add_type('image/webp', '.webp')
 
 
 def _lookup_pokemon_form(pokemon_name: str) -> Tuple[Optional[str], Optional[str]]:
@@ -30,6 +68,355 @@ def _lookup_pokemon_form(pokemon_name: str) -> Tuple[Optional[str], Optional[str
             return pokemon.form, pokemon.base_name
     return None, None
 
+def _strip_image_extension(resource_name: str) -> str:
+    """Strip an image extension from a requested name (the web app requests pokemons as '<name>.png')."""
+    base_name, ext = os.path.splitext(resource_name)
+    return base_name if ext.lower() in RESOURCE_EXTENSIONS else resource_name
+
+def _find_resource_key(resource_name: str) -> Tuple[bool, Optional[str]]:
+    """Find the R2 key of a resource, through the resource index.
+
+    Args:
+        resource_name: The resource name, e.g. 'pokemons/pikachu'
+
+    Returns:
+        Tuple[bool, Optional[str]]: (known, s3 key), where known is False if the resource
+        has to be downloaded and True with a None key if it is known to be missing
+    """
+    resource_index = get_resource_index()
+    found, s3_key = resource_index.lookup(resource_name)
+    if found:
+        return True, s3_key
+    for ext in RESOURCE_EXTENSIONS:
+        s3_key = f"{RESOURCES_PREFIX}{resource_name}{ext}"
+        if check_file_exists(s3_key):
+            resource_index.record(resource_name, s3_key)
+            return True, s3_key
+    return False, None
+
+
+def forget_resource_key(s3_key: str) -> None:
+    """Remove a resource key from the resource index, e.g. when it is no longer found in R2."""
+    resource_name = get_resource_name(s3_key)
+    if resource_name is not None:
+        get_resource_index().forget(resource_name)
+
+
+def guess_resource_image_mimetype(image_path: str) -> str:
+    """Get the mimetype of a resource image from its S3 key or local path (JPEG if unknown)."""
+    return mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+
+
+def get_cached_resource_image_path(s3_key: str) -> Optional[str]:
+    """Get the local path of a resource image if it is in the image cache.
+
+    Args:
+        s3_key: The S3 key of the image
+
+    Returns:
+        Path to the cached image, or None if the image is not cached
+    """
+    return get_image_cache().get_path(s3_key)
+
+
+def open_resource_image_stream(s3_key: str, byte_range: Optional[str] = None) -> Optional[Tuple[ObjectStream, Iterator[bytes]]]:
+    """Open a streamed download of a resource image from R2.
+
+    Full downloads are written to the image cache while they are streamed, so the image is
+    never held in memory as a whole. The image is only cached if the stream is read to its end.
+
+    Args:
+        s3_key: The S3 key of the image
+        byte_range: An HTTP Range header value, to only stream part of the image (not cached)
+
+    Returns:
+        Tuple of (opened object, iterator over its chunks), or None if the image is not found in R2
+
+    Raises:
+        ResourceRangeNotSatisfiableError: If the range is outside of the image
+    """
+    try:
+        object_stream = open_object_stream(s3_key, byte_range)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'InvalidRange':
+            raise ResourceRangeNotSatisfiableError(s3_key, byte_range)
+        raise
+    if object_stream is None:
+        forget_resource_key(s3_key)
+        return None
+    if byte_range:
+        return object_stream, _iter_and_close(object_stream)
+    return object_stream, _iter_into_image_cache(s3_key, object_stream)
+
+
+def _iter_and_close(object_stream: ObjectStream) -> Iterator[bytes]:
+    try:
+        yield from object_stream.iter_chunks()
+    finally:
+        object_stream.close()
+
+
+def _iter_into_image_cache(s3_key: str, object_stream: ObjectStream) -> Iterator[bytes]:
+    cache_writer = get_image_cache().open_writer(s3_key)
+    completed = False
+    try:
+        for chunk in object_stream.iter_chunks():
+            cache_writer.write(chunk)
+            yield chunk
+        completed = True
+    finally:
+        object_stream.close()
+        if completed:
+            cache_writer.commit()
+        else:
+            cache_writer.abort()
+
+
+def get_resource_image_path(s3_key: str, refresh: bool = False) -> Optional[str]:
+    """Get the local path of a resource image, downloading it from R2 into the image cache on a miss.
+
+    Args:
+        s3_key: The S3 key of the image
+        refresh: If True, download the image again even if it is cached
+
+    Returns:
+        Path to the cached image, or None if the image is not found in R2 (or could not be cached)
+    """
+    if not refresh:
+        cached_path = get_cached_resource_image_path(s3_key)
+        if cached_path is not None:
+            return cached_path
+    opened_stream = open_resource_image_stream(s3_key)
+    if opened_stream is None:
+        return None
+    _, chunks = opened_stream
+    for _ in chunks:
+        pass
+    return get_cached_resource_image_path(s3_key)
+
+
+def upload_resource_derivatives(s3_key: str, image_data: bytes, image_format: str = DEFAULT_DERIVATIVE_FORMAT) -> Dict[int, str]:
+    """Build the normalized derivatives of a resource image and upload them to R2.
+
+    The cached images of the replaced derivatives are dropped from the image cache.
+
+    Args:
+        s3_key: The S3 key of the original image
+        image_data: The original image bytes
+        image_format: The format of the derivatives
+
+    Returns:
+        Dict mapping derivative size to its S3 key
+    """
+    derivative_keys = {}
+    image_cache = get_image_cache()
+    for size, derivative_data in build_derivatives(image_data, image_format).items():
+        derivative_key = get_derivative_key(s3_key, size, image_format)
+        derivative_keys[size] = upload_data(derivative_data, derivative_key, DERIVATIVE_CONTENT_TYPES[image_format])
+        image_cache.invalidate(derivative_key)
+    return derivative_keys
+
+
+def _upload_local_image_derivatives(s3_key: str, local_path: str) -> None:
+    # The original was (re-)uploaded, so its cached image and the derivatives of the other
+    # formats are stale, those derivatives are built again on their next request
+    image_cache = get_image_cache()
+    image_cache.invalidate(s3_key)
+    stale_keys = [
+        get_derivative_key(s3_key, size, image_format)
+        for image_format in DerivativeFormats.list_all() if image_format != DEFAULT_DERIVATIVE_FORMAT
+        for size in DERIVATIVE_SIZES
+    ]
+    for stale_key in stale_keys:
+        image_cache.invalidate(stale_key)
+    # Derivatives are only an optimization, the original upload succeeds without them
+    try:
+        delete_files(stale_keys)
+        with open(local_path, 'rb') as image_file:
+            upload_resource_derivatives(s3_key, image_file.read())
+    except Exception as e:
+        print(f"ERROR building derivatives of {s3_key}: {type(e).__name__}: {e}")
+
+
+def get_resource_derivative(s3_key: str, size: int, image_format: str = DEFAULT_DERIVATIVE_FORMAT) -> Optional[str]:
+    """Get the S3 key of a derivative of a resource image, building the derivatives if they are missing.
+
+    Args:
+        s3_key: The S3 key of the original image
+        size: The derivative's size (one of DERIVATIVE_SIZES)
+        image_format: The derivative's format
+
+    Returns:
+        S3 key of the derivative, or None if the original image is not found in R2
+    """
+    derivative_key = get_derivative_key(s3_key, size, image_format)
+    if get_image_cache().get_content_hash(derivative_key) is not None or check_file_exists(derivative_key):
+        return derivative_key
+    return _DERIVATIVE_BUILDS.do(derivative_key, lambda: _build_resource_derivatives(s3_key, derivative_key, image_format))
+
+
+def _build_resource_derivatives(s3_key: str, derivative_key: str, image_format: str) -> Optional[str]:
+    original_path = get_resource_image_path(s3_key)
+    if original_path is None:
+        return None
+    with open(original_path, 'rb') as image_file:
+        upload_resource_derivatives(s3_key, image_file.read(), image_format)
+    return derivative_key
+
+
+def _fetch_resource(resource_name: str, force: bool, download: Callable[[], Optional[str]]) -> Optional[str]:
+    """Download and upload a missing resource image, once for all the concurrent requests of the resource."""
+    def fetch():
+        if not force:
+            # Another request may have fetched the image since this request looked it up
+            found, s3_key = get_resource_index().lookup(resource_name)
+            if found:
+                return s3_key
+        return download()
+
+    return _RESOURCE_FETCHES.do(f"{RESOURCES_PREFIX}{resource_name}", fetch)
+
+
+def _record_missing_resource(resource_name: str) -> None:
+    """Record a resource whose download failed as missing, unless it already resolved to a key.
+
+    A failed forced re-download keeps serving the image stored before it.
+    """
+    resource_index = get_resource_index()
+    found, s3_key = resource_index.lookup(resource_name)
+    if not found or s3_key is None:
+        resource_index.record(resource_name, None)
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Get the counters of the coalesced resource fetches and derivative builds."""
+    return {single_flight.name: single_flight.stats() for single_flight in (_RESOURCE_FETCHES, _DERIVATIVE_BUILDS)}
+
+
+def get_resource_image_validators(s3_key: str) -> Tuple[Optional[str], Optional[float]]:
+    """Get the HTTP validators of a cached resource image, without reading the image.
+
+    The ETag is the sha256 of the image bytes, so it only changes when the image does.
+
+    Args:
+        s3_key: The S3 key of the image
+
+    Returns:
+        Tuple of (etag, last modified unix timestamp), both None if the image is not cached
+    """
+    image_cache = get_image_cache()
+    content_hash = image_cache.get_content_hash(s3_key)
+    if content_hash is None:
+        return None, None
+    return content_hash, image_cache.get_cached_at(s3_key)
+
+
+def parse_resource_derivative_request(size: Optional[str], image_format: Optional[str]) -> Tuple[Optional[int], str]:
+    """Parse the size and format query parameters of a resource image request.
+
+    Args:
+        size: The size query parameter, None for the original image
+        image_format: The format query parameter [default: DEFAULT_DERIVATIVE_FORMAT]
+
+    Returns:
+        Tuple of (size, format), the size is None if the original image is requested
+
+    Raises:
+        InvalidResourceDerivativeError: If the size or format is not supported
+    """
+    image_format = (image_format or DEFAULT_DERIVATIVE_FORMAT).lower()
+    if size is None:
+        return None, image_format
+    if not size.isdigit() or int(size) not in DERIVATIVE_SIZES or image_format not in DerivativeFormats.list_all():
+        raise InvalidResourceDerivativeError(size, image_format, DERIVATIVE_SIZES, DerivativeFormats.list_all())
+    return int(size), image_format
+
+
+@dataclass
+class ResourceImagePlan:
+    """How a resource image request is answered, the same by the Flask and the ASGI image routes.
+
+    Attributes:
+        image_path: S3 key of the image (or of its derivative), or local path of an image that failed to upload
+        mimetype: The image's mimetype, when it is not streamed with its R2 content type
+        max_age: Cache-Control max-age of the response
+        local_path: The file to send, None if the image is streamed from R2
+        byte_range: The Range header of a streamed request, None for a full download
+        etag: The image's ETag, None if it is not cached
+        last_modified: When the image was cached, as a unix timestamp
+        not_modified: True if the client's copy is still valid (answered with 304)
+    """
+    image_path: str
+    mimetype: str
+    max_age: int
+    local_path: Optional[str] = None
+    byte_range: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[float] = None
+    not_modified: bool = False
+
+
+def _is_not_modified(etag: str, last_modified: Optional[float], if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    # If-Modified-Since is ignored when If-None-Match is sent (RFC 7232)
+    if if_none_match:
+        return any(
+            candidate.strip() == '*' or candidate.strip().removeprefix('W/').strip('"') == etag
+            for candidate in if_none_match.split(',')
+        )
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        modified_since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have a one second precision
+    return int(last_modified) <= modified_since
+
+
+def plan_resource_image(image_path: str, size: Optional[int], image_format: str, force: bool = False,
+                        byte_range: Optional[str] = None, if_none_match: Optional[str] = None,
+                        if_modified_since: Optional[str] = None) -> Optional[ResourceImagePlan]:
+    """Decide how to answer a resource image request: 304, the cached image or a stream from R2.
+
+    Forced and ranged requests are streamed from R2, like images missing from the image cache.
+    The derivative of a size is built on its first request.
+
+    Args:
+        image_path: S3 key or local path returned by the resources API
+        size: The requested derivative size, None for the original image
+        image_format: The requested derivative format
+        force: If True, the image is streamed from R2 and refreshes the cached image
+        byte_range: The request's Range header
+        if_none_match: The request's If-None-Match header
+        if_modified_since: The request's If-Modified-Since header
+
+    Returns:
+        The plan, or None if the image (or the original of its derivative) is not found in R2
+    """
+    max_age = 0 if force else RESOURCE_MAX_AGE_SECONDS
+    if size is not None and is_s3_path(image_path):
+        image_path = get_resource_derivative(image_path, size, image_format)
+        if image_path is None:
+            return None
+    mimetype = guess_resource_image_mimetype(image_path)
+    if not is_s3_path(image_path):
+        return ResourceImagePlan(image_path, mimetype, max_age, local_path=image_path)
+    if byte_range and not byte_range.startswith('bytes='):
+        byte_range = None
+    if force or byte_range:
+        return ResourceImagePlan(image_path, mimetype, max_age, byte_range=byte_range)
+
+    etag, last_modified = get_resource_image_validators(image_path)
+    if etag is not None and _is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+        return ResourceImagePlan(image_path, mimetype, max_age, etag=etag, last_modified=last_modified, not_modified=True)
+    return ResourceImagePlan(
+        image_path, mimetype, max_age,
+        local_path=get_cached_resource_image_path(image_path),
+        etag=etag,
+        last_modified=last_modified,
+    )
+
+
 def get_pokemon_info(pokemon_name: str, force: bool = False) -> Optional[str]:
     """
     Get Pokemon image path from R2, downloading and uploading if necessary.
@@ -42,13 +429,17 @@ def get_pokemon_info(pokemon_name: str, force: bool = False) -> Optional[str]:
         S3 key path to the Pokemon image in R2 or None if not found
     """
     # Check if image exists in R2 with common extensions
-    pokemon_name_lower = pokemon_name.lower()
+    pokemon_name = _strip_image_extension(pokemon_name)
+    resource_name = f"pokemons/{pokemon_name.lower()}"
     if not force:
-        for ext in ['.jpeg', '.jpg', '.png']:
-            s3_key = f"pokemendel/resources/pokemons/{pokemon_name_lower}{ext}"
-            if check_file_exists(s3_key):
-                return s3_key
+        known, s3_key = _find_resource_key(resource_name)
+        if known:
+            return s3_key
     
+    return _fetch_resource(resource_name, force, lambda: _download_pokemon(pokemon_name, resource_name, force))
+
+def _download_pokemon(pokemon_name: str, resource_name: str, force: bool) -> Optional[str]:
+    """Download a Pokemon image and upload it to R2."""
     # Image doesn't exist in R2 (or force re-download), download it locally
     resources_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
     form, pokemon_base_name = _lookup_pokemon_form(pokemon_name)
@@ -56,6 +447,7 @@ def get_pokemon_info(pokemon_name: str, force: bool = False) -> Optional[str]:
     local_path = download_pokemon_from_google_search(download_name, resources_path, form=form, force=force)
     
     if local_path is None:
+        _record_missing_resource(resource_name)
         return None
     
     # Extract base name and extension from the downloaded file
@@ -63,19 +455,19 @@ def get_pokemon_info(pokemon_name: str, force: bool = False) -> Optional[str]:
     base_name, ext = extract_base_name_and_extension(local_path)
     
     # Use the clean base name (without any extensions) to construct S3 key
-    s3_key = f"pokemendel/resources/pokemons/{base_name.lower()}{ext}"
+    s3_key = f"{RESOURCES_PREFIX}pokemons/{base_name.lower()}{ext}"
     
     # Upload to R2
     try:
         uploaded_s3_key = upload_file(local_path, s3_key)
-        print(f"DEBUG: Upload successful, returning S3 key: {uploaded_s3_key}")
+        get_resource_index().record(resource_name, uploaded_s3_key)
+        _upload_local_image_derivatives(uploaded_s3_key, local_path)
         return uploaded_s3_key
     except Exception as e:
         print(f"ERROR uploading Pokemon image to R2: {type(e).__name__}: {e}")
         import traceback
         print(f"Traceback: {traceback.format_exc()}")
         # Fallback to local path if upload fails
-        print(f"DEBUG: Falling back to local path: {local_path}")
         return local_path
 
 def get_gym_leader_info(game_name: str, gym_name: str, force: bool = False) -> Optional[str]:
@@ -92,13 +484,16 @@ def get_gym_leader_info(game_name: str, gym_name: str, force: bool = False) -> O
     """
     # Check if image exists in R2 with common extensions
     game_name_lower = game_name.lower()
-    gym_name_lower = gym_name.lower()
+    resource_name = f"gyms/{game_name_lower}/{gym_name.lower()}"
     if not force:
-        for ext in ['.jpeg', '.jpg', '.png']:
-            s3_key = f"pokemendel/resources/gyms/{game_name_lower}/{gym_name_lower}{ext}"
-            if check_file_exists(s3_key):
-                return s3_key
+        known, s3_key = _find_resource_key(resource_name)
+        if known:
+            return s3_key
     
+    return _fetch_resource(resource_name, force, lambda: _download_gym_leader(game_name, gym_name, resource_name, force))
+
+def _download_gym_leader(game_name: str, gym_name: str, resource_name: str, force: bool) -> Optional[str]:
+    """Download a gym leader image and upload it to R2."""
     # Image doesn't exist in R2 (or force re-download), download it locally
     resources_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
     local_path = download_gym_from_google_search(
@@ -110,6 +505,7 @@ def get_gym_leader_info(game_name: str, gym_name: str, force: bool = False) -> O
     )
     
     if local_path is None:
+        _record_missing_resource(resource_name)
         return None
     
     # Extract base name and extension from the downloaded file
@@ -117,11 +513,14 @@ def get_gym_leader_info(game_name: str, gym_name: str, force: bool = False) -> O
     base_name, ext = extract_base_name_and_extension(local_path)
     
     # Use the clean base name (without any extensions) to construct S3 key
-    s3_key = f"pokemendel/resources/gyms/{game_name_lower}/{base_name.lower()}{ext}"
+    s3_key = f"{RESOURCES_PREFIX}gyms/{game_name.lower()}/{base_name.lower()}{ext}"
     
     # Upload to R2
     try:
-        return upload_file(local_path, s3_key)
+        uploaded_s3_key = upload_file(local_path, s3_key)
+        get_resource_index().record(resource_name, uploaded_s3_key)
+        _upload_local_image_derivatives(uploaded_s3_key, local_path)
+        return uploaded_s3_key
     except Exception as e:
         print(f"Error uploading gym leader image to R2: {e}")
         # Fallback to local path if upload fails
@@ -139,18 +538,22 @@ def get_type_info(type_name: str, force: bool = False) -> Optional[str]:
         S3 key path to the type image in R2 or None if not found
     """
     # Check if image exists in R2 with common extensions
-    type_name_lower = type_name.lower()
+    resource_name = f"types/{type_name.lower()}"
     if not force:
-        for ext in ['.jpeg', '.jpg', '.png']:
-            s3_key = f"pokemendel/resources/types/{type_name_lower}{ext}"
-            if check_file_exists(s3_key):
-                return s3_key
+        known, s3_key = _find_resource_key(resource_name)
+        if known:
+            return s3_key
     
+    return _fetch_resource(resource_name, force, lambda: _download_type(type_name, resource_name, force))
+
+def _download_type(type_name: str, resource_name: str, force: bool) -> Optional[str]:
+    """Download a Pokemon type image and upload it to R2."""
     # Image doesn't exist in R2 (or force re-download), download it locally
     resources_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
     local_path = download_pokemon_type_from_google_search(type_name, resources_path, force=force)
     
     if local_path is None:
+        _record_missing_resource(resource_name)
         return None
     
     # Extract base name and extension from the downloaded file
@@ -158,12 +561,102 @@ def get_type_info(type_name: str, force: bool = False) -> Optional[str]:
     base_name, ext = extract_base_name_and_extension(local_path)
     
     # Use the clean base name (without any extensions) to construct S3 key
-    s3_key = f"pokemendel/resources/types/{base_name.lower()}{ext}"
+    s3_key = f"{RESOURCES_PREFIX}types/{base_name.lower()}{ext}"
     
     # Upload to R2
     try:
-        return upload_file(local_path, s3_key)
+        uploaded_s3_key = upload_file(local_path, s3_key)
+        get_resource_index().record(resource_name, uploaded_s3_key)
+        _upload_local_image_derivatives(uploaded_s3_key, local_path)
+        return uploaded_s3_key
     except Exception as e:
         print(f"Error uploading type image to R2: {e}")
         # Fallback to local path if upload fails
         return local_path
+
+
+def prefetch_resource(target: ResourceTarget) -> Optional[str]:
+    """Make sure a resource is stored in R2, downloading and uploading it if it is missing.
+
+    Args:
+        target: The resource to prefetch
+
+    Returns:
+        S3 key path to the resource image in R2 or None if it could not be downloaded
+
+    Raises:
+        Exception: If the image was downloaded but could not be uploaded to R2
+    """
+    # A prefetch retries downloads even for names recently known to be missing
+    get_resource_index().forget(target.resource_name)
+    if target.kind == ResourceKinds.POKEMON:
+        image_path = get_pokemon_info(*target.args)
+    elif target.kind == ResourceKinds.GYM:
+        image_path = get_gym_leader_info(*target.args)
+    elif target.kind == ResourceKinds.TYPE:
+        image_path = get_type_info(*target.args)
+    else:
+        raise ValueError(f"Invalid resource kind '{target.kind}', expected one of {ResourceKinds.list_all()}")
+    if image_path is not None and not is_s3_path(image_path):
+        raise Exception(f"Failed to upload {image_path} to R2")
+    return image_path
+
+
+def _get_pokemon_sprite(pokemon_name: str, size: int, image_format: str) -> Optional[bytes]:
+    image_path = get_pokemon_info(pokemon_name)
+    if image_path is None:
+        return None
+    if not is_s3_path(image_path):
+        return _build_local_sprite(image_path, size, image_format)
+    derivative_key = get_resource_derivative(image_path, size, image_format)
+    image_path = get_resource_image_path(derivative_key) if derivative_key else None
+    if image_path is None:
+        return None
+    with open(image_path, 'rb') as image_file:
+        return image_file.read()
+
+
+def _build_local_sprite(local_path: str, size: int, image_format: str) -> Optional[bytes]:
+    # The image failed to upload to R2, its sprite is built from the local file like its derivatives
+    try:
+        with open(local_path, 'rb') as image_file:
+            return build_derivatives(image_file.read(), image_format)[size]
+    except Exception as e:
+        print(f"ERROR building sprite of {local_path}: {type(e).__name__}: {e}")
+        return None
+
+
+def _get_sprite_bundle_executor() -> ThreadPoolExecutor:
+    global _sprite_bundle_executor
+    if _sprite_bundle_executor is None:
+        with _sprite_bundle_executor_lock:
+            if _sprite_bundle_executor is None:
+                _sprite_bundle_executor = ThreadPoolExecutor(max_workers=_SPRITE_BUNDLE_WORKERS, thread_name_prefix="sprite-bundle")
+    return _sprite_bundle_executor
+
+
+def get_pokemon_sprites_bundle(pokemon_names: List[str], size: int, image_format: str, bundle: str = SpriteBundles.ATLAS) -> Tuple[Any, List[str]]:
+    """Get the sprites of several pokemons in a single bundle, built from their cached derivatives.
+
+    Args:
+        pokemon_names: The pokemons, duplicates are bundled once
+        size: The sprites' size (one of DERIVATIVE_SIZES)
+        image_format: The sprites' format
+        bundle: SpriteBundles.ATLAS for a packed atlas, SpriteBundles.ZIP for a zip of the sprites
+
+    Returns:
+        Tuple of (bundle, names of the pokemons without a sprite), where the atlas bundle is
+        {'atlas': <data URL of the atlas image>, 'frames': {name: {x, y, width, height}}, 'size': size}
+        and the zip bundle is the zip file bytes (None if no sprite was found)
+    """
+    pokemon_names = list(dict.fromkeys(_strip_image_extension(pokemon_name) for pokemon_name in pokemon_names))
+    sprites_data = list(_get_sprite_bundle_executor().map(lambda pokemon_name: _get_pokemon_sprite(pokemon_name, size, image_format), pokemon_names))
+    sprites = [(pokemon_name, sprite_data) for pokemon_name, sprite_data in zip(pokemon_names, sprites_data) if sprite_data is not None]
+    missing_pokemons = [pokemon_name for pokemon_name, sprite_data in zip(pokemon_names, sprites_data) if sprite_data is None]
+    if not sprites:
+        return None, missing_pokemons
+    if bundle == SpriteBundles.ZIP:
+        return build_sprite_zip(sprites, image_format), missing_pokemons
+    atlas_data, frames = build_sprite_atlas(sprites, size, image_format)
+    atlas_url = f"data:{DERIVATIVE_CONTENT_TYPES[image_format]};base64,{base64.b64encode(atlas_data).decode()}"
+    return {'atlas': atlas_url, 'frames': frames, 'size': size}, missing_pokemons
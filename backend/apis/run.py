@@ -2,7 +2,7 @@ from typing import List, Dict, Optional, Union, Tuple
 from models.run import fetch_run
 from models.run_pokemons_options import list_runs_options, list_runs_options_by_query
 from games import get_game
-from core.lockes import LOCKE_INSTANCES
+from core.lockes import get_locke
 from core.lockes.genlocke.utils import get_generation_potential_games, REGION_TO_GEN, SELECTED_LOCKE
 from core.run import convert_db_run_to_core_run
 from core.run_manager import RunManager
@@ -15,8 +15,7 @@ def _get_run_manager(run_id: str) -> RunManager:
     db_run = fetch_run(run_id)
     run = convert_db_run_to_core_run(db_run, run_id)
     game = get_game(db_run.game)
-    locke = LOCKE_INSTANCES[db_run.locke]
-    locke.extra_info = db_run.locke_extra_info
+    locke = get_locke(db_run.locke, db_run.locke_extra_info)
     run_manager = RunManager(
         run=run,
         locke=locke,
@@ -46,11 +45,11 @@ def get_run_potential_pokemons(run_id: str) -> List[str]:
 
 def get_run_potential_encounters(run_id: str, route: Optional[str]) -> List[str]:
     run_manager = _get_run_manager(run_id)
+    # The caught flags are read from the database, a cached copy may miss the catches of other workers
     run_options = (
         list_runs_options_by_query(run_id, {'caught': False})
         if run_manager.duplicate_clause
-        else
-        list_runs_options(run_id)
+        else list_runs_options(run_id)
     )
     relevant_encounters = [pokemon_option.pokemon_name for pokemon_option in run_options]
     route_encounters = set(relevant_encounters) if run_manager.randomized else run_manager.game.potential_encounters(route)
@@ -72,6 +71,17 @@ def get_next_actions(run_id: str, pokemon_id: str) -> List[str]:
     return run_manager.get_pokemon_next_actions(pokemon_id)
 
 
+def get_run_box_pokemon_names(run_id: str) -> List[str]:
+    db_run = fetch_run(run_id)
+    run = convert_db_run_to_core_run(db_run, run_id)
+    return [pokemon.name for pokemon in run.box.pokemons]
+
+
+def get_all_next_actions(run_id: str) -> Dict[str, List[str]]:
+    run_manager = _get_run_manager(run_id)
+    return run_manager.get_all_pokemons_next_actions()
+
+
 def get_action_options(run_id: str, pokemon_id: str, action: str) -> Dict[str, Union[str, List[str]]]:
     run_manager = _get_run_manager(run_id)
     input_type, input_options = run_manager.get_action_options(pokemon_id, action)
@@ -86,6 +96,14 @@ def execute_action(run_id: str, pokemon_id: str, action: str, value: str):
     run_manager.execute_action(pokemon_id, action, value)
 
 
+def execute_actions(run_id: str, actions: List[Dict[str, str]]):
+    run_manager = _get_run_manager(run_id)
+    run_manager.execute_actions([
+        (action['pokemon_id'], action['action'], action['value'])
+        for action in actions
+    ])
+
+
 def win_battle(run_id: str, leader: str):
     run_manager = _get_run_manager(run_id)
     run_manager.win_battle(leader)
@@ -1,9 +1,10 @@
 from models.run import fetch_run, update_run as update_run_db, _COLLECTIONS_SAVE_NAME, Run
 from models.pokemon import backup_pokemons, restore_pokemons, fetch_pokemon
-from models.run_pokemons_options import unmark_caught_pokemon
+from models.run_pokemons_options import set_caught_pokemons
+from models.storage import is_embedded_storage
 from responses.run import RunResponse
 from core.run import convert_db_run_to_core_run
-from core.lockes import LOCKE_INSTANCES
+from core.lockes import get_locke
 from games import get_game
 from apis.exceptions import InvalidGameError
 
@@ -24,8 +25,7 @@ def get_run_api(run_id: str) -> RunResponse:
     db_run = fetch_run(run_id)
     core_run = convert_db_run_to_core_run(db_run, run_id)
     game = get_game(db_run.game)
-    locke = LOCKE_INSTANCES[db_run.locke]
-    locke.extra_info = db_run.locke_extra_info
+    locke = get_locke(db_run.locke, db_run.locke_extra_info)
     response_run = RunResponse.from_core_run(core_run, game, locke)
     return response_run
 
@@ -34,7 +34,9 @@ def save_run(run_id) -> None:
     print("Saving run %s" % run_id)
     db_run = fetch_run(run_id)
     update_run_db(db_run, _COLLECTIONS_SAVE_NAME)
-    backup_pokemons(run_id)
+    if not is_embedded_storage() or db_run.pokemons is None:
+        # Embedded pokemons were saved together with the run document
+        backup_pokemons(run_id)
 
 
 def load_run(run_id) -> RunResponse:
@@ -42,23 +44,29 @@ def load_run(run_id) -> RunResponse:
     db_run_to_load = fetch_run(run_id, _COLLECTIONS_SAVE_NAME)
     pre_load_run = fetch_run(run_id)
     _restore_pokemon_options(pre_load_run=pre_load_run, post_load_run=db_run_to_load)
-    restore_pokemons(run_id)
+    if not is_embedded_storage() or db_run_to_load.pokemons is None:
+        # Embedded pokemons are restored together with the run document
+        restore_pokemons(run_id)
     db_run_to_load.restarts += 1
     update_run_db(db_run_to_load)
     update_run_db(db_run_to_load, _COLLECTIONS_SAVE_NAME)
     core_run = convert_db_run_to_core_run(db_run_to_load, run_id)
     game = get_game(db_run_to_load.game)
-    locke = LOCKE_INSTANCES[db_run_to_load.locke]
-    locke.extra_info = db_run_to_load.locke_extra_info
+    locke = get_locke(db_run_to_load.locke, db_run_to_load.locke_extra_info)
     response_run = RunResponse.from_core_run(core_run, game, locke)
     return response_run
 
 
 def _restore_pokemon_options(pre_load_run: Run, post_load_run: Run):
     newly_caught_pokemons = set(pre_load_run.box) - set(post_load_run.box)
-    for pokemon_id in newly_caught_pokemons:
-        pokemon = fetch_pokemon(pokemon_id)
-        unmark_caught_pokemon(pre_load_run.run_id, pokemon.name)
+    pokemon_names = [
+        pre_load_run.pokemons[pokemon_id]['name']
+        if pre_load_run.pokemons is not None and pokemon_id in pre_load_run.pokemons
+        else
+        fetch_pokemon(pokemon_id).name
+        for pokemon_id in newly_caught_pokemons
+    ]
+    set_caught_pokemons(pre_load_run.run_id, pokemon_names, caught=False)
 
 
 def finish_run(run_id: str) -> RunResponse:
@@ -79,8 +87,7 @@ def finish_run(run_id: str) -> RunResponse:
     save_run(run_id)
     core_run = convert_db_run_to_core_run(db_run, run_id)
     game = get_game(db_run.game)
-    locke = LOCKE_INSTANCES[db_run.locke]
-    locke.extra_info = db_run.locke_extra_info
+    locke = get_locke(db_run.locke, db_run.locke_extra_info)
     response_run = RunResponse.from_core_run(core_run, game, locke)
     return response_run
 
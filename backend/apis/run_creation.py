@@ -2,7 +2,9 @@
 
 from models.run_creation import RunCreation, fetch_run_creation, update_run_creation
 from models.run import Run as DBRun, save_run
-from core.lockes import LOCKE_INSTANCES, get_run_creator_class, GenLocke, list_all_lockes
+from models.pokemon import pokemons_to_documents
+from models.storage import is_embedded_storage
+from core.lockes import LOCKE_INSTANCES, get_locke, get_run_creator_class, GenLocke, list_all_lockes
 from games import get_games_from_gen, get_game
 from .exceptions import RunAlreadyExistsError, InvalidLockeTypeError, RunNotFoundError, InvalidGameError
 from typing import TypedDict, Optional
@@ -126,9 +128,8 @@ def continue_run_creation(run_name: str, key: Optional[str] = None, val: Optiona
         creator.update_progress(key, val)
     
     # Get the current progress
-    locke = LOCKE_INSTANCES[existing_run.locke]
+    locke = get_locke(existing_run.locke, existing_run.extra_info)
     progress = creator.get_progress(locke.min_gen)
-    locke.extra_info = existing_run.extra_info
     
     # Return appropriate response based on progress
     if progress.has_all_info:
@@ -158,7 +159,8 @@ def continue_run_creation(run_name: str, key: Optional[str] = None, val: Optiona
             restarts=core_run.restarts,
             duplicate_clause=existing_run.duplicate_clause or False,
             finished=core_run.finished,
-            starter=str(core_run.starter.metadata.id) if core_run.starter else None
+            starter=str(core_run.starter.metadata.id) if core_run.starter else None,
+            pokemons=pokemons_to_documents(core_run.id, core_run.box.pokemons) if is_embedded_storage() else None,
         )
         
         # Save the run to the database
@@ -6,12 +6,19 @@ from dotenv import load_dotenv
 from responses.exceptions import BlackoutException, ContinueCreationException
 from apis.generation import jump_to_next_gen
 from apis.main import list_runs_api
+from apis.metrics import get_metrics_api
 from apis.resources import (
     get_pokemon_info, 
     get_gym_leader_info, 
-    get_type_info
+    get_type_info,
+    open_resource_image_stream,
+    get_pokemon_sprites_bundle,
+    guess_resource_image_mimetype,
+    parse_resource_derivative_request,
+    plan_resource_image,
 )
-from core.r2 import download_file, is_s3_path
+from core.image_derivatives import DERIVATIVE_SIZES
+from core.sprite_atlas import MAX_BUNDLE_SPRITES, SpriteBundles
 from apis.run_creation import start_run_creation, continue_run_creation
 from apis.run_admin import get_run_api, save_run, load_run
 from apis.run import (
@@ -23,21 +30,39 @@ from apis.run import (
     get_run_potential_encounters,
     win_battle,
     get_next_actions,
+    get_all_next_actions,
+    get_run_box_pokemon_names,
     get_action_options,
     execute_action,
+    execute_actions,
     finish_run,
 )
 from core.lockes import list_all_lockes
+from models.indexes import ensure_indexes
 from scripts.generate_pokemon_showdown import generate_showdown_format
 from scripts.showdown_movesets import MOVESETS
 from functools import wraps
 import traceback
+import os
+from typing import Optional, Tuple
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
+
+@app.before_first_request
+def ensure_db_indexes():
+    """Create the registered MongoDB indexes (disable with ENSURE_INDEXES=false)."""
+    if os.getenv("ENSURE_INDEXES", "true").lower() not in ("true", "1", "yes"):
+        return
+    try:
+        ensured_indexes = ensure_indexes()
+        print(f"Ensured indexes: {ensured_indexes}")
+    except Exception as e:
+        print(f"ERROR: Failed to ensure indexes: {e}")
+
 def locke_route(path, *args, **kwargs):
     """Decorator for Locke-related routes that handles error handling.
     
@@ -92,6 +117,97 @@ def get_lockes():
     print("Found %s lockes: %s" % (len(lockes), lockes))
     return jsonify(lockes)
 
+def _stream_resource_image(s3_key: str, byte_range: Optional[str], resource_description: str):
+    """Stream a resource image from R2 in chunks, filling the image cache on the way.
+
+    Range requests are forwarded to R2 and answered with 206. Streamed responses have no ETag,
+    so they are sent with no-cache (and max-age=0, e.g. for forced refreshes): the next request
+    revalidates and gets the ETag of the cached image.
+    """
+    opened_stream = open_resource_image_stream(s3_key, byte_range)
+    if opened_stream is None:
+        return jsonify({
+            "status": "error",
+            "message": f"{resource_description} not found in R2"
+        }), 404
+    object_stream, chunks = opened_stream
+    response = Response(
+        chunks,
+        status=206 if object_stream.content_range else 200,
+        mimetype=object_stream.content_type or guess_resource_image_mimetype(s3_key),
+        direct_passthrough=True,
+    )
+    response.content_length = object_stream.content_length
+    if object_stream.content_range:
+        response.headers['Content-Range'] = object_stream.content_range
+    response.accept_ranges = 'bytes'
+    response.last_modified = object_stream.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 0
+    response.cache_control.no_cache = True
+    return response
+
+def _get_requested_derivative() -> Tuple[Optional[int], str]:
+    """Get the derivative requested by the size and format query parameters (see parse_resource_derivative_request)."""
+    return parse_resource_derivative_request(request.args.get('size'), request.args.get('format'))
+
+def _send_resource_image(image_path: str, resource_description: str, force: bool = False):
+    """Send a resource image, from the local image cache when it's stored in R2.
+
+    Responses carry an ETag (hash of the image), Last-Modified and a long-lived Cache-Control,
+    so browsers revalidate sprites instead of refetching them. Revalidations of cached images
+    are answered with 304 without reading (or downloading) the image. Images missing from the
+    cache are streamed from R2.
+
+    The size (and format) query parameters select a normalized derivative of the image,
+    which is built on first request if the image was uploaded without derivatives.
+
+    Args:
+        image_path: S3 key or local path returned by the resources API
+        resource_description: Description of the resource used in the error message
+        force: If True, the cached image is refreshed from R2
+    """
+    size, image_format = _get_requested_derivative()
+    plan = plan_resource_image(
+        image_path, size, image_format, force=force,
+        byte_range=request.headers.get('Range'),
+        if_none_match=request.headers.get('If-None-Match'),
+        if_modified_since=request.headers.get('If-Modified-Since'),
+    )
+    if plan is None:
+        return jsonify({
+            "status": "error",
+            "message": f"{resource_description} not found in R2"
+        }), 404
+    if plan.not_modified:
+        response = Response(status=304)
+        response.set_etag(plan.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = plan.max_age
+        return response
+    if plan.local_path is not None:
+        try:
+            return _send_image_file(plan.local_path, plan.mimetype, plan.etag, plan.last_modified, plan.max_age)
+        except FileNotFoundError:
+            # Evicted by another request since it was looked up
+            pass
+    return _stream_resource_image(plan.image_path, plan.byte_range, resource_description)
+
+def _send_image_file(image_path: str, mimetype: str, etag: Optional[str], last_modified: Optional[float], max_age: int):
+    """Send a local image file, opened before returning, so a missing file raises FileNotFoundError here.
+
+    Conditional send_file also answers If-Modified-Since with 304 and Range requests with 206.
+    """
+    return send_file(
+        image_path,
+        mimetype=mimetype,
+        as_attachment=False,
+        conditional=True,
+        etag=etag or True,
+        last_modified=last_modified,
+        max_age=max_age,
+    )
+
 @locke_route('resources/pokemon/<pokemon_name>', methods=['GET'])
 def get_pokemon_resource(pokemon_name):
     """Get Pokemon image by name.
@@ -109,27 +225,7 @@ def get_pokemon_resource(pokemon_name):
             "status": "error",
             "message": f"Pokemon '{pokemon_name}' not found"
         }), 404
-    
-    # If it's an S3 path, download from R2 and serve
-    if is_s3_path(image_path):
-        file_data = download_file(image_path)
-        if file_data is None:
-            return jsonify({
-                "status": "error",
-                "message": f"Pokemon '{pokemon_name}' not found in R2"
-            }), 404
-        return Response(
-            file_data,
-            mimetype='image/jpeg',
-            headers={'Content-Disposition': 'inline'}
-        )
-    
-    # Otherwise, it's a local path
-    return send_file(
-        image_path,
-        mimetype='image/jpeg',
-        as_attachment=False
-    )
+    return _send_resource_image(image_path, f"Pokemon '{pokemon_name}'", force=force)
 
 @locke_route('resources/game/<game_name>/gyms/<gym_name>', methods=['GET'])
 def get_gym_leader_resource(game_name, gym_name):
@@ -149,27 +245,7 @@ def get_gym_leader_resource(game_name, gym_name):
             "status": "error",
             "message": f"Gym leader '{gym_name}' from game '{game_name}' not found"
         }), 404
-    
-    # If it's an S3 path, download from R2 and serve
-    if is_s3_path(image_path):
-        file_data = download_file(image_path)
-        if file_data is None:
-            return jsonify({
-                "status": "error",
-                "message": f"Gym leader '{gym_name}' from game '{game_name}' not found in R2"
-            }), 404
-        return Response(
-            file_data,
-            mimetype='image/jpeg',
-            headers={'Content-Disposition': 'inline'}
-        )
-    
-    # Otherwise, it's a local path
-    return send_file(
-        image_path,
-        mimetype='image/jpeg',
-        as_attachment=False
-    )
+    return _send_resource_image(image_path, f"Gym leader '{gym_name}' from game '{game_name}'", force=force)
 
 @locke_route('resources/types/<type_name>', methods=['GET'])
 def get_type_resource(type_name):
@@ -188,27 +264,52 @@ def get_type_resource(type_name):
             "status": "error",
             "message": f"Type '{type_name}' not found"
         }), 404
-    
-    # If it's an S3 path, download from R2 and serve
-    if is_s3_path(image_path):
-        file_data = download_file(image_path)
-        if file_data is None:
+    return _send_resource_image(image_path, f"Type '{type_name}'", force=force)
+
+def _send_pokemon_sprites(pokemon_names):
+    """Send the sprites of several pokemons in one response.
+
+    Query parameters:
+        size: The sprites' size [default: the smallest derivative size]
+        format: The sprites' format [default: webp]
+        bundle: atlas (JSON with the atlas image and the frame of every sprite) or zip [default: atlas]
+    """
+    size, image_format = _get_requested_derivative()
+    size = size or DERIVATIVE_SIZES[0]
+    bundle = request.args.get('bundle', SpriteBundles.ATLAS).lower()
+    if bundle not in SpriteBundles.list_all():
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid bundle '{bundle}'. Available bundles: {SpriteBundles.list_all()}"
+        }), 400
+    if not pokemon_names or len(pokemon_names) > MAX_BUNDLE_SPRITES:
+        return jsonify({
+            "status": "error",
+            "message": f"Expected 1 to {MAX_BUNDLE_SPRITES} pokemons, got {len(pokemon_names)}"
+        }), 400
+
+    sprites_bundle, missing_pokemons = get_pokemon_sprites_bundle(pokemon_names, size, image_format, bundle)
+    if bundle == SpriteBundles.ZIP:
+        if sprites_bundle is None:
             return jsonify({
                 "status": "error",
-                "message": f"Type '{type_name}' not found in R2"
+                "message": f"No sprite found for pokemons {missing_pokemons}"
             }), 404
-        return Response(
-            file_data,
-            mimetype='image/jpeg',
-            headers={'Content-Disposition': 'inline'}
-        )
-    
-    # Otherwise, it's a local path
-    return send_file(
-        image_path,
-        mimetype='image/jpeg',
-        as_attachment=False
-    )
+        response = Response(sprites_bundle, mimetype='application/zip')
+        response.headers['X-Missing-Pokemons'] = ",".join(missing_pokemons)
+        return response
+    return jsonify({**(sprites_bundle or {'atlas': None, 'frames': {}, 'size': size}), 'missing': missing_pokemons})
+
+@locke_route('resources/pokemons/sprites', methods=['GET'])
+def get_pokemons_sprites_resource():
+    """Get the sprites of several pokemons, given as comma-separated names, in a single response."""
+    pokemon_names = [pokemon_name.strip() for pokemon_name in request.args.get('names', '').split(',') if pokemon_name.strip()]
+    return _send_pokemon_sprites(pokemon_names)
+
+@locke_route('run/<run_id>/sprites', methods=['GET'])
+def get_run_sprites_api(run_id):
+    """Get the sprites of all the pokemons in a run's box in a single response."""
+    return _send_pokemon_sprites(get_run_box_pokemon_names(run_id))
 
 @locke_route('run', methods=['PUT'])
 def create_new_run_api():
@@ -437,6 +538,12 @@ def get_next_actions_api(run_id, pokemon_id):
     return jsonify(pokemon_next_actions)
 
 
+@locke_route('run/<run_id>/actions', methods=['GET'])
+def get_all_next_actions_api(run_id):
+    pokemons_next_actions = get_all_next_actions(run_id)
+    return jsonify(pokemons_next_actions)
+
+
 @locke_route('run/<run_id>/pokemon/<pokemon_id>/action', methods=['GET'])
 def get_action_options_api(run_id, pokemon_id):
     action = request.args.get('action')
@@ -456,6 +563,27 @@ def execute_action_api(run_id, pokemon_id):
     return jsonify({'status': 'success'})
 
 
+@locke_route('run/<run_id>/actions', methods=['POST'])
+def execute_actions_api(run_id):
+    data = request.get_json()
+    if not data or not isinstance(data.get('actions'), list):
+        return jsonify({
+            'error': 'Missing required field: actions'
+        }), 400
+    if any(not isinstance(action, dict) or {'pokemon_id', 'action', 'value'} - action.keys() for action in data['actions']):
+        return jsonify({
+            'error': 'Every action requires pokemon_id, action and value'
+        }), 400
+    execute_actions(run_id, data['actions'])
+    return jsonify({'status': 'success'})
+
+
+@locke_route('metrics', methods=['GET'])
+def get_metrics():
+    """Get the process metrics (timings per operation)."""
+    return jsonify(get_metrics_api())
+
+
 @locke_route('showdown/generations', methods=['GET'])
 def get_showdown_generations():
     return jsonify(sorted(MOVESETS.keys()))
@@ -490,7 +618,6 @@ def win_battle_api(run_id, leader):
 
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5222))
     debug = os.environ.get('FLASK_ENV') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
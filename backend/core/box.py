@@ -5,26 +5,47 @@ with functionality for adding, removing, and querying Pokemon in the box.
 """
 
 from definitions import Pokemon, PokemonStatus
-from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
-@dataclass
 class Box:
     """A container for managing a collection of Pokemon.
     
     The Box class provides methods for adding, removing, and querying Pokemon.
-    It maintains a list of Pokemon and ensures no duplicates are added.
+    It keeps the Pokemon in an insertion-ordered id index, so lookups, additions and
+    removals don't scan the box, and partitions the ids by status for status queries.
+    Pokemon statuses must be changed through set_pokemon_status to keep the partitions in sync.
     
     Attributes:
-        pokemons: A list of Pokemon in the box
+        pokemons: A list of Pokemon in the box, in insertion order
     """
-    pokemons: List[Pokemon]
 
-    def __post_init__(self):
-        """Validate the box initialization."""
-        if self.pokemons is None:
-            self.pokemons = []
+    def __init__(self, pokemons: Optional[List[Pokemon]] = None):
+        """Initialize the box.
+        
+        Args:
+            pokemons: The Pokemon in the box, in insertion order
+        """
+        self._pokemons_by_id: Dict[str, Pokemon] = {}
+        self._positions: Dict[str, int] = {}
+        self._statuses: Dict[str, str] = {}
+        self._ids_by_status: Dict[str, Dict[str, None]] = {}
+        self._next_position = 0
+        for pokemon in pokemons or []:
+            Box.add_pokemon(self, pokemon)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(pokemons={self.pokemons!r})"
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.pokemons == other.pokemons
+
+    @property
+    def pokemons(self) -> List[Pokemon]:
+        """The Pokemon in the box, in insertion order."""
+        return list(self._pokemons_by_id.values())
 
     def add_pokemon(self, pokemon: Pokemon) -> None:
         """Add a Pokemon to the box.
@@ -36,7 +57,11 @@ class Box:
             AssertionError: If the Pokemon is already in the box
         """
         assert not self._is_pokemon_in_box(pokemon.metadata.id), f"Pokemon {pokemon.metadata.id} already in box"
-        self.pokemons.append(pokemon)
+        self._pokemons_by_id[pokemon.metadata.id] = pokemon
+        self._positions[pokemon.metadata.id] = self._next_position
+        self._next_position += 1
+        self._statuses[pokemon.metadata.id] = pokemon.status
+        self._ids_by_status.setdefault(pokemon.status, {})[pokemon.metadata.id] = None
 
     def remove_pokemon(self, pokemon: Pokemon) -> None:
         """Remove a Pokemon from the box.
@@ -48,7 +73,28 @@ class Box:
             AssertionError: If the Pokemon is not in the box
         """
         assert self._is_pokemon_in_box(pokemon.metadata.id), f"Pokemon {pokemon.metadata.id} is not in box"
-        self.pokemons = [box_pokemon for box_pokemon in self.pokemons if box_pokemon.metadata.id != pokemon.metadata.id]
+        del self._pokemons_by_id[pokemon.metadata.id]
+        del self._positions[pokemon.metadata.id]
+        del self._ids_by_status[self._statuses.pop(pokemon.metadata.id)][pokemon.metadata.id]
+
+    def set_pokemon_status(self, pokemon: Pokemon, status: str) -> None:
+        """Change the status of a Pokemon in the box.
+        
+        The status partitions track the status per box, so a Pokemon held by several
+        boxes (box and party) must be updated in each of them (see Run.set_pokemon_status).
+        
+        Args:
+            pokemon: The Pokemon to update
+            status: The new status
+            
+        Raises:
+            AssertionError: If the Pokemon is not in the box
+        """
+        assert self._is_pokemon_in_box(pokemon.metadata.id), f"Pokemon {pokemon.metadata.id} is not in box"
+        del self._ids_by_status[self._statuses[pokemon.metadata.id]][pokemon.metadata.id]
+        self._statuses[pokemon.metadata.id] = status
+        self._ids_by_status.setdefault(status, {})[pokemon.metadata.id] = None
+        self._pokemons_by_id[pokemon.metadata.id].status = status
 
     def _is_pokemon_in_box(self, pokemon_id: str) -> bool:
         """Check if a Pokemon is in the box.
@@ -59,7 +105,7 @@ class Box:
         Returns:
             bool: True if the Pokemon is in the box, False otherwise
         """
-        return bool(self.get_pokemon_by_id(pokemon_id))
+        return pokemon_id in self._pokemons_by_id
 
     def get_pokemon_by_id(self, pokemon_id: str) -> Optional[Pokemon]:
         """Get a Pokemon by its ID.
@@ -70,7 +116,7 @@ class Box:
         Returns:
             Optional[Pokemon]: The Pokemon if found, None otherwise
         """
-        return next((pokemon for pokemon in self.pokemons if pokemon.metadata.id == pokemon_id), None)
+        return self._pokemons_by_id.get(pokemon_id)
 
     def get_alive_pokemons(self) -> List[Pokemon]:
         """Get all alive Pokemon in the box.
@@ -78,11 +124,12 @@ class Box:
         Returns:
             List[Pokemon]: A list of all Pokemon that are not dead
         """
+        dead_ids = self._ids_by_status.get(PokemonStatus.DEAD, {})
         return [
             box_pokemon
-            for box_pokemon
-            in self.pokemons
-            if box_pokemon.status != PokemonStatus.DEAD
+            for pokemon_id, box_pokemon
+            in self._pokemons_by_id.items()
+            if pokemon_id not in dead_ids
         ]
 
     def get_dead_pokemons(self) -> List[Pokemon]:
@@ -91,12 +138,7 @@ class Box:
         Returns:
             List[Pokemon]: A list of all Pokemon that are dead
         """
-        return [
-            box_pokemon
-            for box_pokemon
-            in self.pokemons
-            if box_pokemon.status == PokemonStatus.DEAD
-        ]
+        return self.get_pokemons_by_status(PokemonStatus.DEAD)
 
     def get_pokemons_by_status(self, status: PokemonStatus) -> List[Pokemon]:
         """Get all Pokemon with a specific status.
@@ -108,10 +150,9 @@ class Box:
             List[Pokemon]: A list of all Pokemon with the specified status
         """
         return [
-            box_pokemon
-            for box_pokemon
-            in self.pokemons
-            if box_pokemon.status == status
+            self._pokemons_by_id[pokemon_id]
+            for pokemon_id
+            in sorted(self._ids_by_status.get(status, {}), key=self._positions.__getitem__)
         ]
 
     def get_pokemon_count(self) -> int:
@@ -120,7 +161,7 @@ class Box:
         Returns:
             int: The number of Pokemon in the box
         """
-        return len(self.pokemons)
+        return len(self._pokemons_by_id)
 
     def is_empty(self) -> bool:
         """Check if the box is empty.
@@ -128,4 +169,4 @@ class Box:
         Returns:
             bool: True if the box is empty, False otherwise
         """
-        return len(self.pokemons) == 0
+        return not self._pokemons_by_id
@@ -0,0 +1,321 @@
+"""Local disk cache of the resources images downloaded from R2.
+
+Images are stored content-addressed: every distinct image is a single blob file named by
+the sha256 of its bytes, and every R2 key points to its blob with a small key file. Cached
+images are served straight from the blob files (send_file), so repeated requests for the
+same image never reach R2.
+
+The total size of the blobs is capped, the least recently used blobs (by modification
+time, which is refreshed on every hit) are evicted first. Key files of evicted blobs are
+dropped lazily, on their next lookup. Every process keeps a running total of the blobs size
+(scanned once on startup), the blobs directory is only scanned again once it exceeds the cap.
+
+Configuration (per process):
+    IMAGE_CACHE_DIR - directory of the cache [default: <tmp>/locke_manager_image_cache]
+    IMAGE_CACHE_MAX_BYTES - maximum total size of the cached images [default: 256MB]
+"""
+
+import os
+import tempfile
+import threading
+from hashlib import sha1, sha256
+from typing import Any, Dict, Optional
+
+_DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_cache_lock = threading.Lock()
+_image_cache: Optional["ImageCache"] = None
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    # Readers (other threads or workers) never see a partially written file
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ImageCacheWriter:
+    """Writes an image into the cache chunk by chunk, e.g. while it is streamed to a client.
+
+    The image only becomes visible in the cache on commit. Write errors (e.g. a full disk)
+    don't fail the stream, they just keep the image out of the cache.
+    """
+
+    def __init__(self, image_cache: "ImageCache", s3_key: str):
+        self._image_cache = image_cache
+        self._s3_key = s3_key
+        self._hash = sha256()
+        self._size = 0
+        self._temp_file = None
+        self._temp_path = None
+        try:
+            file_descriptor, self._temp_path = tempfile.mkstemp(dir=image_cache._blobs_directory, suffix=".tmp")
+            self._temp_file = os.fdopen(file_descriptor, 'wb')
+        except OSError as e:
+            print(f"Failed to cache image {s3_key}: {e}")
+            self.abort()
+
+    def write(self, chunk: bytes) -> None:
+        if self._temp_file is None:
+            return
+        try:
+            self._temp_file.write(chunk)
+            self._hash.update(chunk)
+            self._size += len(chunk)
+        except OSError as e:
+            print(f"Failed to cache image {self._s3_key}: {e}")
+            self.abort()
+
+    def commit(self) -> Optional[str]:
+        """Store the written image under the writer's key.
+
+        Returns:
+            The path of the cached image, or None if writing it failed
+        """
+        if self._temp_file is None:
+            return None
+        try:
+            self._temp_file.close()
+            self._temp_file = None
+            content_hash = self._hash.hexdigest()
+            blob_path = self._image_cache._blob_path(content_hash)
+            added_bytes = None
+            if os.path.exists(blob_path):
+                os.remove(self._temp_path)
+                os.utime(blob_path)
+            else:
+                os.replace(self._temp_path, blob_path)
+                added_bytes = self._size
+            self._temp_path = None
+            _write_atomically(self._image_cache._key_path(self._s3_key), content_hash.encode())
+        except OSError as e:
+            print(f"Failed to cache image {self._s3_key}: {e}")
+            self.abort()
+            return None
+        if added_bytes is not None:
+            self._image_cache._add_blob(added_bytes, keep=blob_path)
+        return blob_path
+
+    def abort(self) -> None:
+        """Discard the written chunks."""
+        if self._temp_file is not None:
+            self._temp_file.close()
+            self._temp_file = None
+        if self._temp_path is not None:
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                pass
+            self._temp_path = None
+
+
+class ImageCache:
+    """Content-addressed, size capped disk cache of images by R2 key.
+
+    Attributes:
+        directory: Root directory of the cache
+        max_bytes: Maximum total size of the cached blobs
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that were not cached
+        evictions: Number of evicted blobs
+    """
+
+    def __init__(self, directory: str, max_bytes: int = _DEFAULT_MAX_BYTES):
+        assert max_bytes > 0, "Cache must hold at least one byte"
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._blobs_directory = os.path.join(directory, "blobs")
+        self._keys_directory = os.path.join(directory, "keys")
+        self._lock = threading.Lock()
+        os.makedirs(self._blobs_directory, exist_ok=True)
+        os.makedirs(self._keys_directory, exist_ok=True)
+        blobs = self._list_blobs()
+        # Other processes' blobs are only counted by the scans of _evict
+        self._images = len(blobs)
+        self._bytes = sum(size for _, size, _ in blobs)
+
+    def _key_path(self, s3_key: str) -> str:
+        return os.path.join(self._keys_directory, sha1(s3_key.encode()).hexdigest())
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self._blobs_directory, content_hash)
+
+    def get_content_hash(self, s3_key: str) -> Optional[str]:
+        """Get the sha256 of the image cached for a key, without counting a lookup.
+
+        Returns:
+            The hex digest, or None if the key is not cached
+        """
+        try:
+            with open(self._key_path(s3_key)) as key_file:
+                return key_file.read().strip() or None
+        except OSError:
+            return None
+
+    def get_cached_at(self, s3_key: str) -> Optional[float]:
+        """Get the time the image of a key was cached (downloaded from R2).
+
+        Returns:
+            The time as a unix timestamp, or None if the key is not cached
+        """
+        try:
+            return os.path.getmtime(self._key_path(s3_key))
+        except OSError:
+            return None
+
+    def get_path(self, s3_key: str) -> Optional[str]:
+        """Get the local path of a cached image and mark it as recently used.
+
+        Args:
+            s3_key: The R2 key of the image
+
+        Returns:
+            The path of the cached image, or None on a miss
+        """
+        content_hash = self.get_content_hash(s3_key)
+        if content_hash is not None:
+            blob_path = self._blob_path(content_hash)
+            try:
+                os.utime(blob_path)
+                with self._lock:
+                    self.hits += 1
+                return blob_path
+            except FileNotFoundError:
+                # The blob was evicted, drop the dangling key
+                self.invalidate(s3_key)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, s3_key: str, data: bytes) -> str:
+        """Cache an image, evicting the least recently used images if the cache is full.
+
+        Args:
+            s3_key: The R2 key of the image
+            data: The image bytes
+
+        Returns:
+            The path of the cached image
+        """
+        content_hash = sha256(data).hexdigest()
+        blob_path = self._blob_path(content_hash)
+        if os.path.exists(blob_path):
+            os.utime(blob_path)
+            _write_atomically(self._key_path(s3_key), content_hash.encode())
+            return blob_path
+        _write_atomically(blob_path, data)
+        _write_atomically(self._key_path(s3_key), content_hash.encode())
+        self._add_blob(len(data), keep=blob_path)
+        return blob_path
+
+    def open_writer(self, s3_key: str) -> ImageCacheWriter:
+        """Open a writer caching an image chunk by chunk, without holding it in memory.
+
+        Args:
+            s3_key: The R2 key of the image
+
+        Returns:
+            ImageCacheWriter: The writer, the image is cached once it is committed
+        """
+        return ImageCacheWriter(self, s3_key)
+
+    def invalidate(self, s3_key: str) -> None:
+        """Drop a key from the cache (its blob is evicted once no longer used)."""
+        try:
+            os.remove(self._key_path(s3_key))
+        except FileNotFoundError:
+            pass
+
+    def _list_blobs(self):
+        blobs = []
+        for file_name in os.listdir(self._blobs_directory):
+            if file_name.endswith(".tmp"):
+                continue
+            path = os.path.join(self._blobs_directory, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def _add_blob(self, size: int, keep: str) -> None:
+        with self._lock:
+            self._images += 1
+            self._bytes += size
+            if self._bytes <= self.max_bytes:
+                return
+        self._evict(keep=keep)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        blobs = self._list_blobs()
+        images = len(blobs)
+        total_bytes = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            images -= 1
+            total_bytes -= size
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._images = images
+            self._bytes = total_bytes
+
+    def clear(self) -> None:
+        """Remove all cached images."""
+        for directory in (self._keys_directory, self._blobs_directory):
+            for file_name in os.listdir(directory):
+                try:
+                    os.remove(os.path.join(directory, file_name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._images = 0
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters.
+
+        Returns:
+            Dict with the hits, misses, hit_rate, evictions, number of cached images and their total bytes
+            (as counted by this process)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'images': self._images,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+def get_image_cache() -> ImageCache:
+    """Get the process-wide image cache configured by the IMAGE_CACHE_* environment variables."""
+    global _image_cache
+    with _cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache(
+                os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "locke_manager_image_cache")),
+                max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", _DEFAULT_MAX_BYTES)),
+            )
+        return _image_cache
@@ -0,0 +1,99 @@
+"""Normalized, size capped derivatives of the resources images.
+
+Resources images come from google searches, so they mix PNG and JPEG files of arbitrary
+sizes. Every resource image gets derivatives at a few fixed sizes (the longest side is
+capped, the aspect ratio is kept and images are never upscaled), encoded as WebP or PNG.
+
+Derivatives are stored in R2 under deterministic keys derived from the original's key:
+    pokemendel/resources/pokemons/pikachu.png -> pokemendel/derivatives/pokemons/pikachu/128.webp
+"""
+
+import io
+import os
+from typing import Dict, Optional
+
+from PIL import Image, features
+from pokemendel_core.utils.enum_list import EnumList
+
+from core.r2 import DERIVATIVES_PREFIX, RESOURCES_PREFIX
+
+
+class DerivativeFormats(EnumList):
+    WEBP = "webp"
+    PNG = "png"
+
+
+# Longest side, in pixels, of the derivatives of every image
+DERIVATIVE_SIZES = [64, 128, 256]
+# PNG is only the default when Pillow is built without WebP support
+DEFAULT_DERIVATIVE_FORMAT = DerivativeFormats.WEBP if features.check('webp') else DerivativeFormats.PNG
+
+DERIVATIVE_CONTENT_TYPES = {
+    DerivativeFormats.WEBP: 'image/webp',
+    DerivativeFormats.PNG: 'image/png',
+}
+
+
+def get_derivative_key(s3_key: str, size: int, image_format: str) -> Optional[str]:
+    """Get the key of a derivative of a resource image.
+
+    Args:
+        s3_key: The S3 key of the original image
+        size: The derivative's size (one of DERIVATIVE_SIZES)
+        image_format: The derivative's format (one of DerivativeFormats)
+
+    Returns:
+        The S3 key of the derivative, or None if the key is not a resources image
+    """
+    if not s3_key.startswith(RESOURCES_PREFIX):
+        return None
+    resource_name = os.path.splitext(s3_key[len(RESOURCES_PREFIX):])[0]
+    return f"{DERIVATIVES_PREFIX}{resource_name}/{size}.{image_format}"
+
+
+def encode_image(image: Image.Image, image_format: str) -> bytes:
+    """Encode an image the way every derivative is encoded.
+
+    Args:
+        image: The image
+        image_format: The format to encode to (one of DerivativeFormats)
+
+    Returns:
+        The encoded image
+    """
+    output = io.BytesIO()
+    if image_format == DerivativeFormats.WEBP:
+        image.save(output, format='WEBP', quality=85, method=6)
+    else:
+        image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def build_derivatives(image_data: bytes, image_format: str = DEFAULT_DERIVATIVE_FORMAT) -> Dict[int, bytes]:
+    """Build the derivatives of an image at every size of DERIVATIVE_SIZES.
+
+    Args:
+        image_data: The original image bytes (any format Pillow can read)
+        image_format: The format of the derivatives (one of DerivativeFormats)
+
+    Returns:
+        Dict mapping size to the encoded derivative
+
+    Raises:
+        ValueError: If the format is not one of DerivativeFormats
+        PIL.UnidentifiedImageError: If the image can't be read
+    """
+    if image_format not in DerivativeFormats.list_all():
+        raise ValueError(f"Invalid derivative format '{image_format}', expected one of {DerivativeFormats.list_all()}")
+    with Image.open(io.BytesIO(image_data)) as original:
+        original.load()
+        has_alpha = original.mode in ('RGBA', 'LA', 'PA') or (original.mode == 'P' and 'transparency' in original.info)
+        normalized = original.convert('RGBA' if has_alpha else 'RGB')
+
+    derivatives = {}
+    for size in sorted(DERIVATIVE_SIZES, reverse=True):
+        derivative = normalized.copy()
+        # thumbnail keeps the aspect ratio and never upscales
+        derivative.thumbnail((size, size), Image.LANCZOS)
+        derivatives[size] = encode_image(derivative, image_format)
+    return derivatives
@@ -13,6 +13,10 @@ A Locke challenge defines:
 Subclasses must implement:
 - _mandatory_steps: A list of steps that must be completed in order
 - Any additional rules or constraints specific to the Locke type
+
+Locke instances are immutable, so the shared instances of core.lockes.LOCKE_INSTANCES can be
+used by concurrent requests. A run's extra_info is bound to a copy of the locke
+(with_extra_info / core.lockes.get_locke), which lives as long as the request using it.
 """
 
 from abc import ABC, abstractmethod
@@ -21,17 +25,28 @@ from definitions.runs.steps_names import StepsNames
 from definitions.runs.steps_interface import StepInterface
 from pokemendel_core.utils.class_property import classproperty
 from pokemendel_core.models.pokemon import Pokemon
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import List, Dict, Optional, Any
 from core.run import Run
+from core.species_table import SpeciesTable
 
-@dataclass
+@dataclass(frozen=True)
 class Locke(ABC):
     """Abstract base class for implementing different types of Locke challenges.
     Cannot be instantiated directly. Subclasses must implement _mandatory_steps.
     """
     extra_info: Optional[Dict[str, Any]] = None
 
+    def with_extra_info(self, extra_info: Optional[Dict[str, Any]]) -> 'Locke':
+        """Get a copy of this locke bound to a run's extra_info.
+
+        Args:
+            extra_info: The run's locke extra info
+        Returns:
+            Locke: A new locke of the same type, this locke is left untouched
+        """
+        return replace(self, extra_info=extra_info)
+
     @classproperty
     @abstractmethod
     def name(cls) -> str:
@@ -82,9 +97,27 @@ class Locke(ABC):
         """
         pass
 
+    @property
+    def steps_variant(self) -> Optional[str]:
+        """Get what, in the extra_info, changes the steps of this Locke (None if nothing does).
+        Returns:
+            Optional[str]: Identifies the steps variant, part of the key of the compiled step graph
+        """
+        return None
+
     def is_pokemon_relevant(self, pokemon: Pokemon) -> bool:
         return True
 
+    def relevance_mask(self, species_table: SpeciesTable) -> int:
+        """Get the mask of the pokemons relevant for this Locke, see is_pokemon_relevant.
+        Lockes whose relevance is an attribute of the species override it with the attribute's column.
+        Args:
+            species_table: The species table of the run's generation
+        Returns:
+            int: Mask of the relevant pokemons of the table
+        """
+        return species_table.mask_where(self.is_pokemon_relevant)
+
     @abstractmethod
     def catch_pokemon(self, pokemon: Pokemon, run: Run):
         pass
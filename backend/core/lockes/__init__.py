@@ -7,4 +7,4 @@ from core.lockes.run_creation_factory import get_run_creator_class
 from core.lockes.lockes_factory import *
 
 
-__all__ = ['get_run_creator_class', 'LOCKE_INSTANCES', 'list_all_lockes']
+__all__ = ['get_run_creator_class', 'LOCKE_INSTANCES', 'list_all_lockes', 'get_locke']
@@ -10,16 +10,16 @@ information is collected before the run can begin.
 """
 
 from dataclasses import dataclass
-from typing import Optional, List, Any, Set
+from typing import Optional, List, Any
 from models.run_creation import RunCreation, update_run_creation
-from models.run_pokemons_options import RunPokemonsOptions, save_run_options
+from models.run_pokemons_options import RunPokemonsOptions, save_runs_options
 from pokemendel_core.utils.enum_list import EnumList
-from pokemendel_core.utils.evolutions import iterate_gen_evolution_lines
-from pokemendel_core.data import list_gen_pokemons, fetch_pokemon
 from core.lockes.base.base_locke import BaseLocke
 from core.run import Run
 from core.party import Party
 from core.box import Box
+from core.metrics import timed
+from core.species_table import get_species_table
 from games import get_games_from_gen, get_game, Game
 from datetime import datetime
 from uuid import uuid4
@@ -78,7 +78,7 @@ class RunCreator:
             run_creation: The RunCreation instance to manage
         """
         self.run_creation = run_creation
-        self._potential_pokemon_counter = None
+        self._pending_pokemon_options: List[RunPokemonsOptions] = []
 
     def get_progress(self, locke_min_gen: int) -> RunCreationProgress:
         """Get the current progress of run creation.
@@ -157,7 +157,7 @@ class RunCreator:
         assert self.run_creation.locke is not None, "Run creation must have a locke type set"
         run_id = uuid4().hex
         print("Creating run id %s for locke %s" % (run_id, locke.name))
-        self._populate_run_optional_pokemons(run_id=run_id, locke=locke)
+        self.populate_run_options(run_id=run_id, locke=locke)
         gen = get_game(self.run_creation.game).gen
         
         # Create a new run with empty party and box
@@ -170,28 +170,30 @@ class RunCreator:
             gen=gen,
         )
 
+    def populate_run_options(self, run_id: str, locke: BaseLocke):
+        """Populate the run's potential pokemons and store them with bulk inserts.
+
+        The options are collected in memory by _populate_run_optional_pokemons and flushed
+        once at the end. The duration is recorded per locke type under the
+        'run_creation_options' timing.
+
+        Args:
+            run_id: The run to populate the potential pokemons for
+            locke: The locke deciding which pokemons are relevant
+        """
+        with timed('run_creation_options', locke.name):
+            self._pending_pokemon_options = []
+            self._populate_run_optional_pokemons(run_id=run_id, locke=locke)
+            pokemon_options, self._pending_pokemon_options = self._pending_pokemon_options, []
+            save_runs_options(pokemon_options)
+        print("Stored %s potential pokemons for run %s" % (len(pokemon_options), run_id))
+
     def _populate_run_optional_pokemons(self, run_id: str, locke: BaseLocke):
         game = get_game(self.run_creation.game)
-        gen_pokemons = list_gen_pokemons(game.gen)
-        print("Creating run with potential %s pokemons" % len(gen_pokemons))
-        stored_pokemons = set()
-        self._potential_pokemon_counter = 0
-        for evolution_line in iterate_gen_evolution_lines(game.gen, reversed=True):
-            self._populate_evolution_line_if_relevant(
-                run_id, game.gen, evolution_line, locke, stored_pokemons
-            )
-
-    def _populate_evolution_line_if_relevant(self, run_id: str, gen: int, evolution_line: List[str], locke: BaseLocke, stored_pokemons: Set[str]):
-        relevant_pokemons = False
-        for pokemon_name in evolution_line:
-            pokemon = fetch_pokemon(pokemon_name, gen)
-            if relevant_pokemons or locke.is_pokemon_relevant(pokemon):
-                if pokemon_name in stored_pokemons:
-                    continue
-                stored_pokemons.add(pokemon_name)
-                self._save_pokemon_option(run_id, pokemon_name, evolution_line[-1], self._potential_pokemon_counter)
-                relevant_pokemons = True
-                self._potential_pokemon_counter += 1
+        species_table = get_species_table(game.gen)
+        print("Creating run with potential %s pokemons" % len(species_table.pokemons))
+        for option in species_table.run_options(locke.relevance_mask(species_table)):
+            self._save_pokemon_option(run_id, option.pokemon_name, option.base_pokemon, option.index)
 
     def _save_pokemon_option(self, run_id: str, pokemon_name: str, base_pokemon: str, index: int, caught: bool = False):
         run_options = RunPokemonsOptions(
@@ -201,7 +203,7 @@ class RunCreator:
             index=index,
             caught=caught,
         )
-        save_run_options(run_options)
+        self._pending_pokemon_options.append(run_options)
 
     def _get_creation_missing_extra_info(self) -> RunCreationProgress:
         """Get any additional information needed for run creation.
@@ -2,7 +2,6 @@ from definitions import Pokemon
 from definitions.runs.steps_interface import ExecutionReturnValue, StepInterface
 from definitions.runs.inputs_options import InputOptions
 from pokemendel_core.utils.definitions.genders import Genders
-from models.run_pokemons_options import list_runs_options_by_query
 from core.lockes.chess.utils import ChessRoles
 from core.run import Run
 from typing import Tuple, List, Optional, Dict, Set
@@ -32,7 +31,7 @@ class SetChessRoleStep(StepInterface):
         if pokemon.metadata.gender != Genders.FEMALE and ChessRoles.QUEEN in open_roles:
             open_roles.remove(ChessRoles.QUEEN)
         if ChessRoles.PAWN in open_roles:
-            base_pokemon = list_runs_options_by_query(run_id=run.id, query={'pokemon_name': pokemon.name})[0].base_pokemon
+            base_pokemon = run.get_options_index().get_base_pokemon(pokemon.name)
             if base_pokemon != pokemon.name:
                 open_roles.remove(ChessRoles.PAWN)
         return InputOptions.ONE_OF, list(open_roles)
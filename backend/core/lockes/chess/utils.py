@@ -13,6 +13,4 @@ class ChessRoles(EnumList):
 
 
 def get_party_roles(run: Run) -> Set[str]:
-    return {
-        pokemon.metadata.chesslocke_role for pokemon in run.party.pokemons
-    }
+    return set(run.get_facts().party_roles)
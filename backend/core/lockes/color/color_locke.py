@@ -1,5 +1,6 @@
 from core.lockes.base.base_locke import BaseLocke
 from definitions.pokemons.pokemon import Pokemon
+from core.species_table import SpeciesTable
 from typing import List
 from .utils import COLOR_TYPE_KEY
 
@@ -15,3 +16,6 @@ class ColorLocke(BaseLocke):
 
     def is_pokemon_relevant(self, pokemon: Pokemon) -> bool:
         return self.extra_info[COLOR_TYPE_KEY] in pokemon.colors
+
+    def relevance_mask(self, species_table: SpeciesTable) -> int:
+        return species_table.color_masks.get(self.extra_info[COLOR_TYPE_KEY], 0)
@@ -6,8 +6,9 @@ from definitions.runs.steps_names import StepsNames
 from definitions.runs.steps_interface import StepInterface
 from pokemendel_core.models.pokemon import Pokemon
 from pokemendel_core.utils.definitions.regions import Regions
-from typing import List, Dict
+from typing import List, Dict, Optional
 from core.run import Run
+from core.species_table import SpeciesTable
 
 
 class GenLocke(BaseLocke):
@@ -28,10 +29,19 @@ class GenLocke(BaseLocke):
         inner_locke = self._get_inner_locke()
         return inner_locke.steps_mapper
 
+    @property
+    def steps_variant(self) -> Optional[str]:
+        # Every inner locke has its own steps
+        return self.extra_info[SELECTED_LOCKE]
+
     def is_pokemon_relevant(self, pokemon: Pokemon) -> bool:
         inner_locke = self._get_inner_locke()
         return inner_locke.is_pokemon_relevant(pokemon)
 
+    def relevance_mask(self, species_table: SpeciesTable) -> int:
+        inner_locke = self._get_inner_locke()
+        return inner_locke.relevance_mask(species_table)
+
     def catch_pokemon(self, pokemon: Pokemon, run: Run):
         inner_locke = self._get_inner_locke()
         return inner_locke.catch_pokemon(pokemon, run)
@@ -43,7 +53,8 @@ class GenLocke(BaseLocke):
 
     def _get_inner_locke(self) -> BaseLocke:
         inner_locke_name = self.extra_info[SELECTED_LOCKE]
-        return LOCKE_INSTANCES[inner_locke_name]
+        # The inner locke's extra info is kept in the genlocke's extra info
+        return LOCKE_INSTANCES[inner_locke_name].with_extra_info(self.extra_info)
 
     def finish_locke(self, game_name: str) -> bool:
         gen = get_game_locke_gen(game_name)
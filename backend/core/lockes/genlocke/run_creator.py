@@ -1,5 +1,5 @@
 from core.lockes.base.run_creator import RunCreator, RunCreationProgress, List, BaseLocke, InfoKeys
-from core.lockes.lockes_factory import list_all_lockes, GenLocke, LOCKE_INSTANCES
+from core.lockes.lockes_factory import list_all_lockes, GenLocke, LOCKE_INSTANCES, get_locke
 from core.lockes.genlocke.utils import (
     SELECTED_LOCKE as _SELECTED_LOCKE,
     get_generation_potential_games,
@@ -45,16 +45,16 @@ class GenRunCreator(RunCreator):
 
     def finish_creation(self, locke: BaseLocke) -> Run:
         self._init_internal_run_creation()
-        locke = LOCKE_INSTANCES[self.run_creation.extra_info[_SELECTED_LOCKE]]
+        locke = get_locke(self.run_creation.extra_info[_SELECTED_LOCKE], self.run_creation.extra_info)
         return self._internal_run_creator.finish_creation(locke)
 
     def finish_creation_existing_run(self, run_id: str, new_game: str) -> Run:
         self.run_creation.game = new_game
         self._internal_run_creator = None
         self._init_internal_run_creation()
-        locke = LOCKE_INSTANCES[self.run_creation.extra_info[_SELECTED_LOCKE]]
+        locke = get_locke(self.run_creation.extra_info[_SELECTED_LOCKE], self.run_creation.extra_info)
         game = get_game(new_game)
-        self._internal_run_creator._populate_run_optional_pokemons(run_id=run_id, locke=locke)
+        self._internal_run_creator.populate_run_options(run_id=run_id, locke=locke)
         db_run = fetch_run(run_id)
         run = convert_db_run_to_core_run(db_run, run_id)
         return Run(
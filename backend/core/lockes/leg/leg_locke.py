@@ -1,8 +1,16 @@
 from core.lockes.base.base_locke import BaseLocke
 from definitions.pokemons.pokemon import Pokemon
+from core.species_table import SpeciesTable
 from typing import List
 from .utils import NumLegs, LEG_TYPE_KEY
 
+_NUM_LEGS = {
+    NumLegs.ZERO: 0,
+    NumLegs.ONE: 1,
+    NumLegs.TWO: 2,
+    NumLegs.FOUR: 4,
+}
+
 
 class LegLocke(BaseLocke):
     def rules(self) -> List[str]:
@@ -23,3 +31,12 @@ class LegLocke(BaseLocke):
         if self.extra_info[LEG_TYPE_KEY] == NumLegs.FOUR:
             return pokemon.num_legs == 4
         return pokemon.num_legs == 3 or pokemon.num_legs > 4
+
+    def relevance_mask(self, species_table: SpeciesTable) -> int:
+        if self.extra_info[LEG_TYPE_KEY] in _NUM_LEGS:
+            return species_table.legs_masks.get(_NUM_LEGS[self.extra_info[LEG_TYPE_KEY]], 0)
+        relevance_mask = 0
+        for num_legs, legs_mask in species_table.legs_masks.items():
+            if num_legs == 3 or num_legs > 4:
+                relevance_mask |= legs_mask
+        return relevance_mask
@@ -1,6 +1,6 @@
 from core.lockes.genlocke.gen_locke import GenLocke
 from core.lockes.lockes_factory_no_gen import *
-from typing import List
+from typing import Any, Dict, List, Optional
 
 # Dictionary mapping locke names to their instances
 LOCKE_INSTANCES = {locke_name: locke_inst for locke_name, locke_inst in LOCKE_INSTANCES.items()}
@@ -19,3 +19,19 @@ def list_all_lockes() -> List[str]:
         ['BaseLocke']
     """
     return list(LOCKE_INSTANCES.keys())
+
+
+def get_locke(locke_name: str, extra_info: Optional[Dict[str, Any]] = None) -> BaseLocke:
+    """Get a locke bound to a run's extra info.
+
+    The instances of LOCKE_INSTANCES are shared by all the requests, so a run's extra info
+    is bound to a copy of the instance instead of being set on it.
+
+    Args:
+        locke_name: The name of the locke
+        extra_info: The run's locke extra info
+
+    Returns:
+        BaseLocke: The locke, bound to the extra info
+    """
+    return LOCKE_INSTANCES[locke_name].with_extra_info(extra_info)
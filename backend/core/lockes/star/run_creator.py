@@ -1,15 +1,13 @@
 from pokemendel_core.data.gen1 import PokemonGen1
 from pokemendel_core.data import fetch_pokemon
 from pokemendel_core.data import list_gen_pokemons, Pokemon as CorePokemon
-from pokemendel_core.utils.evolutions import iterate_gen_evolution_lines
 from pokemendel_core.utils.definitions.types import get_generation_types
 from models.pokemon import generate_locke_pokemon
 from core.lockes.base.run_creator import RunCreator, RunCreationProgress
 from core.lockes.base.base_locke import BaseLocke
 from core.run import Run
+from core.lockes.star.star_index import get_star_index
 from games import get_game
-from typing import Dict, Set
-from collections import defaultdict
 
 _STARTER = "star_starter"
 _TEAM1 = "star_team1"
@@ -22,7 +20,7 @@ _TEAM5 = "star_team5"
 class StarRunCreator(RunCreator):
     def finish_creation(self, locke: BaseLocke) -> Run:
         created_run = super().finish_creation(locke)
-        pokemon_to_base = self._map_pokemons_to_base(created_run.gen)
+        pokemon_to_base = get_star_index(created_run.gen).pokemon_to_base
         pokemon_to_type = {
             self.run_creation.extra_info[cur_type]: cur_type for cur_type
             in get_generation_types(created_run.gen)
@@ -108,14 +106,15 @@ class StarRunCreator(RunCreator):
 
     def _get_creation_missing_extra_info(self) -> RunCreationProgress:
         game = get_game(self.run_creation.game)
-        pokemon_to_base = self._map_pokemons_to_base(game.gen)
+        star_index = get_star_index(game.gen)
+        pokemon_to_base = star_index.pokemon_to_base
         found_bases = {
             pokemon_to_base[self.run_creation.extra_info[cur_type]]
             for cur_type in get_generation_types(game.gen)
             if cur_type in self.run_creation.extra_info
         }
 
-        types_mapper = self._map_relevant_types(game.gen, found_bases)
+        types_mapper = star_index.relevant_types(self.run_creation.extra_info, found_bases)
         sorted_types = sorted(types_mapper.keys(), key=lambda x: len(types_mapper[x]))
 
         for pokemon_type in sorted_types:
@@ -143,30 +142,3 @@ class StarRunCreator(RunCreator):
                 )
             chosen_pokemons = [team_pokemon for team_pokemon in chosen_pokemons if team_pokemon != selected_team_member]
         return RunCreationProgress(run_creation=self.run_creation, has_all_info=True)
-
-    def _map_relevant_types(self, gen: int, found_bases: Set[str]) -> Dict[str, Set[str]]:
-        types_pokemons = defaultdict(set)
-
-        for evolution_line in iterate_gen_evolution_lines(gen, reversed=True):
-            if evolution_line[-1] in found_bases:
-                continue
-            for evolution_pokemon_name in evolution_line:
-                evolution_pokemon = fetch_pokemon(evolution_pokemon_name, gen)
-                if evolution_pokemon.evolves_to:
-                    continue
-                for evolution_type in evolution_pokemon.types:
-                    if evolution_type in self.run_creation.extra_info:
-                        continue
-                    types_pokemons[evolution_type].add(evolution_pokemon.name)
-        return types_pokemons
-
-    def _map_pokemons_to_base(self, gen: int) -> Dict[str, str]:
-        pokemon_to_base_map = {}
-        for evolution_line in iterate_gen_evolution_lines(gen, reversed=True):
-            for evolution_pokemon_name in evolution_line:
-                evolution_pokemon = fetch_pokemon(evolution_pokemon_name, gen)
-                if evolution_pokemon.evolves_to:
-                    continue
-                pokemon_to_base_map[evolution_pokemon_name] = evolution_line[-1]
-
-        return pokemon_to_base_map
@@ -0,0 +1,98 @@
+"""Per-generation index of the StarLocke choices.
+
+Creating a StarLocke run chooses a final evolution for every type of the generation, one
+evolution line per type. The index maps every final evolution to the base pokemon of its
+evolution line and every type to its final evolutions. It is built once per generation from the
+species table, and the choices left at every creation step are filtered from it.
+"""
+
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Collection, Dict, List, Mapping, Tuple
+
+from core.species_table import get_species_table
+
+
+@dataclass(frozen=True)
+class StarIndex:
+    """The final evolutions of a generation.
+
+    Attributes:
+        pokemon_to_base: The base pokemon of every final evolution
+        type_pokemons: The (order, final evolution) of every type, order is the position of the
+            pair in evolution lines order, then the pokemon's types order
+    """
+    pokemon_to_base: Mapping[str, str]
+    type_pokemons: Mapping[str, Tuple[Tuple[int, str], ...]]
+
+    def relevant_types(self, chosen_types: Collection[str], found_bases: Collection[str]) -> Dict[str, List[str]]:
+        """Get the final evolutions left for every type not chosen yet.
+
+        Args:
+            chosen_types: The types already chosen
+            found_bases: The base pokemons of the evolution lines already chosen
+
+        Returns:
+            Dict[str, List[str]]: The final evolutions left of every type that has some, ordered by
+                their first final evolution left
+        """
+        types_pokemons = []
+        for pokemon_type, type_pokemons in self.type_pokemons.items():
+            if pokemon_type in chosen_types:
+                continue
+            pokemons_left = [
+                (order, pokemon_name) for order, pokemon_name in type_pokemons
+                if self.pokemon_to_base[pokemon_name] not in found_bases
+            ]
+            if pokemons_left:
+                types_pokemons.append((pokemons_left[0][0], pokemon_type, [pokemon_name for _, pokemon_name in pokemons_left]))
+        return {pokemon_type: pokemon_names for _, pokemon_type, pokemon_names in sorted(types_pokemons)}
+
+
+def build_star_index(gen: int) -> StarIndex:
+    """Build the StarLocke index of a generation.
+
+    Args:
+        gen: The generation
+
+    Returns:
+        StarIndex: The generation's index
+    """
+    species_table = get_species_table(gen)
+    pokemon_to_base: Dict[str, str] = {}
+    type_pokemons: Dict[str, List[Tuple[int, str]]] = {}
+    order = 0
+    for pokemon_index, base_pokemon, _ in species_table.line_occurrences:
+        pokemon = species_table.pokemons[pokemon_index]
+        if pokemon.evolves_to:
+            continue
+        pokemon_to_base[pokemon.name] = base_pokemon
+        for pokemon_type in pokemon.types:
+            type_pokemons.setdefault(pokemon_type, []).append((order, pokemon.name))
+            order += 1
+    return StarIndex(
+        pokemon_to_base=MappingProxyType(pokemon_to_base),
+        type_pokemons=MappingProxyType({pokemon_type: tuple(pokemons) for pokemon_type, pokemons in type_pokemons.items()}),
+    )
+
+
+_star_indices: Dict[int, StarIndex] = {}
+_star_indices_lock = threading.Lock()
+
+
+def get_star_index(gen: int) -> StarIndex:
+    """Get the StarLocke index of a generation, building it on first use.
+
+    Args:
+        gen: The generation
+
+    Returns:
+        StarIndex: The generation's index, shared by all the StarLocke run creations
+    """
+    star_index = _star_indices.get(gen)
+    if star_index is None:
+        star_index = build_star_index(gen)
+        with _star_indices_lock:
+            star_index = _star_indices.setdefault(gen, star_index)
+    return star_index
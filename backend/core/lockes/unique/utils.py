@@ -4,16 +4,8 @@ from typing import List, Set
 
 
 def can_pokemon_be_in_party(pokemon: Pokemon, run: Run) -> bool:
-    for party_pokemon in run.party.pokemons:
-        party_types = set(party_pokemon.types)
-        pokemon_types = set(pokemon.types)
-        if party_types.intersection(pokemon_types):
-            return False
-    return True
+    return run.get_facts().party_types.isdisjoint(pokemon.types)
 
 
 def get_party_pokemons_with_intersected_types(types: Set[str], run: Run) -> List[Pokemon]:
-    return [
-        pokemon for pokemon in run.party.pokemons
-        if set(pokemon.types).intersection(types)
-    ]
+    return run.get_facts().get_party_pokemons_with_types(frozenset(types))
@@ -15,6 +15,10 @@ class PairedPokemons:
 
 def get_party_pairs(run: Run, check_emptiness: bool = True) -> Tuple[PairedPokemons, Optional[PairedPokemons], Optional[PairedPokemons]]:
     assert not check_emptiness or not run.party.is_empty(), "Can't extract pairs from empty party"
+    return run.get_facts().memoize('wed_party_pairs', _compute_party_pairs)
+
+
+def _compute_party_pairs(run: Run) -> Tuple[Optional[PairedPokemons], Optional[PairedPokemons], Optional[PairedPokemons]]:
     if run.party.is_empty():
         return None, None, None
     first_pokemon = run.party.pokemons[0]
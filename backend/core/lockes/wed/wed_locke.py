@@ -1,6 +1,7 @@
 from core.lockes.base.base_locke import BaseLocke
 from pokemendel_core.utils.class_property import classproperty
 from pokemendel_core.models.pokemon import Pokemon, Genders
+from core.species_table import SpeciesTable
 from typing import List, Dict
 from definitions.runs.steps_info import StepInfo
 from definitions.runs.steps_names import StepsNames
@@ -57,6 +58,9 @@ class WedLocke(BaseLocke):
     def is_pokemon_relevant(self, pokemon: Pokemon) -> bool:
         return pokemon.supported_genders != [Genders.GENDERLESS]
 
+    def relevance_mask(self, species_table: SpeciesTable) -> int:
+        return species_table.all_mask & ~species_table.genderless_mask
+
     @property
     def auto_add_to_party(self) -> bool:
         return False
@@ -4,16 +4,11 @@ from typing import List
 
 
 def get_pokemon_max_index(run: Run) -> int:
-    pokemon_indices = [pokemon.metadata.caught_index for pokemon in run.box.pokemons if pokemon.metadata.caught_index is not None]
-    return (
-        max(pokemon_indices)
-        if pokemon_indices
-        else -1
-    )
+    return run.get_facts().max_caught_index
 
 
 def get_sorted_party(run: Run) -> List[Pokemon]:
-    return sorted(run.party.pokemons, key=lambda x: x.metadata.caught_index or 0 )
+    return list(run.get_facts().sorted_party)
 
 
 def is_pokemon_in_wrap(run: Run, pokemon: Pokemon) -> bool:
@@ -0,0 +1,70 @@
+"""In-process metrics for the locke manager.
+
+This module keeps timings (e.g. run creation latency per locke type) for the
+lifetime of the process, so they can be exposed through the metrics API and
+tracked over time.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Generator
+
+# Number of most recent samples kept per timing for percentiles
+MAX_TIMING_SAMPLES = 500
+
+_lock = threading.Lock()
+_timings: Dict[str, Dict[str, Deque[float]]] = defaultdict(lambda: defaultdict(lambda: deque(maxlen=MAX_TIMING_SAMPLES)))
+_timing_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+
+def record_timing(name: str, key: str, seconds: float) -> None:
+    """Record a timing sample.
+
+    Args:
+        name: The timed operation (e.g. 'run_creation_options')
+        key: The sub key the timing is tracked by (e.g. the locke type)
+        seconds: The measured duration in seconds
+    """
+    with _lock:
+        _timings[name][key].append(seconds)
+        _timing_counts[name][key] += 1
+
+
+@contextmanager
+def timed(name: str, key: str) -> Generator[None, None, None]:
+    """Time the wrapped block and record it with record_timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, key, time.perf_counter() - start)
+
+
+def _percentile(sorted_samples, percentile: float) -> float:
+    index = min(len(sorted_samples) - 1, round(percentile * (len(sorted_samples) - 1)))
+    return sorted_samples[index]
+
+
+def get_timings() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Summarize the recorded timings.
+
+    Returns:
+        Dict mapping timing name -> key -> {count, mean_ms, p50_ms, p95_ms, max_ms},
+        where the statistics are computed over the most recent samples
+    """
+    with _lock:
+        summary = {}
+        for name, keys in _timings.items():
+            summary[name] = {}
+            for key, samples in keys.items():
+                sorted_samples = sorted(samples)
+                summary[name][key] = {
+                    'count': _timing_counts[name][key],
+                    'mean_ms': 1000 * sum(sorted_samples) / len(sorted_samples),
+                    'p50_ms': 1000 * _percentile(sorted_samples, 0.5),
+                    'p95_ms': 1000 * _percentile(sorted_samples, 0.95),
+                    'max_ms': 1000 * sorted_samples[-1],
+                }
+        return summary
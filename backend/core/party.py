@@ -54,8 +54,8 @@ class Party(Box):
         Returns:
             bool: True if the party has 6 Pokemon, False otherwise
         """
-        assert len(self.pokemons) <= self.MAX_PARTY_SIZE, "Party can't have more than 6 pokemons"
-        return len(self.pokemons) == self.MAX_PARTY_SIZE
+        assert self.get_pokemon_count() <= self.MAX_PARTY_SIZE, "Party can't have more than 6 pokemons"
+        return self.get_pokemon_count() == self.MAX_PARTY_SIZE
 
     def is_last_pokemon_in_party(self) -> bool:
         """Check if there is only one Pokemon in the party.
@@ -63,7 +63,7 @@ class Party(Box):
         Returns:
             bool: True if there is exactly one Pokemon, False otherwise
         """
-        return len(self.pokemons) == 1
+        return self.get_pokemon_count() == 1
 
     def is_pokemon_in_party(self, pokemon: Pokemon) -> bool:
         """Check if a Pokemon is in the party.
@@ -74,4 +74,4 @@ class Party(Box):
         Returns:
             bool: True if the Pokemon is in the party, False otherwise
         """
-        return any(party_pokemon.metadata.id == pokemon.metadata.id for party_pokemon in self.pokemons)
+        return self._is_pokemon_in_box(pokemon.metadata.id)
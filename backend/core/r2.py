@@ -4,8 +4,11 @@ This module provides functions for interacting with Cloudflare R2 storage,
 including uploading, downloading, and checking for file existence.
 """
 
-from typing import Optional
+from typing import Any, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime
 import os
+import threading
 import boto3
 from botocore.exceptions import ClientError
 from botocore.client import Config
@@ -17,58 +20,49 @@ load_dotenv()
 # Cloudflare R2 configuration
 R2_ACCOUNT_ID = "c06bad2747e4a6177cecd8e31e326a3f"
 R2_ENDPOINT_URL = f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
+_DEFAULT_MAX_POOL_CONNECTIONS = 20
 
+# Prefix of all the resources images (pokemons, gyms and types)
+RESOURCES_PREFIX = "pokemendel/resources/"
+# Prefix of the normalized derivatives of the resources images (see core/image_derivatives.py)
+DERIVATIVES_PREFIX = "pokemendel/derivatives/"
+# Size of the chunks streamed objects are read in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# The process-wide client and the settings it was built with.
+# boto3 clients are thread safe once created, but creating them is not.
+_client_lock = threading.Lock()
+_client = None
+_client_settings: Optional[Tuple[str, str, str, int]] = None
+
+
+def _clean_env_value(value: Optional[str]) -> Optional[str]:
+    # Strip ALL whitespace (leading, trailing, and any copied newlines or tabs)
+    # This is critical - even a single space will cause SignatureDoesNotMatch
+    if not value:
+        return value
+    return value.strip().replace('\n', '').replace('\r', '').replace('\t', '')
+
+
+def _get_client_settings() -> Tuple[str, str, str, int]:
+    """Read the client settings from the environment at runtime to ensure they're current.
 
-def get_r2_client():
-    """Get a boto3 client configured for Cloudflare R2.
-    
     Returns:
-        A configured boto3 S3 client for R2
-        
+        Tuple of (access key id, secret access key, endpoint url, max pool connections)
+
     Raises:
         ValueError: If R2_ACCESS_KEY_ID or R2_SECRET_ACCESS_KEY are not set
     """
-    # Re-read environment variables at runtime to ensure they're current
-    access_key_id = os.getenv("R2_ACCESS_KEY_ID")
-    secret_access_key = os.getenv("R2_SECRET_ACCESS_KEY")
-    bucket_name = os.getenv("R2_BUCKET_NAME", "pokemendel")
-    
-    # Strip ALL whitespace (leading, trailing, and any internal issues)
-    # This is critical - even a single space will cause SignatureDoesNotMatch
-    if access_key_id:
-        access_key_id = access_key_id.strip()
-        # Also remove any newlines or carriage returns that might have been copied
-        access_key_id = access_key_id.replace('\n', '').replace('\r', '').replace('\t', '')
-    if secret_access_key:
-        secret_access_key = secret_access_key.strip()
-        # Also remove any newlines or carriage returns that might have been copied
-        secret_access_key = secret_access_key.replace('\n', '').replace('\r', '').replace('\t', '')
-    if bucket_name:
-        bucket_name = bucket_name.strip()
-    
+    access_key_id = _clean_env_value(os.getenv("R2_ACCESS_KEY_ID"))
+    secret_access_key = _clean_env_value(os.getenv("R2_SECRET_ACCESS_KEY"))
     if not access_key_id or not secret_access_key:
         raise ValueError("R2_ACCESS_KEY_ID and R2_SECRET_ACCESS_KEY must be set in environment variables")
-    
-    # Debug: Check if credentials are set (without printing the actual values)
-    access_key_set = bool(access_key_id)
-    secret_key_set = bool(secret_access_key)
-    print(f"DEBUG: R2 credentials check - Access Key ID set: {access_key_set}, Secret Key set: {secret_key_set}")
-    print(f"DEBUG: R2 config - Bucket: '{bucket_name}', Endpoint: {R2_ENDPOINT_URL}")
-    print(f"DEBUG: Access Key ID starts with: {access_key_id[:8]}..., length: {len(access_key_id)}")
-    print(f"DEBUG: Secret Key length: {len(secret_access_key)}")
-    
-    # Check for whitespace issues
-    if access_key_id and (access_key_id != access_key_id.strip() or '\n' in access_key_id or '\r' in access_key_id):
-        print(f"WARNING: Access Key ID had whitespace issues - cleaned")
-    if secret_access_key and (secret_access_key != secret_access_key.strip() or '\n' in secret_access_key or '\r' in secret_access_key):
-        print(f"WARNING: Secret Key had whitespace issues - cleaned")
-    
-    # Verify credentials match expected format
-    expected_access_key_start = "b0690286"
-    if access_key_id and not access_key_id.startswith(expected_access_key_start):
-        print(f"WARNING: Access Key ID doesn't start with expected value! Got: {access_key_id[:8]}...")
-    
-    # Use the exact same configuration as the test script that worked
+    endpoint_url = _clean_env_value(os.getenv("R2_ENDPOINT_URL")) or R2_ENDPOINT_URL
+    max_pool_connections = int(os.getenv("R2_MAX_POOL_CONNECTIONS", _DEFAULT_MAX_POOL_CONNECTIONS))
+    return access_key_id, secret_access_key, endpoint_url, max_pool_connections
+
+
+def _create_r2_client(access_key_id: str, secret_access_key: str, endpoint_url: str, max_pool_connections: int):
     # Important: Don't use any additional parameters that might affect signature calculation
     config = Config(
         signature_version='s3v4',
@@ -76,21 +70,58 @@ def get_r2_client():
             'addressing_style': 'path'
         },
         # Disable any automatic retries or additional processing
-        retries={'max_attempts': 1}
+        retries={'max_attempts': 1},
+        # Concurrent requests share the pool, and idle connections are kept alive between requests
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
     )
-    
-    # Create client with explicit parameters - match test script exactly
-    client = boto3.client(
+    # A dedicated session, the default boto3 session is not thread safe
+    return boto3.session.Session().client(
         's3',
-        endpoint_url=R2_ENDPOINT_URL,
+        endpoint_url=endpoint_url,
         aws_access_key_id=access_key_id,
         aws_secret_access_key=secret_access_key,
         region_name='auto',
         config=config
     )
-    
-    print(f"DEBUG: Created S3 client successfully")
-    return client
+
+
+def get_r2_client():
+    """Get the process-wide boto3 client configured for Cloudflare R2.
+
+    The client (and its connection pool) is created on first use and shared by all
+    threads. It is only rebuilt when the credentials, endpoint or pool size in the
+    environment change.
+
+    Environment Variables:
+        R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY - R2 credentials
+        R2_ENDPOINT_URL - S3 compatible endpoint [default: the pokemendel R2 account]
+        R2_MAX_POOL_CONNECTIONS - connections kept in the pool [default: 20]
+
+    Returns:
+        A configured boto3 S3 client for R2
+
+    Raises:
+        ValueError: If R2_ACCESS_KEY_ID or R2_SECRET_ACCESS_KEY are not set
+    """
+    global _client, _client_settings
+    settings = _get_client_settings()
+    client = _client
+    if client is not None and _client_settings == settings:
+        return client
+    with _client_lock:
+        if _client is None or _client_settings != settings:
+            _client = _create_r2_client(*settings)
+            _client_settings = settings
+        return _client
+
+
+def reset_r2_client() -> None:
+    """Drop the process-wide client, the next get_r2_client call creates a new one."""
+    global _client, _client_settings
+    with _client_lock:
+        _client = None
+        _client_settings = None
 
 
 def get_bucket_name() -> str:
@@ -157,25 +188,17 @@ def upload_file(local_file_path: str, s3_key: str) -> str:
     elif local_file_path.lower().endswith('.jpg'):
         content_type = 'image/jpeg'
     
-    # Debug: Print what we're about to upload
-    print(f"DEBUG: Uploading to R2 - bucket='{bucket_name}', key='{s3_key}', endpoint='{R2_ENDPOINT_URL}'")
-    print(f"DEBUG: Local file exists: {os.path.exists(local_file_path)}, size: {os.path.getsize(local_file_path) if os.path.exists(local_file_path) else 'N/A'} bytes")
-    
-    # Create a fresh client for each upload to avoid any state issues
     s3_client = get_r2_client()
     
     try:
-        # Try using upload_file first (like the test script that worked)
-        # This method handles file reading and upload in one call
-        print(f"DEBUG: Attempting upload_file method (like test script)")
+        # upload_file handles file reading and upload in one call
         s3_client.upload_file(
             local_file_path,
             bucket_name,
             s3_key,
             ExtraArgs={'ContentType': content_type}
         )
-        print(f"DEBUG: upload_file completed successfully")
-        
+
         # Verify the upload by checking if the object exists
         try:
             verify_response = s3_client.head_object(Bucket=bucket_name, Key=s3_key)
@@ -196,7 +219,7 @@ def upload_file(local_file_path: str, s3_key: str) -> str:
         print(f"ERROR uploading to R2:")
         print(f"  Bucket: {bucket_name}")
         print(f"  Key: {s3_key}")
-        print(f"  Endpoint: {R2_ENDPOINT_URL}")
+        print(f"  Endpoint: {s3_client.meta.endpoint_url}")
         print(f"  Error Code: {error_code}")
         print(f"  Error Message: {error_message}")
         # Re-raise with more context
@@ -206,6 +229,55 @@ def upload_file(local_file_path: str, s3_key: str) -> str:
         raise
 
 
+def upload_data(data: bytes, s3_key: str, content_type: str) -> str:
+    """Upload in-memory file contents to R2.
+
+    Args:
+        data: The file contents
+        s3_key: The S3 key (path) where the file should be stored
+        content_type: The file's content type
+
+    Returns:
+        The S3 key path
+
+    Raises:
+        Exception: If the upload fails
+    """
+    bucket_name = get_bucket_name()
+    try:
+        get_r2_client().put_object(Bucket=bucket_name, Key=s3_key, Body=data, ContentType=content_type)
+        return s3_key
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        raise Exception(f"Failed to upload data to {bucket_name}/{s3_key}: {error_code} - {error_message}") from e
+
+
+def delete_files(s3_keys: List[str]) -> None:
+    """Delete files from R2 in a single request, missing files are ignored.
+
+    Args:
+        s3_keys: The S3 keys (paths) of the files to delete, at most 1000
+
+    Raises:
+        Exception: If the deletion fails
+    """
+    if not s3_keys:
+        return
+    bucket_name = get_bucket_name()
+    try:
+        response = get_r2_client().delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': s3_key} for s3_key in s3_keys], 'Quiet': True},
+        )
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        raise Exception(f"Failed to delete files from {bucket_name}: {error_code} - {error_message}") from e
+    errors = response.get('Errors')
+    if errors:
+        raise Exception(f"Failed to delete {len(errors)} files from {bucket_name}, e.g. {errors[0].get('Key')}: {errors[0].get('Message')}")
+
 def download_file(s3_key: str) -> Optional[bytes]:
     """Download a file from R2.
     
@@ -229,6 +301,88 @@ def download_file(s3_key: str) -> Optional[bytes]:
         raise
 
 
+@dataclass
+class ObjectStream:
+    """An R2 object whose body is read lazily, in chunks.
+
+    Attributes:
+        body: The botocore StreamingBody of the object
+        content_length: Number of bytes in the body (of the requested range, if any)
+        content_type: The object's content type, if set on upload
+        etag: The object's ETag in R2
+        last_modified: When the object was last modified in R2
+        content_range: The Content-Range of the body if a range was requested
+    """
+    body: Any
+    content_length: int
+    content_type: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    content_range: Optional[str] = None
+
+    def iter_chunks(self, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Iterate over the body, holding at most one chunk in memory."""
+        return self.body.iter_chunks(chunk_size)
+
+    def close(self) -> None:
+        """Release the connection of the body back to the pool."""
+        self.body.close()
+
+
+def open_object_stream(s3_key: str, byte_range: Optional[str] = None) -> Optional[ObjectStream]:
+    """Open a file in R2 for streaming, without reading its body.
+
+    The returned stream must be closed (or read to its end) to release its connection.
+
+    Args:
+        s3_key: The S3 key (path) of the file to open
+        byte_range: An HTTP Range header value (e.g. 'bytes=0-1023') to only open part of the file
+
+    Returns:
+        The opened ObjectStream, or None if not found
+
+    Raises:
+        ClientError: If there's an error opening the file (other than file not found),
+            e.g. InvalidRange when the range is not satisfiable
+    """
+    get_object_kwargs = {'Bucket': get_bucket_name(), 'Key': s3_key}
+    if byte_range:
+        get_object_kwargs['Range'] = byte_range
+    try:
+        response = get_r2_client().get_object(**get_object_kwargs)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchKey':
+            return None
+        raise
+    return ObjectStream(
+        body=response['Body'],
+        content_length=response['ContentLength'],
+        content_type=response.get('ContentType'),
+        etag=response.get('ETag'),
+        last_modified=response.get('LastModified'),
+        content_range=response.get('ContentRange'),
+    )
+
+
+def list_objects(prefix: str) -> List[str]:
+    """List the keys of all the files under a prefix in R2.
+
+    Uses list_objects_v2, which returns up to 1000 keys per request.
+
+    Args:
+        prefix: The S3 key prefix to list
+
+    Returns:
+        The S3 keys under the prefix
+    """
+    s3_client = get_r2_client()
+    paginator = s3_client.get_paginator('list_objects_v2')
+    s3_keys = []
+    for page in paginator.paginate(Bucket=get_bucket_name(), Prefix=prefix):
+        s3_keys.extend(item['Key'] for item in page.get('Contents', []))
+    return s3_keys
+
+
 def is_s3_path(path: str) -> bool:
     """Check if a path is an S3 key path.
     
@@ -238,7 +392,7 @@ def is_s3_path(path: str) -> bool:
     Returns:
         True if it's an S3 path, False otherwise
     """
-    return path.startswith("pokemendel/resources/")
+    return path.startswith(RESOURCES_PREFIX) or path.startswith(DERIVATIVES_PREFIX)
 
 
 def extract_base_name_and_extension(file_path: str) -> tuple[str, str]:
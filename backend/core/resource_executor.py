@@ -0,0 +1,122 @@
+"""Dedicated, bounded executor for the blocking resources I/O.
+
+Serving a resource image blocks on R2 (HEAD and GET) and, for missing images, on a google
+download. The async resources app (resources_app.py) runs that work on this executor, so the
+number of image requests in progress is bounded by RESOURCE_IO_WORKERS instead of by the
+API server's workers, and image requests beyond RESOURCE_IO_MAX_PENDING are rejected right
+away instead of queueing behind slow downloads.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from apis.exceptions import ResourcesBusyError
+
+# Number of threads doing resources I/O
+DEFAULT_RESOURCE_IO_WORKERS = 16
+# Number of calls running or waiting for a thread before new calls are rejected
+DEFAULT_RESOURCE_IO_MAX_PENDING = 256
+
+
+class ResourceExecutor:
+    """Thread pool with admission control, awaitable from an event loop.
+
+    Attributes:
+        workers: Number of threads
+        max_pending: Maximum number of calls running or waiting for a thread
+        completed: Number of calls that finished
+        rejected: Number of calls rejected because max_pending calls were pending
+    """
+
+    def __init__(self, workers: int = DEFAULT_RESOURCE_IO_WORKERS, max_pending: int = DEFAULT_RESOURCE_IO_MAX_PENDING):
+        assert workers > 0, "At least one worker is needed"
+        assert max_pending >= workers, "max_pending must allow every worker to be busy"
+        self.workers = workers
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resource-io")
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ResourcesBusyError(self.max_pending)
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """Run a blocking function on the executor and wait for its result.
+
+        Args:
+            function: The blocking function
+            *args: Arguments of the function
+
+        Returns:
+            Any: The result of the function
+
+        Raises:
+            ResourcesBusyError: If max_pending calls are already pending
+        """
+        self._admit()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self._release()
+
+    async def iterate(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """Pull the items of a blocking iterator on the executor, e.g. the chunks of an R2 download.
+
+        Pulling items is not subject to admission control, the call that opened the iterator was.
+        """
+        loop = asyncio.get_running_loop()
+        exhausted = object()
+        while True:
+            item = await loop.run_in_executor(self._executor, next, iterator, exhausted)
+            if item is exhausted:
+                return
+            yield item
+
+    def stats(self) -> Dict[str, int]:
+        """Get the executor counters.
+
+        Returns:
+            Dict with the workers, pending calls and call counters
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_resource_executor: Optional[ResourceExecutor] = None
+_resource_executor_lock = threading.Lock()
+
+
+def get_resource_executor() -> ResourceExecutor:
+    """Get the process-wide resources executor, sized by the RESOURCE_IO_* environment variables."""
+    global _resource_executor
+    if _resource_executor is None:
+        with _resource_executor_lock:
+            if _resource_executor is None:
+                _resource_executor = ResourceExecutor(
+                    workers=int(os.getenv("RESOURCE_IO_WORKERS", DEFAULT_RESOURCE_IO_WORKERS)),
+                    max_pending=int(os.getenv("RESOURCE_IO_MAX_PENDING", DEFAULT_RESOURCE_IO_MAX_PENDING)),
+                )
+    return _resource_executor
@@ -0,0 +1,213 @@
+"""Index of the resolved R2 keys of the resources images.
+
+Resources are requested by name (e.g. 'pokemons/pikachu' or 'gyms/red/brock') but stored in R2
+with one of several extensions, so finding an image costs up to one head_object per extension.
+The index remembers the key every name resolved to, as well as the names known to be missing
+(for a limited time, since missing images are downloaded and uploaded on demand).
+
+The index is bounded (least recently used names are evicted first) and persisted as a JSON
+file on local disk, so it survives restarts and is shared by the workers of the host.
+It can be rebuilt from a single listing of the resources prefix with ResourceIndex.refresh.
+
+Configuration (per process):
+    RESOURCE_INDEX_PATH - JSON file of the index [default: <tmp>/locke_manager_resource_index.json]
+    RESOURCE_INDEX_MAX_ENTRIES - names kept in the index [default: 5000]
+    RESOURCE_INDEX_NEGATIVE_TTL_SECONDS - how long a name is known to be missing [default: 3600]
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.r2 import RESOURCES_PREFIX, list_objects
+
+# Extensions resources are stored with, in the order they are probed
+RESOURCE_EXTENSIONS = ['.jpeg', '.jpg', '.png']
+
+_DEFAULT_MAX_ENTRIES = 5000
+_DEFAULT_NEGATIVE_TTL_SECONDS = 3600
+
+_index_lock = threading.Lock()
+_resource_index: Optional["ResourceIndex"] = None
+
+
+def get_resource_name(s3_key: str) -> Optional[str]:
+    """Get the resource name of a resources key, e.g. 'pokemons/pikachu' for 'pokemendel/resources/pokemons/pikachu.png'.
+
+    Returns:
+        The resource name, or None if the key is not a resources image
+    """
+    if not s3_key.startswith(RESOURCES_PREFIX):
+        return None
+    resource_name, ext = os.path.splitext(s3_key[len(RESOURCES_PREFIX):])
+    if ext not in RESOURCE_EXTENSIONS:
+        return None
+    return resource_name
+
+
+class ResourceIndex:
+    """Bounded, disk persisted mapping of resource name to its R2 key (None for missing resources).
+
+    Attributes:
+        path: JSON file the index is persisted to
+        max_entries: Maximum number of names kept
+        negative_ttl_seconds: How long a name stays known to be missing
+        hits: Number of lookups answered by the index
+        misses: Number of lookups the index could not answer
+    """
+
+    def __init__(self, path: str, max_entries: int = _DEFAULT_MAX_ENTRIES, negative_ttl_seconds: float = _DEFAULT_NEGATIVE_TTL_SECONDS):
+        assert max_entries > 0, "Index must hold at least one entry"
+        self.path = path
+        self.max_entries = max_entries
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # resource name -> (s3 key or None, time it was resolved)
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._loaded_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self) -> None:
+        # Another worker may have saved the index since we loaded it
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            with open(self.path) as index_file:
+                stored_entries = json.load(index_file)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load resource index from {self.path}: {e}")
+            return
+        self._entries = OrderedDict(
+            (resource_name, (s3_key, resolved_at)) for resource_name, s3_key, resolved_at in stored_entries
+        )
+        self._evict()
+        self._loaded_mtime = mtime
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(file_descriptor, 'w') as index_file:
+                json.dump([[resource_name, s3_key, resolved_at] for resource_name, (s3_key, resolved_at) in self._entries.items()], index_file)
+            os.replace(temp_path, self.path)
+            self._loaded_mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            # The index is only a cache, serving keeps working without persisting it
+            print(f"Failed to save resource index to {self.path}: {e}")
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, resource_name: str) -> Tuple[bool, Optional[str]]:
+        """Look up the key a resource resolved to.
+
+        Args:
+            resource_name: The resource name, e.g. 'pokemons/pikachu'
+
+        Returns:
+            Tuple[bool, Optional[str]]: (found, s3 key), the key is None for resources known to be missing
+        """
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(resource_name)
+            if entry is not None:
+                s3_key, resolved_at = entry
+                if s3_key is not None or resolved_at + self.negative_ttl_seconds >= time.time():
+                    self._entries.move_to_end(resource_name)
+                    self.hits += 1
+                    return True, s3_key
+                del self._entries[resource_name]
+            self.misses += 1
+            return False, None
+
+    def record(self, resource_name: str, s3_key: Optional[str]) -> None:
+        """Record the key a resource resolved to, or None if the resource is missing."""
+        with self._lock:
+            self._reload_if_changed()
+            self._entries[resource_name] = (s3_key, time.time())
+            self._entries.move_to_end(resource_name)
+            self._evict()
+            self._save()
+
+    def forget(self, resource_name: str) -> None:
+        """Remove a resource from the index, e.g. after its key turned out to be gone."""
+        with self._lock:
+            self._reload_if_changed()
+            if self._entries.pop(resource_name, None) is not None:
+                self._save()
+
+    def refresh(self, s3_keys: Optional[Iterable[str]] = None) -> int:
+        """Rebuild the index from the keys stored under the resources prefix.
+
+        Names with several extensions resolve to the first one in RESOURCE_EXTENSIONS,
+        like the probes they replace. Missing names are not recorded, they are resolved on demand.
+
+        Args:
+            s3_keys: The stored keys [default: a single listing of the resources prefix]
+
+        Returns:
+            int: Number of indexed resources
+        """
+        if s3_keys is None:
+            s3_keys = list_objects(RESOURCES_PREFIX)
+        resolved_keys: Dict[str, str] = {}
+        for s3_key in s3_keys:
+            resource_name = get_resource_name(s3_key)
+            if resource_name is None:
+                continue
+            current_key = resolved_keys.get(resource_name)
+            if current_key is None or RESOURCE_EXTENSIONS.index(os.path.splitext(s3_key)[1]) < RESOURCE_EXTENSIONS.index(os.path.splitext(current_key)[1]):
+                resolved_keys[resource_name] = s3_key
+        now = time.time()
+        with self._lock:
+            self._entries = OrderedDict((resource_name, (s3_key, now)) for resource_name, s3_key in sorted(resolved_keys.items()))
+            self._evict()
+            self._save()
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all resources from the index."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the index counters.
+
+        Returns:
+            Dict with the number of entries, missing entries, hits, misses and hit_rate
+        """
+        with self._lock:
+            self._reload_if_changed()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'missing_entries': sum(1 for s3_key, _ in self._entries.values() if s3_key is None),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
+
+
+def get_resource_index() -> ResourceIndex:
+    """Get the process-wide resource index configured by the RESOURCE_INDEX_* environment variables."""
+    global _resource_index
+    with _index_lock:
+        if _resource_index is None:
+            _resource_index = ResourceIndex(
+                os.getenv("RESOURCE_INDEX_PATH", os.path.join(tempfile.gettempdir(), "locke_manager_resource_index.json")),
+                max_entries=int(os.getenv("RESOURCE_INDEX_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES)),
+                negative_ttl_seconds=float(os.getenv("RESOURCE_INDEX_NEGATIVE_TTL_SECONDS", _DEFAULT_NEGATIVE_TTL_SECONDS)),
+            )
+        return _resource_index
@@ -0,0 +1,225 @@
+"""Offline prefetch of the resources images missing from R2.
+
+Requests for an image missing from R2 download it from a google search inside the request,
+which stalls the request for seconds. The prefetch pipeline does that work ahead of time:
+1. list every resource the app may request (pokemons of all generations, gym leaders of all games, types)
+2. find the missing ones with a single listing of the resources prefix
+3. fetch (download and upload) the missing resources through a bounded thread pool, with retries
+
+Every finished resource is appended to a manifest file, so an interrupted prefetch resumes
+where it stopped instead of starting over.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pokemendel_core.data import (
+    GEN1_NAME_TO_POKEMON,
+    GEN2_NAME_TO_POKEMON,
+    GEN3_NAME_TO_POKEMON,
+    GEN4_NAME_TO_POKEMON,
+)
+from pokemendel_core.utils.definitions.types import Types
+from pokemendel_core.utils.enum_list import EnumList
+from games import GAMES
+from core.resource_index import ResourceIndex, get_resource_name
+
+
+class ResourceKinds(EnumList):
+    POKEMON = "pokemon"
+    GYM = "gym"
+    TYPE = "type"
+
+
+class PrefetchStatuses(EnumList):
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ResourceTarget:
+    """A resource the app may request.
+
+    Attributes:
+        kind: The kind of resource (one of ResourceKinds)
+        resource_name: The resource name, e.g. 'gyms/red/brock'
+        args: The arguments of the kind's resources API lookup, e.g. ('Red', 'Brock')
+    """
+    kind: str
+    resource_name: str
+    args: Tuple[str, ...]
+
+
+@dataclass
+class PrefetchResult:
+    """Outcome of prefetching one resource."""
+    target: ResourceTarget
+    status: str
+    attempts: int
+    s3_key: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class PrefetchReport:
+    """Outcome of a prefetch run."""
+    skipped: List[ResourceTarget] = field(default_factory=list)
+    results: List[PrefetchResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[PrefetchResult]:
+        return [result for result in self.results if result.status == PrefetchStatuses.FAILED]
+
+
+def list_resource_targets(kinds: Optional[Iterable[str]] = None) -> List[ResourceTarget]:
+    """List every resource the app may request, without duplicates.
+
+    Args:
+        kinds: Kinds of resources to list [default: all ResourceKinds]
+
+    Returns:
+        List[ResourceTarget]: The targets, sorted by kind and resource name
+    """
+    kinds = set(kinds or ResourceKinds.list_all())
+    targets: Dict[str, ResourceTarget] = {}
+    if ResourceKinds.POKEMON in kinds:
+        for pokemon_dict in (GEN1_NAME_TO_POKEMON, GEN2_NAME_TO_POKEMON, GEN3_NAME_TO_POKEMON, GEN4_NAME_TO_POKEMON):
+            for pokemon_name in pokemon_dict:
+                resource_name = f"pokemons/{pokemon_name.lower()}"
+                targets.setdefault(resource_name, ResourceTarget(ResourceKinds.POKEMON, resource_name, (pokemon_name,)))
+    if ResourceKinds.GYM in kinds:
+        for game in GAMES:
+            for gym in game.gyms:
+                resource_name = f"gyms/{game.name.lower()}/{gym.leader.lower()}"
+                targets.setdefault(resource_name, ResourceTarget(ResourceKinds.GYM, resource_name, (game.name, gym.leader)))
+    if ResourceKinds.TYPE in kinds:
+        for type_name in Types.list_all():
+            resource_name = f"types/{type_name.lower()}"
+            targets.setdefault(resource_name, ResourceTarget(ResourceKinds.TYPE, resource_name, (type_name,)))
+    return sorted(targets.values(), key=lambda target: (target.kind, target.resource_name))
+
+
+def find_missing_targets(targets: List[ResourceTarget], s3_keys: Iterable[str], resource_index: Optional[ResourceIndex] = None) -> List[ResourceTarget]:
+    """Find the targets that are not stored in R2.
+
+    Args:
+        targets: The targets to check
+        s3_keys: Every key stored under the resources prefix (a single listing)
+        resource_index: Index of names resolved to keys of another name (e.g. pokemon forms), if any
+
+    Returns:
+        List[ResourceTarget]: The missing targets
+    """
+    stored_names = {get_resource_name(s3_key) for s3_key in s3_keys}
+    missing_targets = []
+    for target in targets:
+        if target.resource_name in stored_names:
+            continue
+        if resource_index is not None:
+            found, s3_key = resource_index.lookup(target.resource_name)
+            if found and s3_key is not None:
+                continue
+        missing_targets.append(target)
+    return missing_targets
+
+
+class PrefetchManifest:
+    """JSON lines file of the resources a prefetch finished, used to resume it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load_done(self) -> Set[str]:
+        """Get the names of the resources that were prefetched successfully."""
+        done_names = set()
+        if not os.path.exists(self.path):
+            return done_names
+        with open(self.path) as manifest_file:
+            for line in manifest_file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry['status'] == PrefetchStatuses.DONE:
+                    done_names.add(entry['resource_name'])
+                else:
+                    done_names.discard(entry['resource_name'])
+        return done_names
+
+    def record(self, result: PrefetchResult) -> None:
+        entry = {
+            'resource_name': result.target.resource_name,
+            'status': result.status,
+            'attempts': result.attempts,
+            's3_key': result.s3_key,
+            'error': result.error,
+        }
+        with self._lock:
+            with open(self.path, 'a') as manifest_file:
+                manifest_file.write(json.dumps(entry) + "\n")
+
+
+def _prefetch_target(target: ResourceTarget, fetch: Callable[[ResourceTarget], Optional[str]], retries: int, retry_delay_seconds: float) -> PrefetchResult:
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            s3_key = fetch(target)
+            if s3_key is not None:
+                return PrefetchResult(target, PrefetchStatuses.DONE, attempt, s3_key=s3_key)
+            error = "not found"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if attempt <= retries:
+            time.sleep(retry_delay_seconds * 2 ** (attempt - 1))
+    return PrefetchResult(target, PrefetchStatuses.FAILED, retries + 1, error=error)
+
+
+def prefetch_resources(
+    targets: List[ResourceTarget],
+    fetch: Callable[[ResourceTarget], Optional[str]],
+    manifest: Optional[PrefetchManifest] = None,
+    workers: int = 4,
+    retries: int = 2,
+    retry_delay_seconds: float = 1.0,
+    on_result: Optional[Callable[[PrefetchResult], None]] = None,
+) -> PrefetchReport:
+    """Fetch the given resources through a bounded thread pool.
+
+    Args:
+        targets: The resources to fetch
+        fetch: Downloads and uploads one resource, returning its S3 key (None if it can't be found)
+        manifest: Manifest of a previous prefetch, its done resources are skipped and new results are appended
+        workers: Number of resources fetched concurrently
+        retries: Number of retries of a failed resource, with exponential backoff
+        retry_delay_seconds: Delay before the first retry
+        on_result: Called with every result, e.g. to report progress
+
+    Returns:
+        PrefetchReport: The skipped resources and the result of every fetched resource
+    """
+    assert workers > 0, "At least one worker is needed"
+    report = PrefetchReport()
+    done_names = manifest.load_done() if manifest else set()
+    pending_targets = []
+    for target in targets:
+        if target.resource_name in done_names:
+            report.skipped.append(target)
+        else:
+            pending_targets.append(target)
+
+    def run_target(target: ResourceTarget) -> PrefetchResult:
+        result = _prefetch_target(target, fetch, retries, retry_delay_seconds)
+        if manifest:
+            manifest.record(result)
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        report.results = list(executor.map(run_target, pending_targets))
+    return report
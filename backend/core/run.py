@@ -4,17 +4,22 @@ This module provides the Run class which represents a complete Pokemon game run,
 including the player's party, box, battles, encounters, and run status.
 """
 
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Dict, Generator
+from typing import Iterator, List, Optional, Dict, Generator
 
-from models.pokemon import list_pokemon_by_run
+from models.pokemon import list_pokemon_by_run, pokemons_to_documents, documents_to_pokemons
 from models.run import Run as DbRun
+from models.storage import is_embedded_storage
+from models.run_pokemons_options import list_runs_options
 from apis.exceptions import RunNotFoundError, InvalidGameError
 from definitions import Battle, Encounter, Pokemon, EncounterStatus, PokemonStatus
 from games import get_game
 from core.party import Party
 from core.box import Box
+from core.run_options_index import RunOptionsIndex
+from core.run_facts import RunFacts
 
 
 @dataclass
@@ -38,6 +43,10 @@ class Run:
         starter: The player's starter Pokemon, if chosen
         restarts: Number of times the run has been restarted
         finished: Whether the run has been completed
+        persisted_document: The run document as it was last read from / written to the database,
+            used to persist only the fields that changed since
+        options_index: In-memory index of the run's potential pokemons, see get_options_index
+        facts: Run-wide facts shared by the steps while the run's steps are evaluated, see facts_snapshot
     """
     id: str
     run_name: str
@@ -50,6 +59,9 @@ class Run:
     starter: Optional[Pokemon] = None
     restarts: int = 0
     finished: bool = False
+    persisted_document: Optional[Dict] = field(default=None, repr=False, compare=False)
+    options_index: Optional[RunOptionsIndex] = field(default=None, repr=False, compare=False)
+    facts: Optional[RunFacts] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         """Validate run initialization."""
@@ -79,6 +91,52 @@ class Run:
             assert pokemon.status == PokemonStatus.ALIVE, f"Pokemon {id} is not alive"
         return pokemon
 
+    def get_options_index(self) -> RunOptionsIndex:
+        """Get the index of the run's potential pokemons, fetching the run's options on first use.
+
+        Returns:
+            RunOptionsIndex: The run's options index
+        """
+        if self.options_index is None:
+            self.options_index = RunOptionsIndex.from_options(list_runs_options(self.id))
+        return self.options_index
+
+    def get_facts(self) -> RunFacts:
+        """Get the run-wide facts read by the steps.
+
+        Returns:
+            RunFacts: The snapshot's facts inside facts_snapshot, fresh facts otherwise
+        """
+        if self.facts is not None:
+            return self.facts
+        return RunFacts(self)
+
+    @contextmanager
+    def facts_snapshot(self) -> Iterator[RunFacts]:
+        """Share one RunFacts between all the facts reads inside the block.
+
+        The run must not change inside the block, e.g. only steps relevance is evaluated in it.
+        """
+        if self.facts is not None:
+            yield self.facts
+            return
+        self.facts = RunFacts(self)
+        try:
+            yield self.facts
+        finally:
+            self.facts = None
+
+    def set_pokemon_status(self, pokemon: Pokemon, status: str) -> None:
+        """Change the status of a Pokemon, keeping the box and party status views in sync.
+        
+        Args:
+            pokemon: The Pokemon to update
+            status: The new status
+        """
+        self.box.set_pokemon_status(pokemon, status)
+        if self.party.is_pokemon_in_party(pokemon):
+            self.party.set_pokemon_status(pokemon, status)
+
     def add_encounter(self, encounter: Encounter) -> None:
         """Add an encounter to the run.
         
@@ -147,7 +205,8 @@ class Run:
             restarts=self.restarts,
             duplicate_clause=duplicate_clause,
             finished=self.finished,
-            starter=self.starter.metadata.id if self.starter else None
+            starter=self.starter.metadata.id if self.starter else None,
+            pokemons=pokemons_to_documents(self.id, self.box.pokemons) if is_embedded_storage() else None,
         )
         return db_run
 
@@ -203,6 +262,17 @@ def _get_run_encounters(db_run, all_pokemons, game):
     return encounters
 
 
+def _list_run_pokemons(db_run: DbRun, run_id: str) -> List[Pokemon]:
+    """Load the run's pokemons from the run document when embedded, otherwise from the pokemons collection.
+
+    Runs that were written before switching to embedded mode have no embedded pokemons yet,
+    so they fall back to the pokemons collection until their next save embeds them.
+    """
+    if is_embedded_storage() and db_run.pokemons is not None:
+        return documents_to_pokemons(db_run.pokemons)
+    return list_pokemon_by_run(run_id)
+
+
 def convert_db_run_to_core_run(db_run: DbRun, run_id: str) -> Run:
     if not db_run:
         raise RunNotFoundError(run_id)
@@ -211,7 +281,7 @@ def convert_db_run_to_core_run(db_run: DbRun, run_id: str) -> Run:
     except Exception:
         raise InvalidGameError(db_run.game)
 
-    all_pokemons = {p.metadata.id: p for p in list_pokemon_by_run(run_id)}
+    all_pokemons = {p.metadata.id: p for p in _list_run_pokemons(db_run, run_id)}
     # Build party and box
     party_pokemons = [all_pokemons[pid] for pid in db_run.party if pid in all_pokemons]
     box_pokemons = [all_pokemons[pid] for pid in db_run.box if pid in all_pokemons]
@@ -235,5 +305,6 @@ def convert_db_run_to_core_run(db_run: DbRun, run_id: str) -> Run:
         restarts=db_run.restarts,
         finished=db_run.finished,
         gen=db_run.gen,
+        persisted_document=db_run.to_dict(),
     )
     return core_run
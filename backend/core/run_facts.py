@@ -0,0 +1,85 @@
+"""Run-wide facts read by the steps.
+
+Deciding whether a step is relevant for a pokemon often needs facts about the whole run: the
+types and chesslocke roles of the party, the party sorted by caught index, the wedlocke pairs...
+Computed inside every step for every pokemon, they cost O(box x party x steps) per evaluation.
+
+A RunFacts computes every fact on first read and keeps it. While a run's steps are evaluated
+(Run.facts_snapshot), all the steps of all the pokemons read the same RunFacts, so every fact is
+computed once per evaluation. Outside of a snapshot every read gets fresh facts, since steps
+executions change the run.
+"""
+
+from functools import cached_property
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Tuple, TYPE_CHECKING
+
+from definitions import Pokemon
+
+if TYPE_CHECKING:
+    from core.run import Run
+
+
+class RunFacts:
+    """Facts of a run, each computed on first read.
+
+    Lockes' own facts are kept with memoize, so they are shared the same way.
+    """
+
+    def __init__(self, run: 'Run'):
+        self._run = run
+        self._memoized: Dict[str, Any] = {}
+
+    @cached_property
+    def max_caught_index(self) -> int:
+        """The highest caught index in the box, -1 if no pokemon has one."""
+        return max(
+            (pokemon.metadata.caught_index for pokemon in self._run.box.pokemons if pokemon.metadata.caught_index is not None),
+            default=-1,
+        )
+
+    @cached_property
+    def sorted_party(self) -> Tuple[Pokemon, ...]:
+        """The party, sorted by caught index."""
+        return tuple(sorted(self._run.party.pokemons, key=lambda pokemon: pokemon.metadata.caught_index or 0))
+
+    @cached_property
+    def party_roles(self) -> FrozenSet[str]:
+        """The chesslocke roles of the party."""
+        return frozenset(pokemon.metadata.chesslocke_role for pokemon in self._run.party.pokemons)
+
+    @cached_property
+    def party_types(self) -> FrozenSet[str]:
+        """Every type of a party pokemon."""
+        return frozenset(pokemon_type for pokemon in self._run.party.pokemons for pokemon_type in pokemon.types)
+
+    @cached_property
+    def party_pokemons_by_type(self) -> Mapping[str, Tuple[Pokemon, ...]]:
+        """The party pokemons of every type of a party pokemon."""
+        pokemons_by_type: Dict[str, List[Pokemon]] = {}
+        for pokemon in self._run.party.pokemons:
+            for pokemon_type in dict.fromkeys(pokemon.types):
+                pokemons_by_type.setdefault(pokemon_type, []).append(pokemon)
+        return {pokemon_type: tuple(pokemons) for pokemon_type, pokemons in pokemons_by_type.items()}
+
+    def get_party_pokemons_with_types(self, types: FrozenSet[str]) -> List[Pokemon]:
+        """Get the party pokemons having any of the given types, in party order."""
+        pokemon_ids = {
+            pokemon.metadata.id
+            for pokemon_type in types
+            for pokemon in self.party_pokemons_by_type.get(pokemon_type, ())
+        }
+        return [pokemon for pokemon in self._run.party.pokemons if pokemon.metadata.id in pokemon_ids]
+
+    def memoize(self, name: str, compute: Callable[['Run'], Any]) -> Any:
+        """Get a locke specific fact, computing it on first read.
+
+        Args:
+            name: Unique name of the fact
+            compute: Computes the fact from the run
+
+        Returns:
+            Any: The fact
+        """
+        if name not in self._memoized:
+            self._memoized[name] = compute(self._run)
+        return self._memoized[name]
@@ -1,13 +1,15 @@
 from pokemendel_core.data import fetch_pokemon
 from models.run_pokemons_options import list_runs_options, mark_caught_pokemon
 from models.run import update_run
-from models.pokemon import save_pokemon, update_pokemon, generate_locke_pokemon
+from models.pokemon import save_pokemon, update_pokemons, generate_locke_pokemon
+from models.storage import is_embedded_storage
 from dataclasses import dataclass, asdict
 from definitions.pokemons.pokemon import Pokemon, PokemonMetadata, PokemonStatus
-from core.locke import Locke, StepInfo, StepInterface
+from core.locke import Locke, StepInterface
+from core.step_graph import StepGraph, get_step_graph
 from core.run import Run, EncounterStatus, Battle
 from games import Game
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Tuple
 from uuid import uuid4
 
 @dataclass
@@ -76,73 +78,75 @@ class RunManager:
 
         self.update_run()
 
+    @property
+    def step_graph(self) -> StepGraph:
+        return get_step_graph(self.locke, self.game.gen)
+
     def get_pokemon_next_actions(self, pokemon_id: str) -> List[str]:
         pokemon = self.run.get_pokemon_by_id(pokemon_id, verify_alive=True)
-        next_steps = self._get_all_relevant_steps(pokemon)
+        next_steps = self.step_graph.relevant_steps(self.run, pokemon)
         print("In run %s, pokemon %s next steps are: %s" % (self.run.id, pokemon_id, next_steps))
         return next_steps
 
+    def get_all_pokemons_next_actions(self) -> Dict[str, List[str]]:
+        """Get the next actions of every alive pokemon in the box."""
+        pokemons_next_steps = self.step_graph.relevant_steps_of_pokemons(self.run, self.run.box.get_alive_pokemons())
+        print("In run %s, got next steps of %s pokemons" % (self.run.id, len(pokemons_next_steps)))
+        return pokemons_next_steps
+
     def get_action_options(self, pokemon_id: str, action: str) -> Tuple[str, List[str]]:
-        assert action in self.locke.steps_mapper, f"Step {action} is not relevant for pokemon {pokemon_id}"
-        step: StepInterface = self.locke.steps_mapper[action]
+        steps_mapper = self.step_graph.steps_mapper
+        assert action in steps_mapper, f"Step {action} is not relevant for pokemon {pokemon_id}"
+        step: StepInterface = steps_mapper[action]
         pokemon = self.run.get_pokemon_by_id(pokemon_id, verify_alive=True)
         assert step.is_step_relevant(self.run, pokemon), f"Step {action} is not relevant for pokemon {pokemon_id}"
         return step.step_options(self.run, pokemon, self.randomized)
 
     def execute_action(self, pokemon_id: str, action: str, value: str):
-        assert action in self.locke.steps_mapper, f"Step {action} is not relevant for pokemon {pokemon_id}"
-        step: StepInterface = self.locke.steps_mapper[action]
+        steps_mapper = self.step_graph.steps_mapper
+        assert action in steps_mapper, f"Step {action} is not relevant for pokemon {pokemon_id}"
+        step: StepInterface = steps_mapper[action]
         pokemon = self.run.get_pokemon_by_id(pokemon_id, verify_alive=True)
         assert step.is_step_relevant(self.run, pokemon), f"Step {action} is not relevant for pokemon {pokemon_id}"
         execution_result = step.execute_step(self.run, pokemon, value)
-        for pokemon_id in  execution_result.pokemons_to_update:
-            pokemon_to_update = self.run.get_pokemon_by_id(pokemon_id)
-            update_pokemon(pokemon_to_update, self.run.id)
-
+        self._update_pokemons(execution_result.pokemons_to_update)
         self.update_run()
 
-    def _get_all_relevant_steps(self, pokemon: Pokemon) -> List[str]:
-        step_map: Dict[str, StepInfo] = {step.step_name: step for step in self.locke.steps(self.game.gen)}
-        memo: Dict[str, Optional[bool]] = {}  # Memoize results
-
-        def prerequisites_are_finished(step_info: StepInfo) -> bool:
-            for prereq_name in step_info.prerequisites:
-                prereq_step = step_map.get(prereq_name)
-                if not prereq_step:
-                    return True
-                if is_step_relevant(prereq_step):
-                    return False
-            return True
-
-        def is_step_relevant(step_info: StepInfo) -> bool:
-            if step_info.step_name in memo:
-                return memo[step_info.step_name] is True
-            if not prerequisites_are_finished(step_info):
-                memo[step_info.step_name] = False
-                return False
-            step = self.locke.steps_mapper[step_info.step_name]
-            result = step.is_step_relevant(self.run, pokemon)
-            memo[step_info.step_name] = result
-            return result
-
-        returned_steps = []
-
-        for step_info in self.locke.steps(self.game.gen):
-            if prerequisites_are_finished(step_info):
-                if is_step_relevant(step_info):
-                    returned_steps.append(step_info.step_name)
-
-        return returned_steps
+    def execute_actions(self, actions: List[Tuple[str, str, str]]):
+        """Execute an ordered list of (pokemon_id, action, value) in memory and persist them once.
+
+        Every action is validated against the pokemon's next actions after the previous actions were applied,
+        so an invalid action fails the whole batch before anything is written.
+        """
+        print("Executing %s actions in run %s" % (len(actions), self.run.id))
+        step_graph = self.step_graph
+        pokemons_to_update: Dict[str, None] = {}
+        for pokemon_id, action, value in actions:
+            pokemon = self.run.get_pokemon_by_id(pokemon_id, verify_alive=True)
+            assert action in step_graph.relevant_steps(self.run, pokemon), f"Step {action} is not relevant for pokemon {pokemon_id}"
+            step: StepInterface = step_graph.steps_mapper[action]
+            execution_result = step.execute_step(self.run, pokemon, value)
+            pokemons_to_update.update(dict.fromkeys(execution_result.pokemons_to_update))
+        self._update_pokemons(list(pokemons_to_update))
+        self.update_run()
 
     def _generate_locke_pokemon(self, pokemon_name: str) -> Pokemon:
         return generate_locke_pokemon(
             self.run.id, pokemon_name, self.game.gen
         )
 
+    def _update_pokemons(self, pokemon_ids: List[str]):
+        if is_embedded_storage():
+            # Embedded pokemons are written together with the run document in update_run
+            return
+        pokemons_to_update = [self.run.get_pokemon_by_id(pokemon_id) for pokemon_id in pokemon_ids]
+        update_pokemons(pokemons_to_update, self.run.id)
+
     def update_run(self):
         print("Saving run %s" % self.run.id)
         db_run = self.run.to_db_run(self.game.gen, self.locke.name, self.game.name, self.randomized, self.duplicate_clause, self.locke.extra_info)
-        update_run(db_run)
+        update_run(db_run, persisted_document=self.run.persisted_document)
+        self.run.persisted_document = db_run.to_dict()
 
     def win_battle(self, leader: str):
         print("Winning battle %s in run %s" % (leader, self.run.id))
@@ -157,7 +161,7 @@ class RunManager:
     def _catch_pokemon(self, pokemon_name: str) -> Pokemon:
         new_pokemon = self._generate_locke_pokemon(pokemon_name)
         self.locke.catch_pokemon(new_pokemon, self.run)
-        update_pokemon(new_pokemon, self.run.id)
+        self._update_pokemons([new_pokemon.metadata.id])
         mark_caught_pokemon(self.run.id, new_pokemon.name)
         return new_pokemon
 
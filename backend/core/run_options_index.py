@@ -0,0 +1,80 @@
+"""Run options index module.
+
+This module provides the RunOptionsIndex class, an in-memory view of a run's
+potential pokemons (runs_pokemons_options) that steps use instead of querying
+the database for every pokemon.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+from models.run_pokemons_options import RunPokemonsOptions
+
+
+@dataclass
+class RunOptionsIndex:
+    """The species a run allows, built from a single fetch of the run's options.
+
+    Attributes:
+        indices: The option index of every allowed pokemon, by pokemon name
+        base_pokemons: The base pokemon of every allowed pokemon, by pokemon name
+    """
+    indices: Dict[str, int]
+    base_pokemons: Dict[str, str]
+
+    @classmethod
+    def from_options(cls, run_options: Iterable[RunPokemonsOptions]) -> 'RunOptionsIndex':
+        """Build the index from the run's options.
+
+        Args:
+            run_options: The run's RunPokemonsOptions
+
+        Returns:
+            RunOptionsIndex: The run's options index
+        """
+        indices = {}
+        base_pokemons = {}
+        for run_option in run_options:
+            indices[run_option.pokemon_name] = run_option.index
+            base_pokemons[run_option.pokemon_name] = run_option.base_pokemon
+        return cls(indices=indices, base_pokemons=base_pokemons)
+
+    @property
+    def allowed_species(self) -> Set[str]:
+        """All the pokemon names the run allows."""
+        return set(self.indices)
+
+    def is_allowed(self, pokemon_name: str) -> bool:
+        """Check if a pokemon is one of the run's options.
+
+        Args:
+            pokemon_name: The pokemon name to check
+
+        Returns:
+            bool: True if the run allows the pokemon, False otherwise
+        """
+        return pokemon_name in self.indices
+
+    def filter_allowed(self, pokemon_names: Iterable[str]) -> List[str]:
+        """Keep the allowed pokemons, ordered by their option index like the options query.
+
+        Args:
+            pokemon_names: The pokemon names to filter
+
+        Returns:
+            List[str]: The allowed pokemon names, sorted by option index
+        """
+        return sorted(
+            {pokemon_name for pokemon_name in pokemon_names if pokemon_name in self.indices},
+            key=self.indices.__getitem__,
+        )
+
+    def get_base_pokemon(self, pokemon_name: str) -> Optional[str]:
+        """Get the base pokemon of an allowed pokemon.
+
+        Args:
+            pokemon_name: The pokemon name
+
+        Returns:
+            Optional[str]: The pokemon's base pokemon, None if the run doesn't allow it
+        """
+        return self.base_pokemons.get(pokemon_name)
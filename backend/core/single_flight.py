@@ -0,0 +1,90 @@
+"""Coalescing of concurrent calls doing the same work.
+
+A SingleFlight runs at most one call per key at a time: callers arriving while a call for
+their key is in progress wait for it and share its result (or its exception) instead of
+repeating the work, e.g. downloading and uploading the same missing image.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one call per key at a time, sharing its outcome with concurrent callers.
+
+    Attributes:
+        name: Name of the single flight, used in the stats
+        calls: Number of calls that ran
+        shared: Number of callers that got the outcome of another caller's call
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, function: Callable[[], Any]) -> Any:
+        """Run function, unless a call for the same key is in progress, then wait for its outcome.
+
+        Args:
+            key: Identifies the work, e.g. the S3 key being fetched
+            function: Does the work
+
+        Returns:
+            Any: The result of the call
+
+        Raises:
+            Exception: The exception raised by the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a new call, they may need the work done again
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the single flight counters.
+
+        Returns:
+            Dict with the calls, shared outcomes and calls in progress
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'in_progress': len(self._calls),
+            }
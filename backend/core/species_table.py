@@ -0,0 +1,170 @@
+"""Per-generation species table for the run options.
+
+Creating a run stores its potential pokemons (runs_pokemons_options): every evolution line of
+the generation is walked from its last evolution to its base pokemon, and once a pokemon of the
+line is relevant for the locke, it and the rest of the line (its pre-evolutions) are options.
+
+A SpeciesTable fetches the generation's pokemons once and keeps their attributes as bitmask
+columns - bit i of a mask is set if the i-th species of the table has the attribute. A locke
+describes the pokemons relevant for it as a mask (Locke.relevance_mask), e.g. the mask of a
+type, and the run options are built from the mask with integer operations only.
+"""
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Tuple
+
+from pokemendel_core.data import fetch_pokemon
+from pokemendel_core.models.pokemon import Pokemon
+from pokemendel_core.utils.definitions.genders import Genders
+from pokemendel_core.utils.evolutions import iterate_gen_evolution_lines
+
+
+@dataclass(frozen=True)
+class SpeciesOption:
+    """A potential pokemon of a run.
+
+    Attributes:
+        pokemon_name: The pokemon name
+        base_pokemon: The base pokemon of its evolution line
+        index: The option index, in evolution lines order
+    """
+    pokemon_name: str
+    base_pokemon: str
+    index: int
+
+
+@dataclass(frozen=True)
+class SpeciesTable:
+    """The pokemons of a generation, with their attributes as bitmask columns.
+
+    Attributes:
+        gen: The generation
+        pokemons: The pokemons, the i-th pokemon is bit i of the masks
+        all_mask: Mask of all the pokemons
+        type_masks: Mask of the pokemons of every type
+        color_masks: Mask of the pokemons of every color
+        category_masks: Mask of the pokemons of every category
+        legs_masks: Mask of the pokemons of every number of legs
+        genderless_mask: Mask of the pokemons that only support the genderless gender
+        line_occurrences: Every (pokemon index, base pokemon, line mask) in evolution lines order,
+            the line mask has the pokemon and the pokemons before it in its evolution line
+    """
+    gen: int
+    pokemons: Tuple[Pokemon, ...]
+    all_mask: int
+    type_masks: Mapping[str, int]
+    color_masks: Mapping[str, int]
+    category_masks: Mapping[str, int]
+    legs_masks: Mapping[int, int]
+    genderless_mask: int
+    line_occurrences: Tuple[Tuple[int, str, int], ...]
+
+    def mask_where(self, predicate: Callable[[Pokemon], bool]) -> int:
+        """Get the mask of the pokemons matching a predicate.
+
+        Args:
+            predicate: Checks a pokemon
+
+        Returns:
+            int: Mask of the matching pokemons
+        """
+        mask = 0
+        for pokemon_index, pokemon in enumerate(self.pokemons):
+            if predicate(pokemon):
+                mask |= 1 << pokemon_index
+        return mask
+
+    def run_options(self, relevance_mask: int) -> List[SpeciesOption]:
+        """Get the run options of a locke.
+
+        Args:
+            relevance_mask: Mask of the pokemons relevant for the locke
+
+        Returns:
+            List[SpeciesOption]: The options, in evolution lines order
+        """
+        options = []
+        stored_mask = 0
+        for pokemon_index, base_pokemon, line_mask in self.line_occurrences:
+            pokemon_bit = 1 << pokemon_index
+            if stored_mask & pokemon_bit or not relevance_mask & line_mask:
+                continue
+            stored_mask |= pokemon_bit
+            options.append(SpeciesOption(self.pokemons[pokemon_index].name, base_pokemon, len(options)))
+        return options
+
+
+def build_species_table(gen: int) -> SpeciesTable:
+    """Fetch the pokemons of a generation and build their table.
+
+    Args:
+        gen: The generation
+
+    Returns:
+        SpeciesTable: The generation's table
+    """
+    pokemons: List[Pokemon] = []
+    pokemon_indices: Dict[str, int] = {}
+    line_occurrences = []
+    for evolution_line in iterate_gen_evolution_lines(gen, reversed=True):
+        line_mask = 0
+        for pokemon_name in evolution_line:
+            if pokemon_name not in pokemon_indices:
+                pokemon_indices[pokemon_name] = len(pokemons)
+                pokemons.append(fetch_pokemon(pokemon_name, gen))
+            pokemon_index = pokemon_indices[pokemon_name]
+            line_mask |= 1 << pokemon_index
+            line_occurrences.append((pokemon_index, evolution_line[-1], line_mask))
+
+    type_masks = defaultdict(int)
+    color_masks = defaultdict(int)
+    category_masks = defaultdict(int)
+    legs_masks = defaultdict(int)
+    genderless_mask = 0
+    for pokemon_index, pokemon in enumerate(pokemons):
+        pokemon_bit = 1 << pokemon_index
+        for pokemon_type in pokemon.types:
+            type_masks[pokemon_type] |= pokemon_bit
+        for color in pokemon.colors:
+            color_masks[color] |= pokemon_bit
+        for category in pokemon.categories:
+            category_masks[category] |= pokemon_bit
+        legs_masks[pokemon.num_legs] |= pokemon_bit
+        if pokemon.supported_genders == [Genders.GENDERLESS]:
+            genderless_mask |= pokemon_bit
+
+    return SpeciesTable(
+        gen=gen,
+        pokemons=tuple(pokemons),
+        all_mask=(1 << len(pokemons)) - 1,
+        type_masks=MappingProxyType(dict(type_masks)),
+        color_masks=MappingProxyType(dict(color_masks)),
+        category_masks=MappingProxyType(dict(category_masks)),
+        legs_masks=MappingProxyType(dict(legs_masks)),
+        genderless_mask=genderless_mask,
+        line_occurrences=tuple(line_occurrences),
+    )
+
+
+_species_tables: Dict[int, SpeciesTable] = {}
+_species_tables_lock = threading.Lock()
+
+
+def get_species_table(gen: int) -> SpeciesTable:
+    """Get the species table of a generation, building it on first use.
+
+    Args:
+        gen: The generation
+
+    Returns:
+        SpeciesTable: The generation's table, shared by all the run creations
+    """
+    species_table = _species_tables.get(gen)
+    if species_table is None:
+        species_table = build_species_table(gen)
+        with _species_tables_lock:
+            species_table = _species_tables.setdefault(gen, species_table)
+    return species_table
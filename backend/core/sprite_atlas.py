@@ -0,0 +1,82 @@
+"""Packing of several sprites into a single download.
+
+Sprites are placed in a grid of square cells (as close to a square atlas as possible),
+in the given order. The frame of every sprite in the atlas is returned with the image,
+so a client can draw all the sprites from one download. Sprites can also be bundled
+as is in a zip file.
+"""
+
+import io
+import math
+import zipfile
+from typing import Dict, List, Tuple
+
+from PIL import Image
+from pokemendel_core.utils.enum_list import EnumList
+
+from core.image_derivatives import DerivativeFormats, encode_image
+
+
+class SpriteBundles(EnumList):
+    ATLAS = "atlas"
+    ZIP = "zip"
+
+
+# Maximum number of sprites in a single atlas or bundle
+MAX_BUNDLE_SPRITES = 256
+
+
+def build_sprite_atlas(sprites: List[Tuple[str, bytes]], cell_size: int, image_format: str) -> Tuple[bytes, Dict[str, Dict[str, int]]]:
+    """Pack sprites into a grid atlas.
+
+    Args:
+        sprites: (name, image bytes) of every sprite, sprites larger than a cell are scaled down
+        cell_size: Width and height of every cell of the grid
+        image_format: Format of the atlas (one of DerivativeFormats)
+
+    Returns:
+        Tuple of (encoded atlas, frames), where frames maps every sprite name to its
+        {x, y, width, height} in the atlas
+
+    Raises:
+        ValueError: If there are no sprites or the format is not one of DerivativeFormats
+    """
+    if not sprites:
+        raise ValueError("Atlas must hold at least one sprite")
+    if image_format not in DerivativeFormats.list_all():
+        raise ValueError(f"Invalid atlas format '{image_format}', expected one of {DerivativeFormats.list_all()}")
+
+    columns = math.ceil(math.sqrt(len(sprites)))
+    rows = math.ceil(len(sprites) / columns)
+    atlas = Image.new('RGBA', (columns * cell_size, rows * cell_size), (0, 0, 0, 0))
+    frames = {}
+    for position, (name, sprite_data) in enumerate(sprites):
+        with Image.open(io.BytesIO(sprite_data)) as sprite:
+            sprite = sprite.convert('RGBA')
+        sprite.thumbnail((cell_size, cell_size), Image.LANCZOS)
+        row, column = divmod(position, columns)
+        # Center the sprite in its cell
+        x = column * cell_size + (cell_size - sprite.width) // 2
+        y = row * cell_size + (cell_size - sprite.height) // 2
+        atlas.paste(sprite, (x, y), sprite)
+        frames[name] = {'x': x, 'y': y, 'width': sprite.width, 'height': sprite.height}
+
+    return encode_image(atlas, image_format), frames
+
+
+def build_sprite_zip(sprites: List[Tuple[str, bytes]], image_format: str) -> bytes:
+    """Bundle sprites in a zip file, as '<name>.<image_format>' entries.
+
+    Args:
+        sprites: (name, image bytes) of every sprite
+        image_format: Extension of the entries
+
+    Returns:
+        The zip file bytes
+    """
+    output = io.BytesIO()
+    # Images are already compressed, storing them saves the CPU of deflating them again
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as bundle:
+        for name, sprite_data in sprites:
+            bundle.writestr(f"{name}.{image_format}", sprite_data)
+    return output.getvalue()
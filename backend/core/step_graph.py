@@ -0,0 +1,141 @@
+"""Compiled, memoized step graphs of the lockes.
+
+A locke describes its steps with `steps(gen)` (StepInfo list with prerequisites) and
+`steps_mapper` (step implementations), and both build new objects on every call. A StepGraph
+compiles them once per (locke, gen, steps variant): the step order, the prerequisites of every
+step in a topological evaluation order, and one instance of every step implementation. Step
+implementations are stateless, so a compiled graph is shared by every run and request.
+
+The steps are evaluated inside a facts snapshot of the run (Run.facts_snapshot), so the run-wide
+facts the steps read (party types, sorted party...) are computed once for all the steps and all
+the pokemons evaluated together.
+"""
+
+import threading
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from definitions.pokemons.pokemon import Pokemon
+from definitions.runs.steps_interface import StepInterface
+from core.locke import Locke
+from core.run import Run
+
+
+@dataclass(frozen=True)
+class StepGraph:
+    """Steps of a locke in a given generation.
+
+    Attributes:
+        steps_order: The step names, in the order the locke lists its steps
+        evaluation_order: The step names, every step after its prerequisites
+        prerequisites: The prerequisites checked for every step
+        steps_mapper: The implementation of every step
+    """
+    steps_order: Tuple[str, ...]
+    evaluation_order: Tuple[str, ...]
+    prerequisites: Mapping[str, Tuple[str, ...]]
+    steps_mapper: Mapping[str, StepInterface]
+
+    def relevant_steps(self, run: Run, pokemon: Pokemon) -> List[str]:
+        """Get the steps a pokemon can do next.
+
+        A step is relevant if none of its prerequisites is relevant (they are all finished)
+        and its implementation considers it relevant for the pokemon.
+
+        Args:
+            run: The run of the pokemon
+            pokemon: The pokemon
+
+        Returns:
+            List[str]: The relevant step names, in the locke's steps order
+        """
+        with run.facts_snapshot():
+            return self._relevant_steps(run, pokemon)
+
+    def relevant_steps_of_pokemons(self, run: Run, pokemons: Iterable[Pokemon]) -> Dict[str, List[str]]:
+        """Get the steps every pokemon can do next, sharing the run's facts between all of them.
+
+        Args:
+            run: The run of the pokemons
+            pokemons: The pokemons
+
+        Returns:
+            Dict[str, List[str]]: The relevant step names of every pokemon id
+        """
+        with run.facts_snapshot():
+            return {pokemon.metadata.id: self._relevant_steps(run, pokemon) for pokemon in pokemons}
+
+    def _relevant_steps(self, run: Run, pokemon: Pokemon) -> List[str]:
+        relevant: Dict[str, bool] = {}
+        for step_name in self.evaluation_order:
+            if any(relevant[prerequisite] for prerequisite in self.prerequisites[step_name]):
+                relevant[step_name] = False
+            else:
+                relevant[step_name] = self.steps_mapper[step_name].is_step_relevant(run, pokemon)
+        return [step_name for step_name in self.steps_order if relevant[step_name]]
+
+
+def compile_step_graph(locke: Locke, gen: int) -> StepGraph:
+    """Compile the steps of a locke in a generation.
+
+    Args:
+        locke: The locke
+        gen: The generation of the run
+
+    Returns:
+        StepGraph: The compiled steps
+
+    Raises:
+        graphlib.CycleError: If the steps' prerequisites have a cycle
+    """
+    steps = locke.steps(gen)
+    step_names = {step_info.step_name for step_info in steps}
+    prerequisites: Dict[str, Tuple[str, ...]] = {}
+    for step_info in steps:
+        # A prerequisite that is not one of the locke's steps ends the prerequisites check,
+        # the prerequisites listed after it are not checked
+        checked_prerequisites = []
+        for prerequisite in step_info.prerequisites:
+            if prerequisite not in step_names:
+                break
+            checked_prerequisites.append(prerequisite)
+        prerequisites[step_info.step_name] = tuple(checked_prerequisites)
+
+    evaluation_order = tuple(TopologicalSorter(prerequisites).static_order())
+    return StepGraph(
+        steps_order=tuple(step_info.step_name for step_info in steps),
+        evaluation_order=evaluation_order,
+        prerequisites=MappingProxyType(prerequisites),
+        steps_mapper=MappingProxyType(dict(locke.steps_mapper)),
+    )
+
+
+_step_graphs: Dict[Tuple[Any, ...], StepGraph] = {}
+_step_graphs_lock = threading.Lock()
+
+
+def get_step_graph(locke: Locke, gen: int) -> StepGraph:
+    """Get the compiled steps of a locke in a generation, compiling them on first use.
+
+    Args:
+        locke: The locke
+        gen: The generation of the run
+
+    Returns:
+        StepGraph: The compiled steps, shared by all the runs of the same locke, gen and steps variant
+    """
+    key = (type(locke), gen, locke.steps_variant)
+    step_graph = _step_graphs.get(key)
+    if step_graph is None:
+        step_graph = compile_step_graph(locke, gen)
+        with _step_graphs_lock:
+            step_graph = _step_graphs.setdefault(key, step_graph)
+    return step_graph
+
+
+def clear_step_graphs() -> None:
+    """Drop the compiled step graphs, e.g. after the lockes' steps changed."""
+    with _step_graphs_lock:
+        _step_graphs.clear()
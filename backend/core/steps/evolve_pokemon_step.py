@@ -2,7 +2,6 @@ from typing import Tuple, List, Optional
 from definitions import Pokemon
 from definitions.runs.steps_interface import StepInterface, ExecutionReturnValue
 from definitions.runs.inputs_options import InputOptions
-from models.run_pokemons_options import list_runs_options_by_query
 from core.run import Run
 from pokemendel_core.data import fetch_pokemon
 
@@ -24,7 +23,4 @@ class EvolvePokemonStep(StepInterface):
         if not pokemon_evolutions:
             return []
 
-        run_options = list_runs_options_by_query(run.id, {'pokemon_name': {"$in": pokemon_evolutions}})
-        return [
-            option.pokemon_name for option in run_options
-        ]
+        return run.get_options_index().filter_allowed(pokemon_evolutions)
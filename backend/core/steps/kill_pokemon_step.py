@@ -2,7 +2,6 @@ from typing import Tuple, List, Optional
 from definitions import Pokemon, PokemonStatus
 from definitions.runs.steps_interface import StepInterface, ExecutionReturnValue
 from definitions.runs.inputs_options import InputOptions
-from models.run_pokemons_options import list_runs_options_by_query
 from core.run import Run
 from responses.exceptions import BlackoutException
 
@@ -15,7 +14,7 @@ class KillPokemonStep(StepInterface):
         return InputOptions.NOTHING, []
 
     def execute_step(self, run: Run, pokemon: Pokemon, value: Optional[str]) -> ExecutionReturnValue:
-        pokemon.status = PokemonStatus.DEAD
+        run.set_pokemon_status(pokemon, PokemonStatus.DEAD)
         if run.party.is_pokemon_in_party(pokemon):
             try:
                 run.party.remove_pokemon(pokemon)
@@ -29,7 +28,4 @@ class KillPokemonStep(StepInterface):
         if not pokemon_evolutions:
             return []
 
-        run_options = list_runs_options_by_query(run.id, {'pokemon_name': {"$in": pokemon_evolutions}})
-        return [
-            option.pokemon_name for option in run_options
-        ]
+        return run.get_options_index().filter_allowed(pokemon_evolutions)
@@ -0,0 +1,343 @@
+"""Run-scoped read-through caches for data that is read far more often than written.
+
+A RunScopedCache keeps one value per run id on top of a backend:
+- memory (default): a per-process LRU with TTL eviction
+- file: pickled entries in a directory shared by every worker on the host, so an
+  invalidation in one worker is seen by all of them
+
+Writers must call RunScopedCache.invalidate for every run they change. The memory backend
+only sees the invalidations of its own process: with more than one worker, a worker that
+didn't handle a write serves its stale entry until the entry's TTL expires. Only the file
+backend is safe for data that must be fresh with several workers, and reads that can't be
+stale (e.g. the caught flags of the duplicate clause) must query the database directly.
+
+Configuration (per process):
+    RUN_CACHE_BACKEND - memory | file [default: memory]
+    RUN_CACHE_DIR - directory of the file backend [default: <tmp>/locke_manager_cache]
+    RUN_CACHE_TTL_SECONDS - entries time to live [default: 300]
+    RUN_CACHE_MAX_ENTRIES - entries kept per cache [default: 64]
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Any, Callable, Dict, Tuple
+from pokemendel_core.utils.enum_list import EnumList
+
+
+class CacheBackends(EnumList):
+    MEMORY = "memory"
+    FILE = "file"
+
+
+_DEFAULT_TTL_SECONDS = 300
+_DEFAULT_MAX_ENTRIES = 64
+
+# Every RunScopedCache created in this process, by name
+_CACHES: Dict[str, "RunScopedCache"] = {}
+
+
+class CacheBackend(ABC):
+    """Key value storage of a RunScopedCache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Get a value.
+
+        Returns:
+            Tuple[bool, Any]: (found, value), found is False for missing or expired entries
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting entries if the backend is full."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value if it exists."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all values."""
+        pass
+
+    @abstractmethod
+    def generation(self, key: str) -> Any:
+        """Get the key's invalidation generation, it changes on every bump_generation."""
+        pass
+
+    @abstractmethod
+    def bump_generation(self, key: str) -> None:
+        """Change the key's invalidation generation, seen by every user of the backend."""
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache with a time to live for every entry."""
+
+    def __init__(self, max_entries: int = _DEFAULT_MAX_ENTRIES, ttl_seconds: float = _DEFAULT_TTL_SECONDS):
+        assert max_entries > 0, "Cache must hold at least one entry"
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # (bumped at, generation) of every key, least recently bumped first
+        self._generations: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def generation(self, key: str) -> Any:
+        with self._lock:
+            return self._generations.get(key, (None, 0))[1]
+
+    def bump_generation(self, key: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._generations[key] = (now, self._generations.get(key, (None, 0))[1] + 1)
+            self._generations.move_to_end(key)
+            # Generations of keys not invalidated for a TTL are dropped, no load lasts that long
+            while self._generations:
+                bumped_at, _ = next(iter(self._generations.values()))
+                if bumped_at + self.ttl_seconds >= now:
+                    break
+                self._generations.popitem(last=False)
+
+
+class FileCacheBackend(CacheBackend):
+    """Cache stored as pickle files in a directory, shared by all processes on the host.
+
+    Writes go through a temporary file and os.replace, so readers never see partial entries.
+    Entries expire by their modification time, and the least recently written entries are
+    evicted once the directory holds more than max_entries. The generation of a key is the
+    size of its marker file, every process invalidating the key appends a byte to it.
+    """
+
+    def __init__(self, directory: str, max_entries: int = _DEFAULT_MAX_ENTRIES, ttl_seconds: float = _DEFAULT_TTL_SECONDS):
+        assert max_entries > 0, "Cache must hold at least one entry"
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{sha1(key.encode()).hexdigest()}.pickle")
+
+    def _generation_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{sha1(key.encode()).hexdigest()}.generation")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds < time.time():
+                self.delete(key)
+                return False, None
+            with open(path, 'rb') as cache_file:
+                return True, pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def set(self, key: str, value: Any) -> None:
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, 'wb') as cache_file:
+                pickle.dump(value, cache_file)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".pickle"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        for _, path in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        # Markers of keys not invalidated for a TTL are dropped, no load lasts that long
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".generation"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                if os.path.getmtime(path) + self.ttl_seconds < time.time():
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".pickle"):
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def generation(self, key: str) -> Any:
+        try:
+            return os.path.getsize(self._generation_path(key))
+        except FileNotFoundError:
+            return 0
+
+    def bump_generation(self, key: str) -> None:
+        with open(self._generation_path(key), 'ab') as generation_file:
+            generation_file.write(b'.')
+
+
+def create_cache_backend(cache_name: str) -> CacheBackend:
+    """Create the backend configured by the RUN_CACHE_* environment variables.
+
+    Args:
+        cache_name: Name of the cache, the file backend stores it in its own sub directory
+
+    Returns:
+        CacheBackend: The configured backend
+
+    Raises:
+        ValueError: If RUN_CACHE_BACKEND holds an unknown backend
+    """
+    backend = os.getenv("RUN_CACHE_BACKEND", CacheBackends.MEMORY).strip().lower()
+    ttl_seconds = float(os.getenv("RUN_CACHE_TTL_SECONDS", _DEFAULT_TTL_SECONDS))
+    max_entries = int(os.getenv("RUN_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES))
+    if backend == CacheBackends.MEMORY:
+        return MemoryCacheBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == CacheBackends.FILE:
+        cache_dir = os.getenv("RUN_CACHE_DIR", os.path.join(tempfile.gettempdir(), "locke_manager_cache"))
+        return FileCacheBackend(os.path.join(cache_dir, cache_name), max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Invalid RUN_CACHE_BACKEND '{backend}', expected one of {CacheBackends.list_all()}")
+
+
+class RunScopedCache:
+    """Read-through cache holding one value per run id.
+
+    Every invalidation bumps the run's generation in the backend, and a value loaded while
+    its run was invalidated is not kept, so a read racing a write can't cache the pre-write
+    value. With the file backend this holds for writes of every process on the host.
+
+    Attributes:
+        name: Name of the cache, used in the stats
+        backend: Storage of the cached values
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that loaded the value
+        invalidations: Number of invalidated runs
+    """
+
+    def __init__(self, name: str, backend: CacheBackend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        _CACHES[name] = self
+
+    def get_or_load(self, run_id: str, loader: Callable[[], Any]) -> Any:
+        """Get the run's cached value, loading and caching it on a miss.
+
+        Args:
+            run_id: The run the value belongs to
+            loader: Loads the value from the database
+
+        Returns:
+            Any: The cached or loaded value
+        """
+        found, value = self.backend.get(run_id)
+        with self._lock:
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+        generation = self.backend.generation(run_id)
+
+        value = loader()
+        if self.backend.generation(run_id) == generation:
+            self.backend.set(run_id, value)
+            # An invalidation of another process between the check and the set
+            if self.backend.generation(run_id) != generation:
+                self.backend.delete(run_id)
+        return value
+
+    def invalidate(self, run_id: str) -> None:
+        """Drop the run's cached value. Must be called by every write to the cached data."""
+        with self._lock:
+            self.invalidations += 1
+        self.backend.bump_generation(run_id)
+        self.backend.delete(run_id)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters.
+
+        Returns:
+            Dict with the backend, hits, misses, hit_rate and invalidations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'invalidations': self.invalidations,
+            }
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the counters of every cache created in this process.
+
+    Returns:
+        Dict mapping cache name to its stats
+    """
+    return {name: cache.stats() for name, cache in list(_CACHES.items())}
+
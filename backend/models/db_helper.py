@@ -1,6 +1,8 @@
 from . import db_connector
+from .query_shapes import record_query
 from typing import List, Dict, Generator, Set, Optional
 from pymongo.errors import PyMongoError
+from pymongo.results import BulkWriteResult
 import pymongo
 import logging
 
@@ -82,6 +84,7 @@ def fetch_documents_by_query(
     try:
         db = db_connector.get_db(db_name)
         collection = db[collection_name]
+        record_query(collection_name, query, sort_key)
         search_query = collection.find(query, projection=keys)
         if sort_key:
             search_query = search_query.sort(sort_key, pymongo.ASCENDING)
@@ -179,6 +182,71 @@ def update_document_by_id(
         raise
 
 
+def update_document_fields_by_id(
+    db_name: str,
+    collection_name: str,
+    doc_id: str,
+    update: Dict,
+    array_filters: Optional[List[Dict]] = None
+) -> bool:
+    """
+    Apply update operators ($set, $unset, $push, ...) to an existing document by its ID.
+    
+    Unlike update_document_by_id, only the given paths are sent and the document is not upserted.
+    
+    Args:
+        db_name (str): Name of the database
+        collection_name (str): Name of the collection
+        doc_id (str): ID of the document to update
+        update (Dict): Update operators to apply
+        array_filters (Optional[List[Dict]]): Filters for the $[<identifier>] positional operators in the update
+        
+    Returns:
+        bool: True if the document exists, False otherwise
+        
+    Raises:
+        PyMongoError: If there's an error during update
+    """
+    try:
+        db = db_connector.get_db(db_name)
+        collection = db[collection_name]
+        result = collection.update_one({"_id": doc_id}, update, array_filters=array_filters or None)
+        return result.matched_count > 0
+    except PyMongoError as e:
+        logger.error(f"Error updating document fields in {db_name}.{collection_name}: {str(e)}")
+        raise
+
+def update_documents_by_query(
+    db_name: str,
+    collection_name: str,
+    query: Dict,
+    update: Dict
+) -> int:
+    """
+    Apply update operators to all documents matching a query in a single round trip.
+    
+    Args:
+        db_name (str): Name of the database
+        collection_name (str): Name of the collection
+        query (Dict): Query to match documents to update
+        update (Dict): Update operators to apply (e.g. {"$set": {...}})
+        
+    Returns:
+        int: Number of documents modified
+        
+    Raises:
+        PyMongoError: If there's an error during update
+    """
+    try:
+        db = db_connector.get_db(db_name)
+        collection = db[collection_name]
+        record_query(collection_name, query)
+        result = collection.update_many(query, update)
+        return result.modified_count
+    except PyMongoError as e:
+        logger.error(f"Error updating documents in {db_name}.{collection_name}: {str(e)}")
+        raise
+
 def delete_documents_by_query(
     db_name: str, 
     collection_name: str, 
@@ -201,8 +269,41 @@ def delete_documents_by_query(
     try:
         db = db_connector.get_db(db_name)
         collection = db[collection_name]
+        record_query(collection_name, query)
         result = collection.delete_many(query)
         return result.deleted_count
     except PyMongoError as e:
         logger.error(f"Error deleting documents from {db_name}.{collection_name}: {str(e)}")
         raise
+
+
+def bulk_write_documents(
+    db_name: str,
+    collection_name: str,
+    operations: List,
+    ordered: bool = True
+) -> Optional[BulkWriteResult]:
+    """
+    Apply multiple write operations to a MongoDB collection in a single round trip.
+    
+    Args:
+        db_name (str): Name of the database
+        collection_name (str): Name of the collection
+        operations (List): pymongo write operations (InsertOne, UpdateOne, ReplaceOne, ...)
+        ordered (bool): Whether to stop at the first failing operation
+        
+    Returns:
+        Optional[BulkWriteResult]: The bulk write result, or None if no operations were given
+        
+    Raises:
+        PyMongoError: If there's an error during the bulk write
+    """
+    if not operations:
+        return None
+    try:
+        db = db_connector.get_db(db_name)
+        collection = db[collection_name]
+        return collection.bulk_write(operations, ordered=ordered)
+    except PyMongoError as e:
+        logger.error(f"Error bulk writing documents into {db_name}.{collection_name}: {str(e)}")
+        raise
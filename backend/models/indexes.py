@@ -0,0 +1,95 @@
+"""Index management for the locke_manager collections.
+
+Every model module declares the indexes of the collections it owns in an INDEXES
+registry ({collection_name: [IndexModel, ...]}). This module gathers them,
+creates them idempotently and reports which recorded queries (see
+models/query_shapes.py) would still scan a whole collection.
+"""
+
+from typing import Any, Dict, List, Optional
+from pymongo import IndexModel
+from . import DB_NAME, db_connector
+from . import pokemon, report, run, run_creation, run_pokemons_options
+from .query_shapes import get_recorded_queries
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    **run.INDEXES,
+    **pokemon.INDEXES,
+    **run_pokemons_options.INDEXES,
+    **run_creation.INDEXES,
+    **report.INDEXES,
+}
+
+
+def ensure_indexes(db_name: str = DB_NAME) -> Dict[str, List[str]]:
+    """Create every registered index that does not exist yet.
+
+    create_indexes is a no-op for indexes that already exist with the same definition,
+    so this is safe to run on every startup.
+
+    Args:
+        db_name: Name of the database
+
+    Returns:
+        Dict[str, List[str]]: The index names ensured per collection
+    """
+    db = db_connector.get_db(db_name)
+    ensured_indexes = {}
+    for collection_name, index_models in INDEX_REGISTRY.items():
+        if not index_models:
+            continue
+        ensured_indexes[collection_name] = db[collection_name].create_indexes(index_models)
+    return ensured_indexes
+
+
+def _winning_plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan['stage']] if 'stage' in plan else []
+    for child_key in ('inputStage', 'queryPlan'):
+        if child_key in plan:
+            stages += _winning_plan_stages(plan[child_key])
+    for child_plan in plan.get('inputStages', []):
+        stages += _winning_plan_stages(child_plan)
+    return stages
+
+
+def explain_query(collection_name: str, query: Dict, sort_key: Optional[str] = None, db_name: str = DB_NAME) -> List[str]:
+    """Get the stages of the plan MongoDB would pick for a query.
+
+    Args:
+        collection_name: The queried collection
+        query: The MongoDB filter
+        sort_key: The field the query is sorted by, if any
+        db_name: Name of the database
+
+    Returns:
+        List[str]: The winning plan stages, from the root stage down
+    """
+    cursor = db_connector.get_db(db_name)[collection_name].find(query)
+    if sort_key:
+        cursor = cursor.sort(sort_key)
+    explanation = cursor.explain()
+    return _winning_plan_stages(explanation['queryPlanner']['winningPlan'])
+
+
+def report_collection_scans(queries: Optional[List[Dict[str, Any]]] = None, db_name: str = DB_NAME) -> List[Dict[str, Any]]:
+    """Explain recorded queries and flag the ones that would scan a whole collection.
+
+    Args:
+        queries: Recorded queries ({'collection', 'shape', 'query', 'sort'}),
+            defaults to the queries recorded by this process
+        db_name: Name of the database
+
+    Returns:
+        List of {'collection', 'shape', 'stages', 'collection_scan'} dictionaries
+    """
+    queries = get_recorded_queries() if queries is None else queries
+    query_reports = []
+    for recorded_query in queries:
+        stages = explain_query(recorded_query['collection'], recorded_query['query'], recorded_query.get('sort'), db_name)
+        query_reports.append({
+            'collection': recorded_query['collection'],
+            'shape': recorded_query['shape'],
+            'stages': stages,
+            'collection_scan': 'COLLSCAN' in stages,
+        })
+    return query_reports
@@ -12,8 +12,11 @@ from .db_helper import (
     insert_document,
     update_document_by_id,
     fetch_documents_by_query,
-    delete_documents_by_query
+    delete_documents_by_query,
+    bulk_write_documents,
 )
+from .storage import is_embedded_storage
+from pymongo import UpdateOne, IndexModel, ASCENDING
 from uuid import uuid4
 
 # Type aliases
@@ -24,6 +27,12 @@ DB_NAME = "locke_manager"
 _COLLECTIONS_NAME = "pokemons"
 _COLLECTIONS_NAME_SAVE = "pokemons_save"
 
+# Indexes of the collections owned by this module (created by models.indexes.ensure_indexes)
+INDEXES: Dict[str, List[IndexModel]] = {
+    collection_name: [IndexModel([("run_id", ASCENDING)], name="run_id")]
+    for collection_name in (_COLLECTIONS_NAME, _COLLECTIONS_NAME_SAVE)
+}
+
 def _create_pokemon_document(run_id: str, pokemon: Pokemon) -> Dict:
     """Flatten (or merge) metadata (using asdict) and overwrite (or add) "name", "gen", "types" (and "status") from the Pokémon instance.
     (This helper is used by save_pokemon and update_pokemon.)"""
@@ -74,6 +83,16 @@ def _db_dict_to_pokemon(data: dict) -> Pokemon:
         base_name=core_pokemon.base_name,
     )
 
+def pokemons_to_documents(run_id: str, pokemons: List[Pokemon]) -> Dict[str, Dict]:
+    """Convert pokemons to the subdocuments embedded in a run document, keyed by pokemon id.
+    (This helper is used when runs are stored in embedded mode.)"""
+    return {pokemon.metadata.id: _create_pokemon_document(run_id, pokemon) for pokemon in pokemons}
+
+def documents_to_pokemons(pokemon_documents: Dict[str, Dict]) -> List[Pokemon]:
+    """Convert the pokemon subdocuments embedded in a run document back to Pokemon definitions.
+    (This helper is used when runs are stored in embedded mode.)"""
+    return [_db_dict_to_pokemon(pokemon_document) for pokemon_document in pokemon_documents.values()]
+
 def save_pokemon(pokemon: Pokemon, run_id: str, collections: List[str] = None) -> None:
     """Save a Pokemon (using _create_pokemon_document) to the database.
     (This function is used by save_pokemon.)"""
@@ -94,6 +113,17 @@ def update_pokemon(pokemon: Pokemon, run_id: str, collection_name: str = _COLLEC
     except Exception as e:
         raise Exception(f"Failed to update Pokemon: {str(e)}")
 
+def update_pokemons(pokemons: List[Pokemon], run_id: str, collection_name: str = _COLLECTIONS_NAME) -> None:
+    """Update (or insert) several Pokemon (using _create_pokemon_document) in a single bulk write.
+    (This function is used when several Pokemon changed in the same request.)"""
+    try:
+        bulk_write_documents(DB_NAME, collection_name, [
+            UpdateOne({'_id': pokemon.metadata.id}, {'$set': _create_pokemon_document(run_id, pokemon)}, upsert=True)
+            for pokemon in pokemons
+        ])
+    except Exception as e:
+        raise Exception(f"Failed to update Pokemons: {str(e)}")
+
 def fetch_pokemon(pokemon_id: str) -> Optional[Pokemon]:
     """Fetch a Pokemon (using _db_dict_to_pokemon) from the database.
     (This function is used by fetch_pokemon.)"""
@@ -140,5 +170,7 @@ def generate_locke_pokemon(run_id: str, pokemon_name: str, gen: int, extra_metad
     core_pokemon = fetch_static_pokemon(pokemon_name, gen)
     pokemon_core_attributes = asdict(core_pokemon)
     locke_pokemon = Pokemon(**pokemon_core_attributes, metadata=PokemonMetadata(id=uuid4().hex, **extra_metadata),  status=PokemonStatus.ALIVE)
-    save_pokemon(locke_pokemon, run_id)
+    if not is_embedded_storage():
+        # Embedded runs persist their pokemons together with the run document
+        save_pokemon(locke_pokemon, run_id)
     return locke_pokemon
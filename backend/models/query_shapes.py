@@ -0,0 +1,97 @@
+"""Recording of the query shapes issued through db_helper.
+
+A query shape is the filter with its values replaced by placeholders (plus the sort key),
+so e.g. {'run_id': 'abc', 'pokemon_name': {'$in': [...]}} and the same query for another
+run share a shape. The first concrete query of every shape is kept, so the shape can later
+be explained against the database (see models/indexes.py).
+
+Shapes are kept in memory for the lifetime of the process. When the QUERY_SHAPES_LOG
+environment variable points to a file, new shapes are also appended to it as JSON lines,
+so shapes collected by the app can be reported from the CLI.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+QUERY_SHAPES_LOG_ENV = "QUERY_SHAPES_LOG"
+_PLACEHOLDER = 1
+
+_lock = threading.Lock()
+_recorded_shapes: Dict[str, Dict[str, Any]] = {}
+
+
+def get_query_shape(query: Dict, sort_key: Optional[str] = None) -> Dict[str, Any]:
+    """Replace the values of a query with placeholders, keeping fields and operators.
+
+    Args:
+        query: The MongoDB filter
+        sort_key: The field the query is sorted by, if any
+
+    Returns:
+        Dict[str, Any]: {'filter': <shape of the filter>, 'sort': sort_key}
+    """
+    def to_shape(value):
+        if isinstance(value, dict):
+            return {key: to_shape(sub_value) for key, sub_value in sorted(value.items())}
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            return [to_shape(item) for item in value]
+        return _PLACEHOLDER
+
+    return {'filter': to_shape(query), 'sort': sort_key}
+
+
+def record_query(collection_name: str, query: Dict, sort_key: Optional[str] = None) -> None:
+    """Record the shape of a query issued against a collection (only its first occurrence is kept).
+
+    Args:
+        collection_name: The queried collection
+        query: The MongoDB filter
+        sort_key: The field the query is sorted by, if any
+    """
+    shape = get_query_shape(query, sort_key)
+    shape_key = json.dumps([collection_name, shape], sort_keys=True)
+    with _lock:
+        if shape_key in _recorded_shapes:
+            return
+        recorded_shape = {'collection': collection_name, 'shape': shape, 'query': query, 'sort': sort_key}
+        _recorded_shapes[shape_key] = recorded_shape
+
+    log_path = os.getenv(QUERY_SHAPES_LOG_ENV)
+    if log_path:
+        try:
+            with open(log_path, 'a') as log_file:
+                log_file.write(json.dumps(recorded_shape, default=str) + "\n")
+        except OSError as e:
+            print(f"Failed to log query shape to {log_path}: {e}")
+
+
+def get_recorded_queries() -> List[Dict[str, Any]]:
+    """Get the first concrete query of every shape recorded by this process.
+
+    Returns:
+        List of {'collection', 'shape', 'query', 'sort'} dictionaries
+    """
+    with _lock:
+        return list(_recorded_shapes.values())
+
+
+def load_logged_queries(log_path: str) -> List[Dict[str, Any]]:
+    """Load the queries logged to a QUERY_SHAPES_LOG file, one per shape.
+
+    Args:
+        log_path: Path to the JSON lines file
+
+    Returns:
+        List of {'collection', 'shape', 'query', 'sort'} dictionaries
+    """
+    logged_queries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    with open(log_path) as log_file:
+        for line in log_file:
+            if not line.strip():
+                continue
+            logged_query = json.loads(line)
+            shape_key = (logged_query['collection'], json.dumps(logged_query['shape'], sort_keys=True))
+            logged_queries.setdefault(shape_key, logged_query)
+    return list(logged_queries.values())
@@ -3,11 +3,17 @@ from dataclasses import dataclass
 from . import DB_NAME
 from .db_helper import insert_document, fetch_documents_by_query, delete_documents_by_query, update_document_by_id
 from .pokemon import Pokemon, _create_pokemon_document, _db_dict_to_pokemon
+from pymongo import IndexModel, ASCENDING
 import functools
 
 
 _COLLECTIONS_NAME = "runs_reports"
 
+# Indexes of the collections owned by this module (created by models.indexes.ensure_indexes)
+INDEXES: Dict[str, List[IndexModel]] = {
+    _COLLECTIONS_NAME: [IndexModel([("run_id", ASCENDING)], name="run_id")],
+}
+
 
 @dataclass
 class Report:
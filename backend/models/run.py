@@ -1,15 +1,29 @@
 """Run model for representing a run object in the database."""
 
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field
+from pymongo import IndexModel
 from . import DB_NAME
-from .db_helper import insert_document, fetch_documents_by_query, update_document_by_id, delete_documents_by_query
+from .db_helper import (
+    insert_document,
+    fetch_documents_by_query,
+    update_document_by_id,
+    update_document_fields_by_id,
+    delete_documents_by_query,
+)
 
 
 _COLLECTIONS_NAME = "runs"
 _COLLECTIONS_SAVE_NAME = "runs_save"
 
+# Indexes of the collections owned by this module (created by models.indexes.ensure_indexes).
+# Runs are only looked up by _id, which MongoDB always indexes.
+INDEXES: Dict[str, List[IndexModel]] = {
+    _COLLECTIONS_NAME: [],
+    _COLLECTIONS_SAVE_NAME: [],
+}
+
 
 @dataclass
 class Run:
@@ -31,6 +45,7 @@ class Run:
     duplicate_clause: bool = False
     finished: bool = False
     starter: Optional[str] = None
+    pokemons: Optional[Dict[str, Dict[str, Any]]] = None
 
     def __post_init__(self):
         """Validate the run data after initialization."""
@@ -46,10 +61,13 @@ class Run:
     def to_dict(self) -> Dict[str, Any]:
         """Convert the Run object to a dictionary.
 
+        Embedded pokemon subdocuments are only included when the run holds them,
+        so runs stored in split mode keep their original document shape.
+
         Returns:
             Dict[str, Any]: A dictionary representation of the Run object.
         """
-        return {
+        run_dict = {
             "_id": self.run_id,
             "created_date": self.created_date,
             "name": self.name,
@@ -67,6 +85,9 @@ class Run:
             "finished": self.finished,
             "starter": self.starter
         }
+        if self.pokemons is not None:
+            run_dict["pokemons"] = self.pokemons
+        return run_dict
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Run':
@@ -94,7 +115,8 @@ class Run:
             restarts=data.get("restarts", 0),
             duplicate_clause=data.get("duplicate_clause", False),
             finished=data.get("finished", False),
-            starter=data.get("starter")
+            starter=data.get("starter"),
+            pokemons=data.get("pokemons"),
         )
 
 
@@ -117,13 +139,15 @@ def save_run(run: Run) -> None:
         raise Exception(f"Failed to save run: {str(e)}")
 
 
-def update_run(run: Run, collection_name: str = _COLLECTIONS_NAME) -> None:
+def update_run(run: Run, collection_name: str = _COLLECTIONS_NAME, persisted_document: Optional[Dict[str, Any]] = None) -> None:
     """Update an existing run in the database.
     
     Args:
         run: Run instance to update
         collection_name: collection to save in [default: runs]
             valid options: [runs, runs_save]
+        persisted_document: the run document as currently stored in the collection.
+            When given, only the paths that differ from it are written.
         
     Raises:
         Exception: If database operation fails
@@ -131,11 +155,123 @@ def update_run(run: Run, collection_name: str = _COLLECTIONS_NAME) -> None:
     try:
         run_dict = run.to_dict()
         assert collection_name in [_COLLECTIONS_NAME, _COLLECTIONS_SAVE_NAME], "Invalid collection name given"
-        update_document_by_id(DB_NAME, collection_name, run.run_id, run_dict)
+        if persisted_document is None:
+            update_document_by_id(DB_NAME, collection_name, run.run_id, run_dict)
+            return
+        run_update, array_filters = build_run_update(persisted_document, run_dict)
+        if run_update and not update_document_fields_by_id(DB_NAME, collection_name, run.run_id, run_update, array_filters):
+            # The run document is gone (e.g. deleted meanwhile), a partial update can't recreate it
+            update_document_by_id(DB_NAME, collection_name, run.run_id, run_dict)
     except Exception as e:
         raise Exception(f"Failed to update run: {str(e)}")
 
 
+def build_run_update(persisted_document: Dict[str, Any], run_document: Dict[str, Any]) -> Tuple[Dict[str, Dict], List[Dict]]:
+    """Build the update operators that turn the persisted run document into the given run document.
+    
+    Only changed paths are written:
+    - scalar fields and party are $set when they differ
+    - box ids appended to the end of the box are $push-ed
+    - changed encounters are $set through an array filter on their route, new encounters are $push-ed
+    - changed battles are $set by position (battles.<index>.won) while the battles layout is unchanged
+    - embedded pokemons are $set / $unset by pokemon id
+    Whenever a partial update can't express the change, the whole field is $set.
+    
+    Args:
+        persisted_document: the run document as currently stored (Run.to_dict output)
+        run_document: the run document to store (Run.to_dict output)
+        
+    Returns:
+        Tuple[Dict[str, Dict], List[Dict]]: update operators (empty if nothing changed) and their array filters
+    """
+    set_fields: Dict[str, Any] = {}
+    unset_fields: Dict[str, str] = {}
+    push_fields: Dict[str, Dict[str, List]] = {}
+    array_filters: List[Dict] = []
+
+    for key, value in run_document.items():
+        if key in ("_id", "box", "battles", "encounters", "pokemons"):
+            continue
+        if key not in persisted_document or persisted_document[key] != value:
+            set_fields[key] = value
+
+    persisted_box = persisted_document.get("box", [])
+    box = run_document["box"]
+    if box != persisted_box:
+        if box[:len(persisted_box)] == persisted_box:
+            push_fields["box"] = {"$each": box[len(persisted_box):]}
+        else:
+            set_fields["box"] = box
+
+    _diff_battles(persisted_document.get("battles", []), run_document["battles"], set_fields)
+    _diff_encounters(persisted_document.get("encounters", []), run_document["encounters"], set_fields, push_fields, array_filters)
+    if "pokemons" in run_document:
+        _diff_pokemons(persisted_document.get("pokemons"), run_document["pokemons"], set_fields, unset_fields)
+
+    run_update: Dict[str, Dict] = {}
+    if set_fields:
+        run_update["$set"] = set_fields
+    if unset_fields:
+        run_update["$unset"] = unset_fields
+    if push_fields:
+        run_update["$push"] = push_fields
+    return run_update, array_filters
+
+
+def _diff_battles(persisted_battles: List[Dict[str, Any]], battles: List[Dict[str, Any]], set_fields: Dict[str, Any]) -> None:
+    if battles == persisted_battles:
+        return
+    if [battle["rival"] for battle in battles] != [battle["rival"] for battle in persisted_battles]:
+        set_fields["battles"] = battles
+        return
+    for index, (persisted_battle, battle) in enumerate(zip(persisted_battles, battles)):
+        if persisted_battle != battle:
+            set_fields[f"battles.{index}.won"] = battle["won"]
+
+
+def _diff_encounters(
+    persisted_encounters: List[Dict[str, Any]],
+    encounters: List[Dict[str, Any]],
+    set_fields: Dict[str, Any],
+    push_fields: Dict[str, Dict[str, List]],
+    array_filters: List[Dict],
+) -> None:
+    if encounters == persisted_encounters:
+        return
+    persisted_by_route = {encounter["route"]: encounter for encounter in persisted_encounters}
+    routes = {encounter["route"] for encounter in encounters}
+    changed_encounters = [
+        encounter for encounter in encounters
+        if encounter["route"] in persisted_by_route and persisted_by_route[encounter["route"]] != encounter
+    ]
+    new_encounters = [encounter for encounter in encounters if encounter["route"] not in persisted_by_route]
+    # MongoDB rejects $push and $set on the same array in one update, and removals can't be expressed by route
+    if (changed_encounters and new_encounters) or not routes.issuperset(persisted_by_route):
+        set_fields["encounters"] = encounters
+        return
+    if new_encounters:
+        push_fields["encounters"] = {"$each": new_encounters}
+    for index, encounter in enumerate(changed_encounters):
+        set_fields[f"encounters.$[encounter{index}]"] = encounter
+        array_filters.append({f"encounter{index}.route": encounter["route"]})
+
+
+def _diff_pokemons(
+    persisted_pokemons: Optional[Dict[str, Dict[str, Any]]],
+    pokemons: Dict[str, Dict[str, Any]],
+    set_fields: Dict[str, Any],
+    unset_fields: Dict[str, str],
+) -> None:
+    if persisted_pokemons is None:
+        set_fields["pokemons"] = pokemons
+        return
+    for pokemon_id, pokemon_document in pokemons.items():
+        if persisted_pokemons.get(pokemon_id) != pokemon_document:
+            set_fields[f"pokemons.{pokemon_id}"] = pokemon_document
+    for pokemon_id in persisted_pokemons.keys() - pokemons.keys():
+        unset_fields[f"pokemons.{pokemon_id}"] = ""
+
+
 def fetch_run(run_id: str, collection_name: str = _COLLECTIONS_NAME) -> Optional[Run]:
     """Fetch a run from the database.
     
@@ -8,11 +8,17 @@ game settings and optional rules.
 from . import DB_NAME
 from .db_helper import insert_document, fetch_documents_by_query, update_document_by_id
 from dataclasses import dataclass, asdict, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from pymongo import IndexModel, ASCENDING
 
 
 _COLLECTIONS_NAME = "run_creation"
 
+# Indexes of the collections owned by this module (created by models.indexes.ensure_indexes)
+INDEXES: Dict[str, List[IndexModel]] = {
+    _COLLECTIONS_NAME: [IndexModel([("name", ASCENDING)], name="name")],
+}
+
 
 @dataclass
 class RunCreation:
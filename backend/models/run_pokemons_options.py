@@ -1,11 +1,34 @@
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 from . import DB_NAME
-from .db_helper import insert_document, fetch_documents_by_query, delete_documents_by_query, update_document_by_id
-import functools
+from .db_helper import (
+    insert_document,
+    insert_documents,
+    fetch_documents_by_query,
+    delete_documents_by_query,
+    update_document_by_id,
+    update_documents_by_query,
+)
+from .cache import RunScopedCache, create_cache_backend
+from pymongo import IndexModel, ASCENDING
+import os
 
 
 _COLLECTIONS_NAME = "runs_pokemons_options"
+_DEFAULT_INSERT_CHUNK_SIZE = 500
+_RUN_OPTIONS_CACHE = RunScopedCache("runs_pokemons_options", create_cache_backend("runs_pokemons_options"))
+
+# Indexes of the collections owned by this module (created by models.indexes.ensure_indexes)
+INDEXES: Dict[str, List[IndexModel]] = {
+    _COLLECTIONS_NAME: [
+        # listing a run's options sorted by index (optionally filtered by caught)
+        IndexModel([("run_id", ASCENDING), ("index", ASCENDING)], name="run_id_index"),
+        # evolution / role lookups by pokemon name
+        IndexModel([("run_id", ASCENDING), ("pokemon_name", ASCENDING)], name="run_id_pokemon_name"),
+        # caught flag updates of whole evolution lines
+        IndexModel([("run_id", ASCENDING), ("base_pokemon", ASCENDING)], name="run_id_base_pokemon"),
+    ],
+}
 
 
 @dataclass
@@ -86,22 +109,59 @@ def save_run_options(run: RunPokemonsOptions, create: bool = True) -> None:
             update_document_by_id(DB_NAME, _COLLECTIONS_NAME, run.id, run_dict)
     except Exception as e:
         raise Exception(f"Failed to save run: {str(e)}")
+    finally:
+        invalidate_run_options(run.run_id)
+
+
+def save_runs_options(run_options: List[RunPokemonsOptions], chunk_size: Optional[int] = None) -> None:
+    """Insert several RunPokemonsOptions to the database with ordered bulk inserts.
+
+    Args:
+        run_options: RunPokemonsOptions instances to insert
+        chunk_size: number of options inserted per round trip
+            [default: RUN_OPTIONS_INSERT_CHUNK_SIZE env var or 500]
+
+    Raises:
+        Exception: If database operation fails
+    """
+    chunk_size = chunk_size or int(os.getenv("RUN_OPTIONS_INSERT_CHUNK_SIZE", _DEFAULT_INSERT_CHUNK_SIZE))
+    assert chunk_size > 0, "Chunk size must be positive"
+    try:
+        run_dicts = [run_option.to_dict() for run_option in run_options]
+        for chunk_start in range(0, len(run_dicts), chunk_size):
+            insert_documents(DB_NAME, _COLLECTIONS_NAME, run_dicts[chunk_start:chunk_start + chunk_size])
+    except Exception as e:
+        raise Exception(f"Failed to save runs options: {str(e)}")
+    finally:
+        for run_id in {run_option.run_id for run_option in run_options}:
+            invalidate_run_options(run_id)
 
 
-@functools.lru_cache(10)
 def list_runs_options(run_id: str) -> List[RunPokemonsOptions]:
-    """List all RunPokemonsOptions from the database, optionally filtered by run_id.
+    """List all RunPokemonsOptions of a run, sorted by index, through the run options cache.
+
+    Every write in this module invalidates the run's cached options, so the cached list
+    reflects the caught flags as well. The returned options must not be mutated.
 
     Args:
-        query: Optional query dictionary to filter runs
+        run_id: ID of the run
 
     Returns:
-        List[Run]: List of Run instances matching the query
+        List[RunPokemonsOptions]: The run's options
 
     Raises:
         Exception: If database operation fails
     """
-    return list_runs_options_by_query(run_id)
+    return list(_RUN_OPTIONS_CACHE.get_or_load(run_id, lambda: list_runs_options_by_query(run_id)))
+
+
+def invalidate_run_options(run_id: str) -> None:
+    """Drop the run's cached options. Must be called after any write to the run's options.
+
+    Args:
+        run_id: ID of the run
+    """
+    _RUN_OPTIONS_CACHE.invalidate(run_id)
 
 
 def list_runs_options_by_query(run_id: str, query: Optional[Dict] = None) -> List[RunPokemonsOptions]:
@@ -139,25 +199,59 @@ def delete_run_pokemons(run_id: str) -> None:
         delete_documents_by_query(DB_NAME, _COLLECTIONS_NAME, {'run_id': run_id})
     except Exception as e:
         raise Exception(f"Failed to delete run: {str(e)}")
+    finally:
+        invalidate_run_options(run_id)
+
+
+def set_caught_base_pokemons(run_id: str, base_pokemons: List[str], caught: bool) -> None:
+    """Set the caught flag of every option sharing one of the given base pokemons in a single update.
+
+    Args:
+        run_id: ID of the run
+        base_pokemons: base pokemons whose evolution lines should be updated
+        caught: the caught flag to set
+
+    Raises:
+        Exception: If database operation fails
+    """
+    if not base_pokemons:
+        return
+    try:
+        update_documents_by_query(
+            DB_NAME,
+            _COLLECTIONS_NAME,
+            {'run_id': run_id, 'base_pokemon': {'$in': list(base_pokemons)}},
+            {'$set': {'caught': caught}},
+        )
+    except Exception as e:
+        raise Exception(f"Failed to update caught pokemons: {str(e)}")
+    finally:
+        invalidate_run_options(run_id)
+
+
+def set_caught_pokemons(run_id: str, pokemon_names: List[str], caught: bool) -> None:
+    """Set the caught flag of the given pokemons and every option sharing their base pokemon.
+
+    The base pokemons are resolved from the cached run options, so with a warm cache
+    this is a single update_many.
+
+    Args:
+        run_id: ID of the run
+        pokemon_names: pokemons whose evolution lines should be updated
+        caught: the caught flag to set
+    """
+    pokemon_names = set(pokemon_names)
+    if not pokemon_names:
+        return
+    pokemon_options = [pokemon_option for pokemon_option in list_runs_options(run_id) if pokemon_option.pokemon_name in pokemon_names]
+    missing_pokemons = pokemon_names - {pokemon_option.pokemon_name for pokemon_option in pokemon_options}
+    assert not missing_pokemons, f"Pokemons {missing_pokemons} are not options of run {run_id}"
+    set_caught_base_pokemons(run_id, list({pokemon_option.base_pokemon for pokemon_option in pokemon_options}), caught)
 
 
 def mark_caught_pokemon(run_id: str, pokemon_name: str):
-    pokemon_options = list_runs_options_by_query(
-        run_id, {'_id': RunPokemonsOptions.generate_id(run_id, pokemon_name)}
-    )
-    assert len(pokemon_options) == 1
-    pokemon_base = pokemon_options[0].base_pokemon
-    for pokemon_same_base in list_runs_options_by_query(run_id, {'base_pokemon': pokemon_base}):
-        pokemon_same_base.caught = True
-        save_run_options(pokemon_same_base, create=False)
+    set_caught_pokemons(run_id, [pokemon_name], caught=True)
 
 
 def unmark_caught_pokemon(run_id: str, pokemon_name: str):
-    pokemon_options = list_runs_options_by_query(
-        run_id, {'_id': RunPokemonsOptions.generate_id(run_id, pokemon_name)}
-    )
-    assert len(pokemon_options) == 1
-    pokemon_base = pokemon_options[0].base_pokemon
-    for pokemon_same_base in list_runs_options_by_query(run_id, {'base_pokemon': pokemon_base}):
-        pokemon_same_base.caught = False
-        save_run_options(pokemon_same_base, create=False)
+    set_caught_pokemons(run_id, [pokemon_name], caught=False)
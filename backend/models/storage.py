@@ -0,0 +1,45 @@
+"""Storage layout selection for run documents.
+
+Two layouts are supported:
+- split (default): run documents reference pokemon ids, and the pokemons live in
+  their own collection, so loading a run costs a read from each collection.
+- embedded: run documents hold their pokemon subdocuments (keyed by pokemon id),
+  so a run is loaded with one read and persisted with one write.
+
+The layout is selected with the RUN_STORAGE_MODE environment variable. Use
+scripts/migrate_run_storage.py to convert existing data before switching modes.
+"""
+
+import os
+from pokemendel_core.utils.enum_list import EnumList
+
+STORAGE_MODE_ENV = "RUN_STORAGE_MODE"
+
+
+class StorageModes(EnumList):
+    SPLIT = "split"
+    EMBEDDED = "embedded"
+
+
+def get_storage_mode() -> str:
+    """Get the configured run storage mode.
+
+    Returns:
+        str: One of StorageModes values, defaulting to StorageModes.SPLIT
+
+    Raises:
+        ValueError: If RUN_STORAGE_MODE holds an unknown mode
+    """
+    storage_mode = os.getenv(STORAGE_MODE_ENV, StorageModes.SPLIT).strip().lower()
+    if storage_mode not in StorageModes.list_all():
+        raise ValueError(f"Invalid {STORAGE_MODE_ENV} '{storage_mode}', expected one of {StorageModes.list_all()}")
+    return storage_mode
+
+
+def is_embedded_storage() -> bool:
+    """Check whether run documents embed their pokemons.
+
+    Returns:
+        bool: True if the embedded storage mode is configured, False otherwise
+    """
+    return get_storage_mode() == StorageModes.EMBEDDED
@@ -0,0 +1,246 @@
+"""ASGI app serving the resource images, apart from the Flask API.
+
+The image routes of the Flask app block an API worker for the whole R2 HEAD and GET (or the
+google download of a missing image), so a burst of slow sprite requests starves the run
+endpoints. This app serves the same image routes from an event loop: the blocking resources
+work runs on the bounded resources executor (core.resource_executor), so image concurrency
+is set by RESOURCE_IO_WORKERS / RESOURCE_IO_MAX_PENDING and doesn't use up API workers.
+
+Responses match the Flask image routes, both answer with apis.resources.plan_resource_image:
+ETag / Last-Modified / Cache-Control validators, 304 revalidations, the size and format
+derivatives query parameters, Range requests (answered from R2 with 206) and the JSON error body.
+
+Usage (from the backend directory, next to the Flask app):
+    pip install uvicorn
+    uvicorn resources_app:app --port 5223
+and point the web app's REACT_APP_RESOURCES_URL to http://localhost:5223/locke_manager
+"""
+
+import functools
+import json
+import os
+import re
+import traceback
+from datetime import datetime, timezone
+from email.utils import formatdate
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote
+
+from dotenv import load_dotenv
+
+from apis.resources import (
+    get_pokemon_info,
+    get_gym_leader_info,
+    get_type_info,
+    open_resource_image_stream,
+    guess_resource_image_mimetype,
+    parse_resource_derivative_request,
+    plan_resource_image,
+)
+from apis.exceptions import ResourcesBusyError
+from apis.metrics import get_metrics_api
+from core.r2 import STREAM_CHUNK_SIZE
+from core.resource_executor import get_resource_executor
+
+load_dotenv()
+
+# Route pattern, resources API lookup and description of the resource in error messages
+_IMAGE_ROUTES: List[Tuple[re.Pattern, Callable[..., Optional[str]], str]] = [
+    (re.compile(r"/locke_manager/resources/pokemon/([^/]+)"), get_pokemon_info, "Pokemon '{0}'"),
+    (re.compile(r"/locke_manager/resources/game/([^/]+)/gyms/([^/]+)"), get_gym_leader_info, "Gym leader '{1}' from game '{0}'"),
+    (re.compile(r"/locke_manager/resources/types/([^/]+)"), get_type_info, "Type '{0}'"),
+]
+_METRICS_PATH = "/locke_manager/resources/metrics"
+
+
+class _Request:
+    def __init__(self, scope: Dict[str, Any]):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = {name: values[0] for name, values in parse_qs(scope['query_string'].decode()).items()}
+        self.headers = {name.decode().lower(): value.decode() for name, value in scope['headers']}
+
+
+def _http_date(value: Union[datetime, float]) -> str:
+    if isinstance(value, datetime):
+        value = value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp()
+    return formatdate(value, usegmt=True)
+
+
+def _cache_headers(max_age: int) -> List[Tuple[str, str]]:
+    return [('cache-control', f"public, max-age={max_age}")]
+
+
+# Streamed responses have no ETag, the next request revalidates and gets the cached image's ETag
+_STREAM_CACHE_HEADERS = [('cache-control', "public, max-age=0, no-cache")]
+
+
+async def _start_response(send, status: int, headers: List[Tuple[str, str]]) -> None:
+    headers = headers + [('access-control-allow-origin', '*')]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode(), str(value).encode()) for name, value in headers],
+    })
+
+
+async def _send_json(send, status: int, body: Any, headers: Optional[List[Tuple[str, str]]] = None) -> None:
+    data = json.dumps(body).encode()
+    await _start_response(send, status, (headers or []) + [('content-type', 'application/json'), ('content-length', str(len(data)))])
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def _send_error(send, status: int, message: str, headers: Optional[List[Tuple[str, str]]] = None) -> None:
+    await _send_json(send, status, {"status": "error", "message": message}, headers)
+
+
+def _read_file_chunks(image_file: BinaryIO):
+    while True:
+        chunk = image_file.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _open_cached_file(image_path: str) -> Optional[BinaryIO]:
+    """Open an image file, None if it was evicted since it was looked up."""
+    try:
+        return open(image_path, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+async def _send_chunks(send, chunks) -> None:
+    try:
+        async for chunk in get_resource_executor().iterate(chunks):
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        # Stops the R2 download (and drops the partial cache entry) if the client went away
+        chunks.close()
+
+
+async def _send_cached_file(send, image_file: BinaryIO, mimetype: str, etag: Optional[str], last_modified: Optional[float], max_age: int) -> None:
+    try:
+        headers = _cache_headers(max_age) + [
+            ('content-type', mimetype),
+            ('content-length', str(os.fstat(image_file.fileno()).st_size)),
+        ]
+        if etag:
+            headers.append(('etag', f'"{etag}"'))
+        if last_modified:
+            headers.append(('last-modified', _http_date(last_modified)))
+        await _start_response(send, 200, headers)
+        await _send_chunks(send, _read_file_chunks(image_file))
+    finally:
+        image_file.close()
+
+
+async def _stream_resource_image(send, s3_key: str, byte_range: Optional[str], resource_description: str) -> None:
+    opened_stream = await get_resource_executor().run(open_resource_image_stream, s3_key, byte_range)
+    if opened_stream is None:
+        await _send_error(send, 404, f"{resource_description} not found in R2")
+        return
+    object_stream, chunks = opened_stream
+    headers = _STREAM_CACHE_HEADERS + [
+        ('content-type', object_stream.content_type or guess_resource_image_mimetype(s3_key)),
+        ('accept-ranges', 'bytes'),
+    ]
+    if object_stream.content_length is not None:
+        headers.append(('content-length', str(object_stream.content_length)))
+    if object_stream.content_range:
+        headers.append(('content-range', object_stream.content_range))
+    if object_stream.last_modified:
+        headers.append(('last-modified', _http_date(object_stream.last_modified)))
+    await _start_response(send, 206 if object_stream.content_range else 200, headers)
+    await _send_chunks(send, chunks)
+
+
+async def _send_resource_image(send, request: _Request, lookup: Callable[..., Optional[str]], lookup_args: Tuple[str, ...], resource_description: str) -> None:
+    """Same as the Flask app's _send_resource_image, with the blocking work on the resources executor."""
+    executor = get_resource_executor()
+    force = request.args.get('force', 'false').lower() == 'true'
+    size, image_format = parse_resource_derivative_request(request.args.get('size'), request.args.get('format'))
+    image_path = await executor.run(functools.partial(lookup, *lookup_args, force=force))
+    if image_path is None:
+        await _send_error(send, 404, f"{resource_description} not found")
+        return
+
+    plan = await executor.run(functools.partial(
+        plan_resource_image, image_path, size, image_format, force=force,
+        byte_range=request.headers.get('range'),
+        if_none_match=request.headers.get('if-none-match'),
+        if_modified_since=request.headers.get('if-modified-since'),
+    ))
+    if plan is None:
+        await _send_error(send, 404, f"{resource_description} not found in R2")
+        return
+    if plan.not_modified:
+        await _start_response(send, 304, _cache_headers(plan.max_age) + [('etag', f'"{plan.etag}"')])
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    # The file is opened before answering, it may be evicted by another request meanwhile
+    image_file = None if plan.local_path is None else await executor.run(_open_cached_file, plan.local_path)
+    if image_file is None:
+        await _stream_resource_image(send, plan.image_path, plan.byte_range, resource_description)
+        return
+    await _send_cached_file(send, image_file, plan.mimetype, plan.etag, plan.last_modified, plan.max_age)
+
+
+async def _handle_http(scope, send) -> None:
+    request = _Request(scope)
+    response_started = False
+
+    async def tracked_send(message: Dict[str, Any]) -> None:
+        nonlocal response_started
+        response_started = response_started or message['type'] == 'http.response.start'
+        await send(message)
+
+    if request.method == 'OPTIONS':
+        await _start_response(tracked_send, 204, [('access-control-allow-methods', 'GET'), ('access-control-allow-headers', '*')])
+        await tracked_send({'type': 'http.response.body', 'body': b''})
+        return
+    if request.method != 'GET':
+        await _send_error(tracked_send, 405, f"Method {request.method} not allowed")
+        return
+    try:
+        if request.path == _METRICS_PATH:
+            await _send_json(tracked_send, 200, await get_resource_executor().run(get_metrics_api))
+            return
+        for pattern, lookup, description in _IMAGE_ROUTES:
+            match = pattern.fullmatch(request.path)
+            if match:
+                lookup_args = tuple(unquote(arg) for arg in match.groups())
+                await _send_resource_image(tracked_send, request, lookup, lookup_args, description.format(*lookup_args))
+                return
+        await _send_error(tracked_send, 404, f"Unknown resource path '{request.path}'")
+    except Exception as e:
+        # Too late for an error response once the body started, the client gets a truncated body
+        if response_started:
+            raise
+        if isinstance(e, ResourcesBusyError):
+            await _send_error(send, e.status_code, str(e), [('retry-after', '1')])
+            return
+        status = getattr(e, "status_code", 500)
+        print(f"ERROR: {e}\n{traceback.format_exc()}")
+        await _send_error(send, status, str(e))
+
+
+async def _handle_lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_resource_executor()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            get_resource_executor().shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await _handle_lifespan(receive, send)
+    elif scope['type'] == 'http':
+        await _handle_http(scope, send)
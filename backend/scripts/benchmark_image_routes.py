@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Image Routes Load Test Script
+
+This script shows how slow image requests affect the API endpoints. A burst of image requests
+that miss the image cache is sent while an API endpoint (GET /locke_manager/lockes) is probed,
+in two modes:
+- wsgi: the images are served by the Flask app, sharing its workers with the API
+- asgi: the images are served by the async resources app (resources_app.py), the Flask app
+  only serves the API
+
+The Flask app runs on a WSGI server with a fixed number of worker threads (--api-workers),
+like a gthread gunicorn worker. R2 is a local moto server, with --r2-latency-ms added to every
+R2 lookup and download to stand in for the round trips to the real R2.
+
+Usage (from the backend directory):
+    pip install 'moto[server]' uvicorn
+    python -m scripts.benchmark_image_routes [--image-requests 200] [--image-concurrency 32] [--api-workers 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from typing import Dict, List
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from scripts.benchmark_r2_client import _start_moto_server, _percentile
+
+BENCHMARK_PREFIX = "pokemendel/resources/pokemons/"
+MODES = ["wsgi", "asgi"]
+IMAGE_SIZE_BYTES = 20 * 1024
+API_PATH = "/locke_manager/lockes"
+# Delay between two probes of the API endpoint
+PROBE_INTERVAL_SECONDS = 0.05
+
+
+class _PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server handling requests on a fixed number of threads."""
+
+    def __init__(self, *args, workers: int, **kwargs):
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_api_server(port: int, workers: int) -> None:
+    from app import app
+    server = make_server(
+        "127.0.0.1", port, app,
+        server_class=lambda *args, **kwargs: _PooledWSGIServer(*args, workers=workers, **kwargs),
+        handler_class=_QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def _start_resources_server(port: int) -> None:
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is not installed, run `pip install uvicorn`")
+        sys.exit(1)
+    from resources_app import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def _add_r2_latency(latency_seconds: float) -> None:
+    import apis.resources as resources_api
+
+    def delayed(function):
+        def call(*args, **kwargs):
+            time.sleep(latency_seconds)
+            return function(*args, **kwargs)
+        return call
+
+    # Both apps go through these names of the resources API
+    resources_api.check_file_exists = delayed(resources_api.check_file_exists)
+    resources_api.open_object_stream = delayed(resources_api.open_object_stream)
+
+
+def _run_mode(images_url: str, api_url: str, image_names: List[str], concurrency: int) -> Dict:
+    probe_latencies = []
+    images_done = threading.Event()
+
+    def probe_api():
+        while not images_done.is_set():
+            start = time.perf_counter()
+            requests.get(f"{api_url}{API_PATH}", timeout=60).raise_for_status()
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(PROBE_INTERVAL_SECONDS)
+
+    def get_image(image_name: str) -> float:
+        start = time.perf_counter()
+        response = requests.get(f"{images_url}/locke_manager/resources/pokemon/{image_name}", timeout=60)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    prober = threading.Thread(target=probe_api)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        image_latencies = list(executor.map(get_image, image_names))
+    elapsed_seconds = time.perf_counter() - start
+    images_done.set()
+    prober.join()
+    return {
+        'image_latencies': image_latencies,
+        'images_per_second': len(image_names) / elapsed_seconds,
+        'probe_latencies': probe_latencies,
+    }
+
+
+def _print_report(results: Dict[str, Dict]):
+    print(f"{'mode':<6}{'images/s':>10}{'image p50 ms':>14}{'image p95 ms':>14}{'API probes':>12}{'API p50 ms':>12}{'API p95 ms':>12}")
+    for mode in MODES:
+        result = results[mode]
+        print(
+            f"{mode:<6}{result['images_per_second']:>10.1f}"
+            f"{_percentile(result['image_latencies'], 0.5):>14.1f}"
+            f"{_percentile(result['image_latencies'], 0.95):>14.1f}"
+            f"{len(result['probe_latencies']):>12}"
+            f"{statistics.median(result['probe_latencies']):>12.1f}"
+            f"{_percentile(result['probe_latencies'], 0.95):>12.1f}"
+        )
+
+
+def main():
+    """Main function to load test the image routes."""
+    parser = argparse.ArgumentParser(description="Compare the API latency while images are served by the Flask app or the async resources app")
+    parser.add_argument("--image-requests", type=int, default=200, help="Number of image requests per mode, every image is requested once")
+    parser.add_argument("--image-concurrency", type=int, default=32, help="Number of concurrent image requests")
+    parser.add_argument("--api-workers", type=int, default=4, help="Number of worker threads of the Flask app")
+    parser.add_argument("--r2-latency-ms", type=float, default=100, help="Latency added to every R2 lookup and download")
+    parser.add_argument("--port", type=int, default=5057, help="First of the three local ports used (moto, Flask, resources app)")
+    args = parser.parse_args()
+
+    os.environ["R2_ENDPOINT_URL"] = _start_moto_server(args.port)
+    os.environ["IMAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="benchmark_image_cache_")
+    os.environ["RESOURCE_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="benchmark_resource_index_"), "resource_index.json")
+    os.environ["ENSURE_INDEXES"] = "false"
+    from core import r2
+    bucket_name = r2.get_bucket_name()
+    client = r2.get_r2_client()
+    client.create_bucket(Bucket=bucket_name)
+
+    # Distinct images per mode, so every request misses the resource index and the image cache
+    image_names = {mode: [f"benchmark_route_{mode}_{index}" for index in range(args.image_requests)] for mode in MODES}
+    for mode in MODES:
+        for image_name in image_names[mode]:
+            client.put_object(Bucket=bucket_name, Key=f"{BENCHMARK_PREFIX}{image_name}.png", Body=os.urandom(IMAGE_SIZE_BYTES), ContentType='image/png')
+
+    _add_r2_latency(args.r2_latency_ms / 1000)
+    api_url = f"http://127.0.0.1:{args.port + 1}"
+    resources_url = f"http://127.0.0.1:{args.port + 2}"
+    _start_api_server(args.port + 1, args.api_workers)
+    _start_resources_server(args.port + 2)
+
+    results = {
+        "wsgi": _run_mode(api_url, api_url, image_names["wsgi"], args.image_concurrency),
+        "asgi": _run_mode(resources_url, api_url, image_names["asgi"], args.image_concurrency),
+    }
+    _print_report(results)
+
+
+if __name__ == "__main__":
+    main()
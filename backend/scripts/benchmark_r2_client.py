@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+R2 Client Benchmark Script
+
+This script measures the R2 overhead of serving one image, the way the resources endpoints
+do it: up to three head_object probes (.jpeg, .jpg, .png) followed by a get_object.
+
+Every image request is played twice:
+- fresh: a new client is created before every R2 call (the behaviour before core/r2.py shared its client)
+- pooled: all calls go through the process-wide client and its kept-alive connections
+
+By default the requests are sent to a local moto server standing in for R2, so no credentials
+or network access are needed. Any other S3 compatible endpoint (e.g. a local MinIO) can be
+used with --endpoint-url, the bucket must then exist and the credentials be set in the environment.
+
+Usage (from the backend directory):
+    pip install 'moto[server]'
+    python -m scripts.benchmark_r2_client [--requests 200] [--threads 1]
+    python -m scripts.benchmark_r2_client --endpoint-url http://localhost:9000
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import r2
+
+BENCHMARK_PREFIX = "pokemendel/resources/pokemons/benchmark_"
+PROBED_EXTENSIONS = ['.jpeg', '.jpg', '.png']
+IMAGE_SIZE_BYTES = 20 * 1024
+
+
+def _start_moto_server(port: int) -> str:
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        print("moto is not installed, run `pip install 'moto[server]'` or pass --endpoint-url")
+        sys.exit(1)
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    os.environ.setdefault("R2_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("R2_SECRET_ACCESS_KEY", "benchmark")
+    return f"http://127.0.0.1:{port}"
+
+
+def _serve_image(image_name: str) -> None:
+    # Same calls as get_pokemon_info followed by the route's download
+    for ext in PROBED_EXTENSIONS:
+        s3_key = f"{BENCHMARK_PREFIX}{image_name}{ext}"
+        if r2.check_file_exists(s3_key):
+            r2.download_file(s3_key)
+            return
+
+
+def _serve_image_with_fresh_clients(image_name: str) -> None:
+    for ext in PROBED_EXTENSIONS:
+        s3_key = f"{BENCHMARK_PREFIX}{image_name}{ext}"
+        r2.reset_r2_client()
+        if r2.check_file_exists(s3_key):
+            r2.reset_r2_client()
+            r2.download_file(s3_key)
+            return
+
+
+def _measure(serve: Callable[[str], None], image_names: List[str], threads: int) -> List[float]:
+    def timed_serve(image_name: str) -> float:
+        start = time.perf_counter()
+        serve(image_name)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed_serve, image_names))
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    sorted_values = sorted(values)
+    index = min(len(sorted_values) - 1, round(percentile * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _print_report(mode: str, latencies: List[float]):
+    print(
+        f"{mode:<10}{len(latencies):>9}"
+        f"{statistics.mean(latencies):>10.2f}"
+        f"{_percentile(latencies, 0.5):>10.2f}"
+        f"{_percentile(latencies, 0.95):>10.2f}"
+    )
+
+
+def main():
+    """Main function to benchmark the R2 client."""
+    parser = argparse.ArgumentParser(description="Compare per-request R2 overhead of fresh and pooled clients")
+    parser.add_argument("--requests", type=int, default=200, help="Number of image requests per mode")
+    parser.add_argument("--threads", type=int, default=1, help="Number of concurrent image requests")
+    parser.add_argument("--images", type=int, default=30, help="Number of distinct images requested")
+    parser.add_argument("--endpoint-url", help="S3 compatible endpoint to use instead of a local moto server")
+    parser.add_argument("--port", type=int, default=5055, help="Port of the local moto server")
+    args = parser.parse_args()
+
+    os.environ["R2_ENDPOINT_URL"] = args.endpoint_url or _start_moto_server(args.port)
+    bucket_name = r2.get_bucket_name()
+    client = r2.get_r2_client()
+    if not args.endpoint_url:
+        client.create_bucket(Bucket=bucket_name)
+
+    # Spread the images over the probed extensions so requests need one to three probes
+    image_names = [f"pokemon{index}" for index in range(args.images)]
+    for index, image_name in enumerate(image_names):
+        ext = PROBED_EXTENSIONS[index % len(PROBED_EXTENSIONS)]
+        client.put_object(Bucket=bucket_name, Key=f"{BENCHMARK_PREFIX}{image_name}{ext}", Body=os.urandom(IMAGE_SIZE_BYTES))
+    requested_images = [image_names[index % len(image_names)] for index in range(args.requests)]
+
+    try:
+        print(f"{'mode':<10}{'requests':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        _print_report("fresh", _measure(_serve_image_with_fresh_clients, requested_images, args.threads))
+        r2.reset_r2_client()
+        _serve_image(image_names[0])  # warm up the pool
+        _print_report("pooled", _measure(_serve_image, requested_images, args.threads))
+    finally:
+        client = r2.get_r2_client()
+        for index, image_name in enumerate(image_names):
+            ext = PROBED_EXTENSIONS[index % len(PROBED_EXTENSIONS)]
+            client.delete_object(Bucket=bucket_name, Key=f"{BENCHMARK_PREFIX}{image_name}{ext}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Resource Streaming Benchmark Script
+
+This script compares the memory used to serve resource images that are not in the image
+cache yet, with concurrent requests:
+- buffered: the whole object is read into memory before it is sent (core.r2.download_file)
+- streamed: the object is sent chunk by chunk while it is written to the image cache
+  (apis.resources.open_resource_image_stream, used by the resource routes)
+
+Every mode runs in its own process, so the reported peak RSS growth only belongs to that mode.
+Objects are served from a local moto server standing in for R2 (or any S3 compatible
+endpoint with --endpoint-url), and the image cache is emptied before every request.
+
+Usage (from the backend directory):
+    pip install 'moto[server]'
+    python -m scripts.benchmark_resource_streaming [--concurrency 16] [--size-mb 4] [--requests 64]
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import statistics
+import tempfile
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmark_r2_client import _start_moto_server, _percentile
+
+BENCHMARK_PREFIX = "pokemendel/resources/pokemons/benchmark_stream_"
+MODES = ["buffered", "streamed"]
+# Bytes a client reads at a time
+CLIENT_READ_SIZE = 64 * 1024
+
+
+def _send(chunks) -> int:
+    # Stand in for the WSGI server writing the response to a socket
+    sent_bytes = 0
+    for chunk in chunks:
+        for offset in range(0, len(chunk), CLIENT_READ_SIZE):
+            sent_bytes += len(chunk[offset:offset + CLIENT_READ_SIZE])
+    return sent_bytes
+
+
+def _serve_buffered(s3_key: str) -> int:
+    from core.r2 import download_file
+    file_data = download_file(s3_key)
+    return _send([file_data])
+
+
+def _serve_streamed(s3_key: str) -> int:
+    from apis.resources import open_resource_image_stream
+    from core.image_cache import get_image_cache
+    get_image_cache().invalidate(s3_key)
+    _, chunks = open_resource_image_stream(s3_key)
+    return _send(chunks)
+
+
+def _run_mode(mode: str, s3_keys: List[str], concurrency: int, results) -> None:
+    serve = _serve_buffered if mode == "buffered" else _serve_streamed
+
+    def timed_serve(s3_key: str) -> float:
+        start = time.perf_counter()
+        serve(s3_key)
+        return (time.perf_counter() - start) * 1000
+
+    from core import r2
+    # Don't share the parent's connections, and keep client creation out of the measured memory
+    r2.reset_r2_client()
+    r2.get_r2_client()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed_serve, s3_keys))
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results[mode] = {'latencies': latencies, 'peak_rss_growth_mb': (peak_kb - baseline_kb) / 1024}
+
+
+def _print_report(results: Dict[str, Dict]):
+    print(f"{'mode':<10}{'requests':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'peak RSS +MB':>14}")
+    for mode in MODES:
+        latencies = results[mode]['latencies']
+        print(
+            f"{mode:<10}{len(latencies):>9}"
+            f"{statistics.mean(latencies):>10.2f}"
+            f"{_percentile(latencies, 0.5):>10.2f}"
+            f"{_percentile(latencies, 0.95):>10.2f}"
+            f"{results[mode]['peak_rss_growth_mb']:>14.1f}"
+        )
+
+
+def main():
+    """Main function to benchmark resource streaming."""
+    parser = argparse.ArgumentParser(description="Compare the memory of buffered and streamed resource downloads")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent requests")
+    parser.add_argument("--requests", type=int, default=64, help="Number of requests per mode")
+    parser.add_argument("--size-mb", type=float, default=4, help="Size of every served object")
+    parser.add_argument("--objects", type=int, default=8, help="Number of distinct objects served")
+    parser.add_argument("--endpoint-url", help="S3 compatible endpoint to use instead of a local moto server")
+    parser.add_argument("--port", type=int, default=5056, help="Port of the local moto server")
+    args = parser.parse_args()
+
+    os.environ["R2_ENDPOINT_URL"] = args.endpoint_url or _start_moto_server(args.port)
+    os.environ["IMAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="benchmark_image_cache_")
+    from core import r2
+    bucket_name = r2.get_bucket_name()
+    client = r2.get_r2_client()
+    if not args.endpoint_url:
+        client.create_bucket(Bucket=bucket_name)
+
+    s3_keys = [f"{BENCHMARK_PREFIX}{index}.png" for index in range(args.objects)]
+    for s3_key in s3_keys:
+        client.put_object(Bucket=bucket_name, Key=s3_key, Body=os.urandom(int(args.size_mb * 1024 * 1024)), ContentType='image/png')
+    requested_keys = [s3_keys[index % len(s3_keys)] for index in range(args.requests)]
+
+    try:
+        # fork keeps the moto server of this process reachable from the mode processes
+        context = multiprocessing.get_context("fork")
+        with context.Manager() as manager:
+            results = manager.dict()
+            for mode in MODES:
+                process = context.Process(target=_run_mode, args=(mode, requested_keys, args.concurrency, results))
+                process.start()
+                process.join()
+            _print_report(dict(results))
+    finally:
+        for s3_key in s3_keys:
+            client.delete_object(Bucket=bucket_name, Key=s3_key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Run Options Benchmark Script
+
+This script measures how long building a run's potential pokemons (runs_pokemons_options) takes
+for every locke and generation, in two modes:
+- walk: every evolution line is walked with fetch_pokemon and the locke's is_pokemon_relevant,
+  like run creation did before the species table
+- table: the options are built from the generation's species table (core/species_table.py)
+  and the locke's relevance_mask
+
+Every locke is measured with every value of its extra info (mono type, color, category, legs),
+and the options of both modes are checked to be the same. Nothing is written to MongoDB.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_run_options [--repeats 20] [--gens 1,2,3,4]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pokemendel_core.data import fetch_pokemon
+from pokemendel_core.utils.definitions.categories import Categories
+from pokemendel_core.utils.definitions.colors import Colors
+from pokemendel_core.utils.definitions.types import get_generation_types
+from pokemendel_core.utils.evolutions import iterate_gen_evolution_lines
+
+from core.locke import Locke
+from core.lockes import get_locke
+from core.lockes.base.base_locke import BaseLocke
+from core.lockes.category.category_locke import CategoryLocke
+from core.lockes.chess.chess_locke import ChessLocke
+from core.lockes.color.color_locke import ColorLocke
+from core.lockes.leg.leg_locke import LegLocke
+from core.lockes.mono.mono_locke import MonoLocke
+from core.lockes.unique.unique_locke import UniqueLocke
+from core.lockes.wed.wed_locke import WedLocke
+from core.lockes.wrap.wrap_locke import WrapLocke
+from core.lockes.category.utils import CATEGORY_TYPE_KEY
+from core.lockes.color.utils import COLOR_TYPE_KEY
+from core.lockes.leg.utils import LEG_TYPE_KEY, NumLegs
+from core.lockes.mono.utils import MONO_TYPE_KEY
+from core.species_table import build_species_table, get_species_table
+
+GENS = [1, 2, 3, 4]
+# The lockes whose run options are built by the base run creator
+PLAIN_LOCKES = [BaseLocke.name, UniqueLocke.name, ChessLocke.name, WrapLocke.name, WedLocke.name]
+
+
+def _locke_cases(gen: int) -> List[Tuple[str, Optional[Dict[str, str]]]]:
+    cases = [(locke_name, None) for locke_name in PLAIN_LOCKES]
+    cases.extend((MonoLocke.name, {MONO_TYPE_KEY: pokemon_type}) for pokemon_type in get_generation_types(gen))
+    cases.extend((ColorLocke.name, {COLOR_TYPE_KEY: color}) for color in Colors.list_all())
+    cases.extend((CategoryLocke.name, {CATEGORY_TYPE_KEY: category}) for category in Categories.list_all())
+    cases.extend((LegLocke.name, {LEG_TYPE_KEY: num_legs}) for num_legs in NumLegs.list_all())
+    return cases
+
+
+def walk_run_options(gen: int, locke: Locke) -> List[Tuple[str, str, int]]:
+    """Build the run options like run creation did before the species table, the reference of the table's options."""
+    options = []
+    stored_pokemons = set()
+    for evolution_line in iterate_gen_evolution_lines(gen, reversed=True):
+        relevant_pokemons = False
+        for pokemon_name in evolution_line:
+            pokemon = fetch_pokemon(pokemon_name, gen)
+            if relevant_pokemons or locke.is_pokemon_relevant(pokemon):
+                if pokemon_name in stored_pokemons:
+                    continue
+                stored_pokemons.add(pokemon_name)
+                options.append((pokemon_name, evolution_line[-1], len(options)))
+                relevant_pokemons = True
+    return options
+
+
+def _table_options(gen: int, locke: Locke) -> List[Tuple[str, str, int]]:
+    species_table = get_species_table(gen)
+    return [
+        (option.pokemon_name, option.base_pokemon, option.index)
+        for option in species_table.run_options(locke.relevance_mask(species_table))
+    ]
+
+
+def _measure(function, repeats: int) -> float:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main():
+    """Main function to benchmark the run options building."""
+    parser = argparse.ArgumentParser(description="Compare building the run options by walking the evolution lines or from the species table")
+    parser.add_argument("--repeats", type=int, default=20, help="Number of measures per locke case, the median is reported")
+    parser.add_argument("--gens", default=",".join(str(gen) for gen in GENS), help="Comma separated generations to benchmark")
+    args = parser.parse_args()
+
+    print(f"{'gen':<5}{'locke':<16}{'cases':>7}{'options':>9}{'walk ms':>10}{'table ms':>10}{'speedup':>9}")
+    for gen in [int(gen) for gen in args.gens.split(",")]:
+        start = time.perf_counter()
+        build_species_table(gen)
+        print(f"Gen {gen} species table built in {(time.perf_counter() - start) * 1000:.1f} ms")
+        get_species_table(gen)
+
+        results: Dict[str, List[Tuple[int, float, float]]] = {}
+        for locke_name, extra_info in _locke_cases(gen):
+            locke = get_locke(locke_name, extra_info)
+            walk_options = walk_run_options(gen, locke)
+            table_options = _table_options(gen, locke)
+            assert walk_options == table_options, f"Gen {gen} {locke_name} {extra_info}: options differ"
+            walk_ms = _measure(lambda: walk_run_options(gen, locke), args.repeats)
+            table_ms = _measure(lambda: _table_options(gen, locke), args.repeats)
+            results.setdefault(locke_name, []).append((len(table_options), walk_ms, table_ms))
+
+        for locke_name, locke_results in results.items():
+            walk_ms = sum(result[1] for result in locke_results)
+            table_ms = sum(result[2] for result in locke_results)
+            print(
+                f"{gen:<5}{locke_name:<16}{len(locke_results):>7}"
+                f"{sum(result[0] for result in locke_results):>9}"
+                f"{walk_ms:>10.2f}{table_ms:>10.2f}{walk_ms / table_ms:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
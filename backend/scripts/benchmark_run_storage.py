@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Run Storage Benchmark Script
+
+This script plays the same run scenario through the Flask app once per run storage mode
+(see models/storage.py) against a local mongod and reports the request latency and the
+number of MongoDB commands sent per request.
+
+The scenario creates a BaseLocke run, chooses a starter and then repeatedly encounters,
+catches and nicknames pokemons while reading the run between every step.
+
+Usage (from the backend directory, with a local mongod running):
+    LOCAL=true python -m scripts.benchmark_run_storage [--encounters 20] [--modes split,embedded]
+
+The benchmark writes to collections prefixed with 'benchmark_' and clears them after every mode.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from collections import defaultdict
+from typing import Dict, List, Callable
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DB_NAME, db_connector
+from models.storage import STORAGE_MODE_ENV, StorageModes
+
+COLLECTIONS_PREFIX = "benchmark_"
+BENCHMARK_LOCKE = "BaseLocke"
+BENCHMARK_GAME = "Blue"
+NICKNAME_ACTION = "Nickname Pokemon"
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Count the MongoDB commands sent while a request is handled."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class _PrefixedDB:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, collection_name):
+        return self._db[f"{COLLECTIONS_PREFIX}{collection_name}"]
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def _patch_collections():
+    original_get_db = db_connector.get_db
+    db_connector.get_db = lambda db_name=None: _PrefixedDB(original_get_db(db_name))
+    return original_get_db
+
+
+def _clear_collections(original_get_db):
+    db = original_get_db(DB_NAME)
+    for collection_name in db.list_collection_names():
+        if collection_name.startswith(COLLECTIONS_PREFIX):
+            db[collection_name].drop()
+
+
+class ScenarioRecorder:
+    """Send requests through the test client and record latency and MongoDB commands per endpoint."""
+
+    def __init__(self, client, command_counter: CommandCounter):
+        self.client = client
+        self.command_counter = command_counter
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.commands: Dict[str, List[int]] = defaultdict(list)
+
+    def request(self, endpoint: str, method: Callable, url: str, **kwargs):
+        self.command_counter.count = 0
+        start = time.perf_counter()
+        response = method(f"/locke_manager/{url}", **kwargs)
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        self.commands[endpoint].append(self.command_counter.count)
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} failed with status {response.status_code}: {response.get_data(as_text=True)}")
+        return response.get_json()
+
+
+def _run_scenario(recorder: ScenarioRecorder, num_encounters: int):
+    client = recorder.client
+    recorder.request("create_run", client.put, "run", json={
+        'run_name': 'BenchmarkRun',
+        'locke_type': BENCHMARK_LOCKE,
+        'duplicate_clause': False,
+        'is_randomized': True,
+    })
+    run_id = recorder.request("continue_run_creation", client.post, "run", json={
+        'run_name': 'BenchmarkRun',
+        'key': 'GAME',
+        'val': BENCHMARK_GAME,
+    })['id']
+
+    starter_name = recorder.request("starter_options", client.get, f"run/{run_id}/starter_options")[0]
+    recorder.request("choose_starter", client.put, f"run/{run_id}/starter", json={'pokemon_name': starter_name})
+
+    run_response = recorder.request("get_run", client.get, f"run/{run_id}")
+    routes = [encounter['route'] for encounter in run_response['run']['encounters'] if not encounter['pokemon']]
+    for route in routes[:num_encounters]:
+        potential_encounters = recorder.request("potential_encounters", client.get, f"run/{run_id}/encounters?route={route}")
+        if not potential_encounters:
+            continue
+        recorder.request("encounter_pokemon", client.put, f"run/{run_id}/encounter/{route}", json={'pokemon_name': potential_encounters[0]})
+        recorder.request("update_encounter", client.post, f"run/{run_id}/encounter/{route}", json={'encounter_status': 'Caught'})
+        run_response = recorder.request("get_run", client.get, f"run/{run_id}")
+        pokemon_id = next(encounter['pokemon'] for encounter in run_response['run']['encounters'] if encounter['route'] == route)
+        recorder.request("next_actions", client.get, f"run/{run_id}/pokemon/{pokemon_id}/actions")
+        recorder.request("execute_action", client.post, f"run/{run_id}/pokemon/{pokemon_id}/action", json={
+            'action': NICKNAME_ACTION,
+            'value': f"Nick{len(recorder.latencies['execute_action'])}",
+        })
+    recorder.request("save_run", client.post, f"run/{run_id}/save")
+    recorder.request("load_run", client.post, f"run/{run_id}/load")
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    sorted_values = sorted(values)
+    index = min(len(sorted_values) - 1, round(percentile * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _print_report(storage_mode: str, recorder: ScenarioRecorder):
+    print(f"\n=== {storage_mode} storage ===")
+    print(f"{'endpoint':<24}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'db cmds':>10}")
+    for endpoint, latencies in recorder.latencies.items():
+        print(
+            f"{endpoint:<24}{len(latencies):>7}"
+            f"{statistics.mean(latencies):>10.2f}"
+            f"{_percentile(latencies, 0.5):>10.2f}"
+            f"{_percentile(latencies, 0.95):>10.2f}"
+            f"{statistics.mean(recorder.commands[endpoint]):>10.1f}"
+        )
+
+
+def main():
+    """Main function to benchmark run storage modes."""
+    parser = argparse.ArgumentParser(description="Compare request latency between run storage modes")
+    parser.add_argument("--encounters", type=int, default=20, help="Number of routes to encounter and catch a pokemon on")
+    parser.add_argument("--modes", default=",".join(StorageModes.list_all()), help="Comma-separated storage modes to benchmark")
+    args = parser.parse_args()
+
+    if os.getenv("LOCAL", "false").lower() not in ("true", "1", "yes"):
+        print("The benchmark writes to the database, run it against a local mongod with LOCAL=true")
+        sys.exit(1)
+
+    # Listeners must be registered before the MongoDB client is created
+    command_counter = CommandCounter()
+    monitoring.register(command_counter)
+
+    from app import app
+    client = app.test_client()
+    original_get_db = _patch_collections()
+
+    for storage_mode in [mode.strip() for mode in args.modes.split(",")]:
+        os.environ[STORAGE_MODE_ENV] = storage_mode
+        _clear_collections(original_get_db)
+        recorder = ScenarioRecorder(client, command_counter)
+        try:
+            _run_scenario(recorder, args.encounters)
+        finally:
+            _clear_collections(original_get_db)
+        _print_report(storage_mode, recorder)
+
+
+if __name__ == "__main__":
+    main()
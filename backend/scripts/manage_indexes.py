@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Index Management Script
+
+This script manages the MongoDB indexes declared in the models' INDEXES registries (see models/indexes.py).
+
+Commands:
+- ensure: create every registered index that does not exist yet (idempotent)
+- list: print the registered indexes per collection
+- report: explain the queries logged by the app and flag the ones that scan a whole collection
+
+To collect queries for the report, run the app (or the e2e tests) with QUERY_SHAPES_LOG=<path>,
+every distinct query shape issued through models/db_helper.py is then appended to that file.
+
+Usage (from the backend directory):
+    python -m scripts.manage_indexes ensure
+    python -m scripts.manage_indexes list
+    python -m scripts.manage_indexes report --queries-log query_shapes.jsonl
+
+Environment Variables:
+    LOCAL - Use local MongoDB when true, otherwise the remote cluster is used
+    MONGODB_PASSWORD - Password for the remote MongoDB cluster
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.indexes import INDEX_REGISTRY, ensure_indexes, report_collection_scans
+from models.query_shapes import load_logged_queries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def ensure_command(args) -> int:
+    for collection_name, index_names in ensure_indexes().items():
+        logger.info(f"{collection_name}: {', '.join(index_names)}")
+    return 0
+
+
+def list_command(args) -> int:
+    for collection_name, index_models in INDEX_REGISTRY.items():
+        index_descriptions = [
+            f"{index_model.document['name']} {dict(index_model.document['key'])}"
+            for index_model in index_models
+        ] or ["_id only"]
+        logger.info(f"{collection_name}: {'; '.join(index_descriptions)}")
+    return 0
+
+
+def report_command(args) -> int:
+    queries = load_logged_queries(args.queries_log)
+    logger.info(f"Explaining {len(queries)} query shapes from {args.queries_log}")
+    query_reports = report_collection_scans(queries)
+    collection_scans = [query_report for query_report in query_reports if query_report['collection_scan']]
+    for query_report in query_reports:
+        level = logging.WARNING if query_report['collection_scan'] else logging.INFO
+        logger.log(level, f"{'COLLSCAN' if query_report['collection_scan'] else 'ok':<8} {query_report['collection']} "
+                          f"{json.dumps(query_report['shape'])} -> {' > '.join(query_report['stages'])}")
+    logger.info(f"{len(collection_scans)} of {len(query_reports)} query shapes scan a whole collection")
+    return 1 if collection_scans and args.fail_on_scan else 0
+
+
+def main():
+    """Main function to manage indexes."""
+    parser = argparse.ArgumentParser(description="Manage the locke_manager MongoDB indexes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("ensure", help="Create the registered indexes").set_defaults(func=ensure_command)
+    subparsers.add_parser("list", help="List the registered indexes").set_defaults(func=list_command)
+    report_parser = subparsers.add_parser("report", help="Flag logged queries that scan a whole collection")
+    report_parser.add_argument("--queries-log", required=True, help="QUERY_SHAPES_LOG file written by the app")
+    report_parser.add_argument("--fail-on-scan", action="store_true", help="Exit with status 1 if any query scans a collection")
+    report_parser.set_defaults(func=report_command)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
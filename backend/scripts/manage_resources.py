@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Resources Management Script
+
+This script manages the resources images (pokemons, gyms and types) stored in R2.
+
+Commands:
+- refresh-index: rebuild the resource index (see core/resource_index.py) from a single listing
+  of the resources prefix, instead of resolving every name with head_object probes
+- show-index: print the resource index counters
+- clear-index: remove all names from the resource index
+- prefetch: download and upload every pokemon, gym leader and type image missing from R2, so
+  requests never have to download them from a google search (see core/resource_prefetch.py)
+- build-derivatives: build and upload the normalized derivatives (see core/image_derivatives.py)
+  of the resources images uploaded without them
+- warm-cache: download the resources images into the local image cache (see core/image_cache.py),
+  so the first requests for them are served without reaching R2
+
+Usage (from the backend directory):
+    python -m scripts.manage_resources refresh-index
+    python -m scripts.manage_resources show-index
+    python -m scripts.manage_resources prefetch [--kinds pokemon,gym,type] [--workers 4] [--retries 2] [--manifest prefetch_manifest.jsonl] [--dry-run]
+    python -m scripts.manage_resources build-derivatives [--prefix pokemons/] [--format webp] [--workers 4]
+    python -m scripts.manage_resources warm-cache [--prefix pokemons/] [--workers 8]
+
+Environment Variables:
+    R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY - R2 credentials
+    R2_BUCKET_NAME - R2 bucket [default: pokemendel]
+    RESOURCE_INDEX_PATH - JSON file of the index [default: <tmp>/locke_manager_resource_index.json]
+    IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES - location and size of the image cache
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.r2 import RESOURCES_PREFIX, DERIVATIVES_PREFIX, list_objects
+from core.image_derivatives import DERIVATIVE_SIZES, DEFAULT_DERIVATIVE_FORMAT, DerivativeFormats, get_derivative_key
+from core.resource_index import get_resource_index, get_resource_name
+from core.image_cache import get_image_cache
+from core.resource_prefetch import (
+    ResourceKinds,
+    PrefetchManifest,
+    list_resource_targets,
+    find_missing_targets,
+    prefetch_resources,
+)
+from apis.resources import get_resource_image_path, prefetch_resource, upload_resource_derivatives
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def refresh_index_command(args) -> int:
+    resource_index = get_resource_index()
+    indexed_resources = resource_index.refresh()
+    logger.info(f"Indexed {indexed_resources} resources in {resource_index.path}")
+    return 0
+
+
+def show_index_command(args) -> int:
+    resource_index = get_resource_index()
+    logger.info(f"{resource_index.path}: {json.dumps(resource_index.stats())}")
+    return 0
+
+
+def clear_index_command(args) -> int:
+    resource_index = get_resource_index()
+    resource_index.clear()
+    logger.info(f"Cleared {resource_index.path}")
+    return 0
+
+
+def prefetch_command(args) -> int:
+    resource_index = get_resource_index()
+    kinds = [kind.strip() for kind in args.kinds.split(",")]
+    invalid_kinds = set(kinds) - set(ResourceKinds.list_all())
+    if invalid_kinds:
+        logger.error(f"Invalid kinds {invalid_kinds}, expected some of {ResourceKinds.list_all()}")
+        return 1
+
+    targets = list_resource_targets(kinds)
+    s3_keys = list_objects(RESOURCES_PREFIX)
+    resource_index.refresh(s3_keys)
+    missing_targets = find_missing_targets(targets, s3_keys, resource_index)
+    manifest = PrefetchManifest(args.manifest)
+    done_names = manifest.load_done()
+    pending_targets = [target for target in missing_targets if target.resource_name not in done_names]
+    logger.info(f"{len(missing_targets)} of {len(targets)} resources are missing from R2, "
+                f"{len(missing_targets) - len(pending_targets)} of them were already prefetched according to {args.manifest}")
+    if args.dry_run:
+        for target in pending_targets:
+            logger.info(f"Would prefetch {target.kind} {target.resource_name}")
+        return 0
+
+    def log_result(result):
+        level = logging.INFO if result.s3_key else logging.WARNING
+        logger.log(level, f"{result.status:<7} {result.target.resource_name} after {result.attempts} attempts: {result.s3_key or result.error}")
+
+    report = prefetch_resources(
+        pending_targets,
+        prefetch_resource,
+        manifest=manifest,
+        workers=args.workers,
+        retries=args.retries,
+        retry_delay_seconds=args.retry_delay,
+        on_result=log_result,
+    )
+    logger.info(f"Prefetched {len(report.results) - len(report.failed)} of {len(report.results)} resources, {len(report.failed)} failed")
+    return 1 if report.failed else 0
+
+
+def build_derivatives_command(args) -> int:
+    s3_keys = [s3_key for s3_key in list_objects(f"{RESOURCES_PREFIX}{args.prefix}") if get_resource_name(s3_key) is not None]
+    derivative_keys = set(list_objects(f"{DERIVATIVES_PREFIX}{args.prefix}"))
+    missing_keys = [
+        s3_key for s3_key in s3_keys
+        if any(get_derivative_key(s3_key, size, args.format) not in derivative_keys for size in DERIVATIVE_SIZES)
+    ]
+    logger.info(f"{len(missing_keys)} of {len(s3_keys)} images are missing {args.format} derivatives")
+
+    def build_derivatives(s3_key: str) -> bool:
+        try:
+            with open(get_resource_image_path(s3_key), 'rb') as image_file:
+                upload_resource_derivatives(s3_key, image_file.read(), args.format)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to build derivatives of {s3_key}: {type(e).__name__}: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        built = list(executor.map(build_derivatives, missing_keys))
+    logger.info(f"Built derivatives of {sum(built)} of {len(missing_keys)} images")
+    return 0 if all(built) else 1
+
+
+def warm_cache_command(args) -> int:
+    image_cache = get_image_cache()
+    s3_keys = [s3_key for s3_key in list_objects(f"{RESOURCES_PREFIX}{args.prefix}") if get_resource_name(s3_key) is not None]
+    missing_keys = [s3_key for s3_key in s3_keys if image_cache.get_content_hash(s3_key) is None]
+    logger.info(f"{len(s3_keys) - len(missing_keys)} of {len(s3_keys)} images are already cached, downloading {len(missing_keys)}")
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        cached_paths = list(executor.map(get_resource_image_path, missing_keys))
+    failed_keys = [s3_key for s3_key, cached_path in zip(missing_keys, cached_paths) if cached_path is None]
+    for s3_key in failed_keys:
+        logger.warning(f"Failed to download {s3_key}")
+    logger.info(f"Image cache: {json.dumps(image_cache.stats())}")
+    return 1 if failed_keys else 0
+
+
+def main():
+    """Main function to manage resources."""
+    parser = argparse.ArgumentParser(description="Manage the locke_manager resources images")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("refresh-index", help="Rebuild the resource index from R2").set_defaults(func=refresh_index_command)
+    subparsers.add_parser("show-index", help="Print the resource index counters").set_defaults(func=show_index_command)
+    subparsers.add_parser("clear-index", help="Remove all names from the resource index").set_defaults(func=clear_index_command)
+    prefetch_parser = subparsers.add_parser("prefetch", help="Download and upload the resources missing from R2")
+    prefetch_parser.add_argument("--kinds", default=",".join(ResourceKinds.list_all()), help="Comma-separated kinds of resources to prefetch")
+    prefetch_parser.add_argument("--workers", type=int, default=4, help="Number of concurrent downloads")
+    prefetch_parser.add_argument("--retries", type=int, default=2, help="Number of retries of a failed resource")
+    prefetch_parser.add_argument("--retry-delay", type=float, default=1.0, help="Seconds before the first retry, doubled on every retry")
+    prefetch_parser.add_argument("--manifest", default="prefetch_manifest.jsonl", help="Manifest of prefetched resources, used to resume")
+    prefetch_parser.add_argument("--dry-run", action="store_true", help="Only print the resources that would be prefetched")
+    prefetch_parser.set_defaults(func=prefetch_command)
+    derivatives_parser = subparsers.add_parser("build-derivatives", help="Build the derivatives of the resources images missing them")
+    derivatives_parser.add_argument("--prefix", default="", help="Only build derivatives of images under this prefix of the resources")
+    derivatives_parser.add_argument("--format", default=DEFAULT_DERIVATIVE_FORMAT, choices=DerivativeFormats.list_all(), help="Format of the derivatives")
+    derivatives_parser.add_argument("--workers", type=int, default=4, help="Number of images processed concurrently")
+    derivatives_parser.set_defaults(func=build_derivatives_command)
+    warm_cache_parser = subparsers.add_parser("warm-cache", help="Download the resources images into the image cache")
+    warm_cache_parser.add_argument("--prefix", default="", help="Only warm images under this prefix of the resources, e.g. pokemons/")
+    warm_cache_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent downloads")
+    warm_cache_parser.set_defaults(func=warm_cache_command)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
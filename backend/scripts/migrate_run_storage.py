@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Run Storage Migration Script
+
+This script converts runs between the two run storage layouts (see models/storage.py):
+- embedded: copy each run's pokemons from the pokemons collections into the run document
+- split: copy each run's embedded pokemons back to the pokemons collections and drop them from the run document
+
+Both the active collections (runs + pokemons) and the save collections (runs_save + pokemons_save) are converted.
+
+Usage (from the backend directory):
+    python -m scripts.migrate_run_storage --to embedded [--run-ids id1,id2] [--dry-run] [--purge]
+    python -m scripts.migrate_run_storage --to split [--run-ids id1,id2] [--dry-run]
+
+Set RUN_STORAGE_MODE to the migrated mode after the migration finished.
+
+Environment Variables:
+    LOCAL - Use local MongoDB when true, otherwise the remote cluster is used
+    MONGODB_PASSWORD - Password for the remote MongoDB cluster
+"""
+
+import os
+import sys
+import argparse
+import logging
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+from pymongo import UpdateOne, ReplaceOne
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DB_NAME
+from models.db_helper import fetch_documents_by_query, bulk_write_documents, delete_documents_by_query
+from models.storage import StorageModes
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# (runs collection, pokemons collection) pairs that are migrated together
+COLLECTION_PAIRS: List[Tuple[str, str]] = [
+    ("runs", "pokemons"),
+    ("runs_save", "pokemons_save"),
+]
+
+
+def _runs_query(run_ids: Optional[List[str]], embedded: bool) -> Dict:
+    query = {'pokemons': {'$exists': embedded}}
+    if run_ids:
+        query['_id'] = {'$in': run_ids}
+    return query
+
+
+def embed_runs(runs_collection: str, pokemons_collection: str, run_ids: Optional[List[str]], dry_run: bool, purge: bool) -> int:
+    """Embed the pokemons of every split run in the given runs collection.
+
+    Returns:
+        int: Number of migrated runs
+    """
+    split_run_ids = [run['_id'] for run in fetch_documents_by_query(DB_NAME, runs_collection, _runs_query(run_ids, embedded=False), keys={'_id'})]
+    if not split_run_ids:
+        logger.info(f"No split runs to embed in {runs_collection}")
+        return 0
+
+    run_pokemons = defaultdict(dict)
+    for pokemon_document in fetch_documents_by_query(DB_NAME, pokemons_collection, {'run_id': {'$in': split_run_ids}}):
+        run_pokemons[pokemon_document['run_id']][pokemon_document['_id']] = pokemon_document
+
+    logger.info(f"Embedding {sum(len(pokemons) for pokemons in run_pokemons.values())} pokemons from {pokemons_collection} into {len(split_run_ids)} runs of {runs_collection}")
+    if dry_run:
+        return len(split_run_ids)
+
+    bulk_write_documents(DB_NAME, runs_collection, [
+        UpdateOne({'_id': run_id}, {'$set': {'pokemons': run_pokemons[run_id]}})
+        for run_id in split_run_ids
+    ])
+    if purge:
+        deleted_count = delete_documents_by_query(DB_NAME, pokemons_collection, {'run_id': {'$in': split_run_ids}})
+        logger.info(f"Purged {deleted_count} pokemons from {pokemons_collection}")
+    return len(split_run_ids)
+
+
+def split_runs(runs_collection: str, pokemons_collection: str, run_ids: Optional[List[str]], dry_run: bool) -> int:
+    """Move the embedded pokemons of every embedded run in the given runs collection to the pokemons collection.
+
+    Returns:
+        int: Number of migrated runs
+    """
+    embedded_runs = list(fetch_documents_by_query(DB_NAME, runs_collection, _runs_query(run_ids, embedded=True), keys={'_id', 'pokemons'}))
+    if not embedded_runs:
+        logger.info(f"No embedded runs to split in {runs_collection}")
+        return 0
+
+    pokemon_operations = [
+        ReplaceOne({'_id': pokemon_id}, {**pokemon_document, '_id': pokemon_id, 'run_id': run['_id']}, upsert=True)
+        for run in embedded_runs
+        for pokemon_id, pokemon_document in run['pokemons'].items()
+    ]
+    logger.info(f"Splitting {len(pokemon_operations)} pokemons from {len(embedded_runs)} runs of {runs_collection} into {pokemons_collection}")
+    if dry_run:
+        return len(embedded_runs)
+
+    bulk_write_documents(DB_NAME, pokemons_collection, pokemon_operations)
+    bulk_write_documents(DB_NAME, runs_collection, [
+        UpdateOne({'_id': run['_id']}, {'$unset': {'pokemons': ''}})
+        for run in embedded_runs
+    ])
+    return len(embedded_runs)
+
+
+def main():
+    """Main function to migrate run storage."""
+    parser = argparse.ArgumentParser(description="Convert runs between split and embedded storage")
+    parser.add_argument("--to", required=True, choices=StorageModes.list_all(), help="Storage mode to migrate to")
+    parser.add_argument("--run-ids", help="Comma-separated list of run ids to migrate (default: all runs)")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be migrated without writing")
+    parser.add_argument("--purge", action="store_true", help="Delete the pokemons collections documents after embedding them")
+    args = parser.parse_args()
+
+    run_ids = [run_id.strip() for run_id in args.run_ids.split(",")] if args.run_ids else None
+    if args.purge and args.to != StorageModes.EMBEDDED:
+        parser.error("--purge is only supported when migrating to embedded storage")
+
+    migrated_runs = 0
+    for runs_collection, pokemons_collection in COLLECTION_PAIRS:
+        if args.to == StorageModes.EMBEDDED:
+            migrated_runs += embed_runs(runs_collection, pokemons_collection, run_ids, args.dry_run, args.purge)
+        else:
+            migrated_runs += split_runs(runs_collection, pokemons_collection, run_ids, args.dry_run)
+
+    action = "Would migrate" if args.dry_run else "Migrated"
+    logger.info(f"{action} {migrated_runs} run documents to {args.to} storage")
+    if not args.dry_run:
+        logger.info(f"Set RUN_STORAGE_MODE={args.to} to use the migrated layout")
+
+
+if __name__ == "__main__":
+    main()
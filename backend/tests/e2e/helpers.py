@@ -146,6 +146,13 @@ def get_next_actions(client, run_id: str, pokemon_id: str) -> list:
     return next_actions
 
 
+def get_all_next_actions(client, run_id: str) -> dict:
+    response = client.get("/locke_manager/run/" + run_id + "/actions")
+    assert response.status_code == 200
+    pokemons_next_actions = response.get_json()
+    return pokemons_next_actions
+
+
 def get_action_options(client, run_id: str, pokemon_id: str, action: str) -> list:
     response = client.get("/locke_manager/run/" + run_id + "/pokemon/" + pokemon_id + "/action?action=" + action)
     assert response.status_code == 200
@@ -161,6 +168,16 @@ def execute_action(client, run_id: str, pokemon_id: str, action: str, value: str
     assert response.status_code == 200
 
 
+def execute_actions(client, run_id: str, actions: list, expected_status_code: int = 200):
+    response = client.post("/locke_manager/run/" + run_id + "/actions", json={
+        'actions': [
+            {'pokemon_id': pokemon_id, 'action': action, 'value': value}
+            for pokemon_id, action, value in actions
+        ],
+    })
+    assert response.status_code == expected_status_code, f"Expected status code {expected_status_code}, but got {response.status_code}"
+
+
 def save_run(client, run_id):
     response = client.post('/locke_manager/run/' + run_id + '/save')
     assert response.status_code == 200
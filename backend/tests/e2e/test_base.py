@@ -29,8 +29,10 @@ from tests.e2e.helpers import (
     encounter_pokemon,
     update_encounter,
     get_next_actions,
+    get_all_next_actions,
     get_action_options,
     execute_action,
+    execute_actions,
     win_battle,
     finish_run,
     assert_run,
@@ -176,6 +178,29 @@ def test_base_gen2(client_fixture):
     rattata_id = _catch_pokemon1_gen2(client_fixture, run_id)
 
 
+def test_base_batched_actions(client_fixture):
+    run_id = _create_run(client_fixture, GEN2_GAME_NAME, GEN2_NUM_POKEMONS, gen=2, num_gyms=13, num_encounters=GEN2_NUM_ENCOUNTERS)
+    choose_starter(client_fixture, run_id, PokemonGen2.TOTODILE, PokemonGen2.TOTODILE)
+    starter_id = get_run(client_fixture, run_id)['run']['starter']
+    assert get_next_actions(client_fixture, run_id, starter_id) == ["Nickname Pokemon"]
+
+    # Gender is only relevant after nickname, so the whole batch is rejected and nothing is persisted
+    execute_actions(client_fixture, run_id, [
+        (starter_id, "Gender", "Male"),
+        (starter_id, "Nickname Pokemon", "Tommy"),
+    ], expected_status_code=500)
+    assert_pokemon(get_run(client_fixture, run_id), starter_id, PokemonGen2.TOTODILE)
+
+    execute_actions(client_fixture, run_id, [
+        (starter_id, "Nickname Pokemon", "Tommy"),
+        (starter_id, "Gender", "Male"),
+    ])
+    run_response = get_run(client_fixture, run_id)
+    assert_pokemon(run_response, starter_id, PokemonGen2.TOTODILE, nickname="Tommy", gender="Male")
+    assert get_next_actions(client_fixture, run_id, starter_id) == ['Evolve Pokemon', "Kill Pokemon"]
+    assert get_all_next_actions(client_fixture, run_id) == {starter_id: ['Evolve Pokemon', "Kill Pokemon"]}
+
+
 def _choose_starter(client_fixture, run_id, expected_starter_options, starter_name, num_encounters, nickname, gender=None):
     starter_options = get_starter_options(client_fixture, run_id)
     assert set(starter_options) == expected_starter_options
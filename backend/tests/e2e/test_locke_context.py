@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+import threading
+from pokemendel_core.data import fetch_pokemon
+from pokemendel_core.data.gen1 import PokemonGen1
+from pokemendel_core.utils.definitions.types import Types
+from app import app
+from core.lockes import LOCKE_INSTANCES, get_locke
+from core.lockes.genlocke.gen_locke import GenLocke
+from core.lockes.genlocke.utils import SELECTED_LOCKE
+from core.lockes.mono.mono_locke import MonoLocke
+from core.lockes.mono.utils import MONO_TYPE_KEY
+from tests.e2e.gen1_helpers import GAME_NAME as GEN1_GAME_NAME
+from tests.e2e.helpers import client_fixture
+
+NUM_THREADS = 8
+NUM_REQUESTS = 20
+
+
+def test_shared_lockes_are_immutable():
+    shared_locke = LOCKE_INSTANCES[MonoLocke.name]
+    fire_locke = get_locke(MonoLocke.name, {MONO_TYPE_KEY: Types.FIRE})
+    assert fire_locke is not shared_locke
+    assert fire_locke.extra_info == {MONO_TYPE_KEY: Types.FIRE}
+    assert shared_locke.extra_info is None
+    try:
+        shared_locke.extra_info = {MONO_TYPE_KEY: Types.WATER}
+        assert False, "Shared locke extra_info should not be assignable"
+    except FrozenInstanceError:
+        pass
+
+
+def test_genlocke_binds_its_extra_info_to_inner_locke():
+    gen_locke = get_locke(GenLocke.name, {SELECTED_LOCKE: MonoLocke.name, MONO_TYPE_KEY: Types.FIRE})
+    charmander = fetch_pokemon(PokemonGen1.CHARMANDER, 1)
+    squirtle = fetch_pokemon(PokemonGen1.SQUIRTLE, 1)
+    assert gen_locke.is_pokemon_relevant(charmander)
+    assert not gen_locke.is_pokemon_relevant(squirtle)
+    assert any(Types.FIRE in rule for rule in gen_locke.rules())
+
+
+def _create_mono_run(client, run_name: str, mono_type: str) -> str:
+    response = client.put('/locke_manager/run', json={
+        'run_name': run_name,
+        'locke_type': MonoLocke.name,
+        'duplicate_clause': True,
+        'is_randomized': False,
+    })
+    assert response.status_code == 200
+    for key, val in [(None, None), ('GAME', GEN1_GAME_NAME), (MONO_TYPE_KEY, mono_type)]:
+        response = client.post('/locke_manager/run', json={'run_name': run_name, 'key': key, 'val': val})
+        assert response.status_code == 200
+    run_id = response.get_json()['id']
+    starter_options = client.get('/locke_manager/run/' + run_id + '/starter_options').get_json()
+    response = client.put('/locke_manager/run/' + run_id + '/starter', json={'pokemon_name': starter_options[0]})
+    assert response.status_code == 200
+    return run_id
+
+
+def test_concurrent_requests_keep_their_run_locke(client_fixture):
+    run_types = {
+        _create_mono_run(client_fixture, 'FireRun', Types.FIRE): Types.FIRE,
+        _create_mono_run(client_fixture, 'WaterRun', Types.WATER): Types.WATER,
+    }
+    expected_actions = {
+        run_id: client_fixture.get('/locke_manager/run/' + run_id + '/actions').get_json()
+        for run_id in run_types
+    }
+    run_ids = list(run_types)
+    barrier = threading.Barrier(NUM_THREADS)
+
+    def get_run_responses(thread_index: int):
+        client = app.test_client()
+        run_id = run_ids[thread_index % 2]
+        barrier.wait()
+        responses = []
+        for _ in range(NUM_REQUESTS):
+            run_response = client.get('/locke_manager/run/' + run_id)
+            actions_response = client.get('/locke_manager/run/' + run_id + '/actions')
+            assert run_response.status_code == 200
+            assert actions_response.status_code == 200
+            responses.append((run_id, run_response.get_json()['run']['rules'], actions_response.get_json()))
+        return responses
+
+    with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        threads_responses = list(executor.map(get_run_responses, range(NUM_THREADS)))
+    for thread_responses in threads_responses:
+        for run_id, rules, actions in thread_responses:
+            other_type = Types.WATER if run_types[run_id] == Types.FIRE else Types.FIRE
+            assert any(run_types[run_id] in rule for rule in rules)
+            assert not any(other_type in rule for rule in rules)
+            assert actions == expected_actions[run_id]
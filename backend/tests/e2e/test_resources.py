@@ -0,0 +1,294 @@
+import asyncio
+import io
+import socket
+import threading
+import time
+import zipfile
+import pytest
+from PIL import Image
+from core import r2
+from core import resource_index
+from core import image_cache
+from core.resource_prefetch import (
+    ResourceKinds,
+    ResourceTarget,
+    PrefetchManifest,
+    PrefetchStatuses,
+    find_missing_targets,
+    prefetch_resources,
+)
+from core.image_derivatives import DEFAULT_DERIVATIVE_FORMAT, DerivativeFormats
+from core.sprite_atlas import SpriteBundles
+import apis.resources as resources_api
+import resources_app
+
+moto_server = pytest.importorskip("moto.server")
+
+BUCKET_NAME = "pokemendel"
+PIKACHU = ResourceTarget(ResourceKinds.POKEMON, "pokemons/pikachu", ("Pikachu",))
+MISSINGNO = ResourceTarget(ResourceKinds.POKEMON, "pokemons/missingno", ("Missingno",))
+FIRE = ResourceTarget(ResourceKinds.TYPE, "types/fire", ("Fire",))
+
+
+@pytest.fixture
+def local_r2(monkeypatch, tmp_path):
+    """Point the R2 client at a local moto server and stub the google search downloads."""
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    monkeypatch.setenv("R2_ENDPOINT_URL", f"http://127.0.0.1:{port}")
+    monkeypatch.setenv("R2_ACCESS_KEY_ID", "e2e")
+    monkeypatch.setenv("R2_SECRET_ACCESS_KEY", "e2e")
+    monkeypatch.setenv("R2_BUCKET_NAME", BUCKET_NAME)
+    monkeypatch.setenv("RESOURCE_INDEX_PATH", str(tmp_path / "resource_index.json"))
+    monkeypatch.setenv("IMAGE_CACHE_DIR", str(tmp_path / "image_cache"))
+    monkeypatch.setattr(resource_index, "_resource_index", None)
+    monkeypatch.setattr(image_cache, "_image_cache", None)
+    r2.reset_r2_client()
+    r2.get_r2_client().create_bucket(Bucket=BUCKET_NAME)
+
+    downloads = []
+
+    def download_pokemon(pokemon_name, resources_path, form=None, force=False):
+        downloads.append(pokemon_name)
+        time.sleep(0.2)
+        if pokemon_name == "Missingno":
+            return None
+        local_path = tmp_path / f"{pokemon_name.lower()}.png"
+        Image.new('RGBA', (300, 200), (255, 220, 0, 255)).save(local_path, format='PNG')
+        return str(local_path)
+
+    monkeypatch.setattr(resources_api, "download_pokemon_from_google_search", download_pokemon)
+    yield downloads
+    r2.reset_r2_client()
+    server.stop()
+
+
+def test_prefetch_missing_resources(local_r2, tmp_path):
+    downloads = local_r2
+    r2.get_r2_client().put_object(Bucket=BUCKET_NAME, Key="pokemendel/resources/types/fire.png", Body=b"type image")
+
+    targets = [PIKACHU, MISSINGNO, FIRE]
+    missing_targets = find_missing_targets(targets, r2.list_objects(r2.RESOURCES_PREFIX))
+    assert missing_targets == [PIKACHU, MISSINGNO]
+
+    manifest = PrefetchManifest(str(tmp_path / "manifest.jsonl"))
+    report = prefetch_resources(missing_targets, resources_api.prefetch_resource, manifest=manifest, retries=1, retry_delay_seconds=0)
+    results = {result.target: result for result in report.results}
+    assert results[PIKACHU].status == PrefetchStatuses.DONE
+    assert results[PIKACHU].s3_key == "pokemendel/resources/pokemons/pikachu.png"
+    assert results[MISSINGNO].status == PrefetchStatuses.FAILED
+    assert results[MISSINGNO].attempts == 2
+    assert r2.check_file_exists("pokemendel/resources/pokemons/pikachu.png")
+    assert sorted(downloads) == ["Missingno", "Missingno", "Pikachu"]
+
+    # A resumed prefetch skips the done resources and retries the failed ones
+    report = prefetch_resources(missing_targets, resources_api.prefetch_resource, manifest=manifest, retries=0, retry_delay_seconds=0)
+    assert report.skipped == [PIKACHU]
+    assert [result.target for result in report.failed] == [MISSINGNO]
+    assert sorted(downloads) == ["Missingno", "Missingno", "Missingno", "Pikachu"]
+
+
+def test_concurrent_misses_share_one_download(local_r2):
+    downloads = local_r2
+    barrier = threading.Barrier(5)
+    image_paths = []
+
+    def request_image():
+        barrier.wait()
+        image_paths.append(resources_api.get_pokemon_info("Pikachu"))
+
+    threads = [threading.Thread(target=request_image) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert image_paths == ["pokemendel/resources/pokemons/pikachu.png"] * 5
+    assert downloads == ["Pikachu"]
+
+
+def test_failed_forced_download_keeps_the_stored_image(local_r2, monkeypatch):
+    assert resources_api.get_pokemon_info("Pikachu") == "pokemendel/resources/pokemons/pikachu.png"
+    monkeypatch.setattr(resources_api, "download_pokemon_from_google_search", lambda *args, **kwargs: None)
+    assert resources_api.get_pokemon_info("Pikachu", force=True) is None
+    assert resources_api.get_pokemon_info("Pikachu") == "pokemendel/resources/pokemons/pikachu.png"
+
+
+
+def test_forced_download_refreshes_the_derivatives(local_r2, monkeypatch, tmp_path):
+    s3_key = resources_api.get_pokemon_info("Pikachu")
+    other_format = next(image_format for image_format in DerivativeFormats.list_all() if image_format != DEFAULT_DERIVATIVE_FORMAT)
+    derivative_key = resources_api.get_resource_derivative(s3_key, 64)
+    other_derivative_key = resources_api.get_resource_derivative(s3_key, 64, other_format)
+    cached_hashes = {}
+    for key in (s3_key, derivative_key, other_derivative_key):
+        assert resources_api.get_resource_image_path(key) is not None
+        cached_hashes[key] = image_cache.get_image_cache().get_content_hash(key)
+
+    def download_new_pokemon(pokemon_name, resources_path, form=None, force=False):
+        local_path = tmp_path / "pikachu.png"
+        Image.new('RGBA', (300, 200), (255, 0, 0, 255)).save(local_path, format='PNG')
+        return str(local_path)
+
+    monkeypatch.setattr(resources_api, "download_pokemon_from_google_search", download_new_pokemon)
+    assert resources_api.get_pokemon_info("Pikachu", force=True) == s3_key
+    assert not r2.check_file_exists(other_derivative_key)
+    for key in (s3_key, derivative_key, other_derivative_key):
+        assert image_cache.get_image_cache().get_content_hash(key) is None
+    assert resources_api.get_resource_derivative(s3_key, 64, other_format) == other_derivative_key
+    for key in (s3_key, derivative_key, other_derivative_key):
+        assert resources_api.get_resource_image_path(key) is not None
+        assert image_cache.get_image_cache().get_content_hash(key) != cached_hashes[key]
+
+def test_pokemon_sprites_bundle(local_r2):
+    atlas_bundle, missing_pokemons = resources_api.get_pokemon_sprites_bundle(["Pikachu", "Missingno", "Pikachu"], 64, "png")
+    assert missing_pokemons == ["Missingno"]
+    assert atlas_bundle['frames'] == {"Pikachu": {'x': 0, 'y': 10, 'width': 64, 'height': 43}}
+    assert atlas_bundle['atlas'].startswith("data:image/png;base64,")
+    assert r2.check_file_exists("pokemendel/derivatives/pokemons/pikachu/64.png")
+
+    zip_bundle, missing_pokemons = resources_api.get_pokemon_sprites_bundle(["Pikachu"], 128, "png", SpriteBundles.ZIP)
+    assert missing_pokemons == []
+    with zipfile.ZipFile(io.BytesIO(zip_bundle)) as bundle:
+        with Image.open(io.BytesIO(bundle.read("Pikachu.png"))) as sprite:
+            assert sprite.size == (128, 85)
+
+
+
+def test_pokemon_sprites_bundle_of_local_images(local_r2, monkeypatch):
+    def failing_upload(local_path, s3_key):
+        raise ConnectionError("R2 is unreachable")
+
+    # Images that failed to upload are served from their local file
+    monkeypatch.setattr(resources_api, "upload_file", failing_upload)
+    zip_bundle, missing_pokemons = resources_api.get_pokemon_sprites_bundle(["Pikachu"], 128, DEFAULT_DERIVATIVE_FORMAT, SpriteBundles.ZIP)
+    assert missing_pokemons == []
+    with zipfile.ZipFile(io.BytesIO(zip_bundle)) as bundle:
+        with Image.open(io.BytesIO(bundle.read(f"Pikachu.{DEFAULT_DERIVATIVE_FORMAT}"))) as sprite:
+            assert sprite.size == (128, 85)
+            assert sprite.format.lower() == DEFAULT_DERIVATIVE_FORMAT
+
+
+def test_image_cache_only_scans_when_full(tmp_path, monkeypatch):
+    cache = image_cache.ImageCache(str(tmp_path), max_bytes=250)
+    scans = []
+    list_blobs = cache._list_blobs
+    monkeypatch.setattr(cache, "_list_blobs", lambda: scans.append(1) or list_blobs())
+    cache.put("first", b"1" * 100)
+    cache.put("second", b"2" * 100)
+    assert scans == []
+    cache.put("third", b"3" * 100)
+    assert len(scans) == 1
+    assert cache.get_path("first") is None
+    assert cache.stats()['images'] == 2
+    assert cache.stats()['bytes'] == 200
+
+
+def _get_from_resources_app(path, headers=()):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': list(headers)}
+    asyncio.run(resources_app.app(scope, receive, send))
+    response_headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+    return messages[0]['status'], response_headers, b"".join(message.get('body', b'') for message in messages[1:])
+
+
+def test_resources_app_serves_images(local_r2):
+    status, headers, body = _get_from_resources_app("/locke_manager/resources/pokemon/pikachu.png")
+    assert status == 200
+    assert headers['content-type'] == 'image/png'
+    # Streamed from R2 without an ETag, so it must be revalidated
+    assert headers['cache-control'] == 'public, max-age=0, no-cache'
+    assert 'etag' not in headers
+    with Image.open(io.BytesIO(body)) as image:
+        assert image.size == (300, 200)
+
+    # The image is cached now, so it has an ETag to revalidate
+    status, headers, body = _get_from_resources_app("/locke_manager/resources/pokemon/pikachu.png")
+    assert status == 200
+    etag = headers['etag']
+    status, _, body = _get_from_resources_app("/locke_manager/resources/pokemon/pikachu.png", [(b'if-none-match', etag.encode())])
+    assert status == 304
+    assert body == b''
+
+    status, _, _ = _get_from_resources_app("/locke_manager/resources/pokemon/missingno.png")
+    assert status == 404
+
+
+def test_evicted_cached_image_is_streamed_from_r2(local_r2, monkeypatch, tmp_path):
+    import app as flask_app
+    resources_api.get_pokemon_info("Pikachu")
+    # Another request evicts the cached image between its lookup and its opening
+    evicted_path = str(tmp_path / "evicted.png")
+    monkeypatch.setattr(resources_api, "get_cached_resource_image_path", lambda s3_key: evicted_path)
+
+    response = flask_app.app.test_client().get("/locke_manager/resources/pokemon/pikachu.png")
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+    with Image.open(io.BytesIO(response.data)) as image:
+        assert image.size == (300, 200)
+
+    status, _, body = _get_from_resources_app("/locke_manager/resources/pokemon/pikachu.png")
+    assert status == 200
+    with Image.open(io.BytesIO(body)) as image:
+        assert image.size == (300, 200)
+
+
+def test_flask_image_revalidations(local_r2):
+    import app as flask_app
+    client = flask_app.app.test_client()
+    path = "/locke_manager/resources/pokemon/pikachu.png"
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_etag() == (None, None)
+    # Reading the streamed body fills the image cache
+    assert response.get_data()
+
+    # The image is cached now, so it has validators
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.cache_control.max_age == resources_api.RESOURCE_MAX_AGE_SECONDS
+    etag, _ = response.get_etag()
+    last_modified = response.headers['Last-Modified']
+    response = client.get(path, headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.get_etag() == (etag, False)
+    assert client.get(path, headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(path, headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'}).status_code == 200
+    # If-Modified-Since is ignored when If-None-Match is sent
+    assert client.get(path, headers={'If-None-Match': '"other"', 'If-Modified-Since': last_modified}).status_code == 200
+
+    # A forced refresh is streamed from R2 and must not be reused by browsers
+    response = client.get(path + "?force=true", headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.cache_control.max_age == 0
+    assert response.cache_control.no_cache
+
+
+def test_flask_image_streams(local_r2):
+    import app as flask_app
+    client = flask_app.app.test_client()
+    # Streamed images are sent with the content type stored in R2, not the one of their extension
+    r2.get_r2_client().put_object(Bucket=BUCKET_NAME, Key="pokemendel/resources/types/fire.png", Body=b"type image", ContentType="image/webp")
+    response = client.get("/locke_manager/resources/types/fire")
+    assert response.status_code == 200
+    assert response.mimetype == "image/webp"
+    assert response.get_data() == b"type image"
+
+    response = client.get("/locke_manager/resources/types/fire", headers={'Range': 'bytes=0-3'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 0-3/10'
+    assert response.get_data() == b"type"
+
+    response = client.get("/locke_manager/resources/types/fire", headers={'Range': 'bytes=100-200'})
+    assert response.status_code == 416
+    assert response.get_json()['status'] == 'error'
@@ -0,0 +1,59 @@
+from models.cache import FileCacheBackend, MemoryCacheBackend, RunScopedCache
+from models.db_helper import update_documents_by_query
+from tests.e2e.gen1_helpers import GAME_NAME as GEN1_GAME_NAME
+from tests.e2e.helpers import (
+    client_fixture,
+    start_locke_creation,
+    continue_locke_creation_not_finished,
+    continue_locke_creation_finished,
+)
+
+
+def test_duplicate_clause_sees_catches_of_other_workers(client_fixture):
+    start_locke_creation(client_fixture, "BaseLocke", GEN1_GAME_NAME, True, False)
+    continue_locke_creation_not_finished(client_fixture, None, None, 'GAME', GEN1_GAME_NAME)
+    run_id = continue_locke_creation_finished(client_fixture, 'GAME', GEN1_GAME_NAME)
+    response = client_fixture.get('/locke_manager/run/' + run_id + '/encounters')
+    assert response.status_code == 200
+    caught_pokemon = response.get_json()[0]
+
+    # Another worker marks the pokemon caught, this worker's options cache is not invalidated
+    update_documents_by_query(
+        "locke_manager", "runs_pokemons_options",
+        {'run_id': run_id, 'pokemon_name': caught_pokemon}, {'$set': {'caught': True}},
+    )
+    response = client_fixture.get('/locke_manager/run/' + run_id + '/encounters')
+    assert response.status_code == 200
+    assert caught_pokemon not in response.get_json()
+
+
+def test_file_cache_invalidations_are_shared_by_workers(tmp_path):
+    worker1_cache = RunScopedCache("e2e_worker1", FileCacheBackend(str(tmp_path)))
+    worker2_cache = RunScopedCache("e2e_worker2", FileCacheBackend(str(tmp_path)))
+    assert worker1_cache.get_or_load('run', lambda: 'loaded by worker1') == 'loaded by worker1'
+    assert worker2_cache.get_or_load('run', lambda: 'loaded by worker2') == 'loaded by worker1'
+
+    worker2_cache.invalidate('run')
+    assert worker1_cache.get_or_load('run', lambda: 'reloaded') == 'reloaded'
+
+    def load_while_other_worker_writes():
+        worker2_cache.invalidate('racing_run')
+        return 'pre-write value'
+
+    assert worker1_cache.get_or_load('racing_run', load_while_other_worker_writes) == 'pre-write value'
+    assert worker1_cache.get_or_load('racing_run', lambda: 'post-write value') == 'post-write value'
+
+
+def test_memory_cache_drops_old_generations(monkeypatch):
+    backend = MemoryCacheBackend(ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr("models.cache.time.monotonic", lambda: now[0])
+    for run_index in range(100):
+        backend.bump_generation(f"run{run_index}")
+    assert backend.generation("run0") == 1
+
+    now[0] += 11
+    backend.bump_generation("run0")
+    assert backend.generation("run0") == 2
+    assert backend.generation("run99") == 0
+    assert len(backend._generations) == 1
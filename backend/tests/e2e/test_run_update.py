@@ -0,0 +1,115 @@
+import copy
+from models.run import build_run_update
+
+
+PERSISTED_DOCUMENT = {
+    "_id": "run1",
+    "name": "TestRun",
+    "restarts": 0,
+    "party": ["pokemon1"],
+    "box": ["pokemon1", "pokemon2"],
+    "battles": [{"rival": "Brock", "won": False}, {"rival": "Misty", "won": False}],
+    "encounters": [
+        {"route": "Route 1", "pokemon": "Pidgey", "status": "Met"},
+        {"route": "Route 2", "pokemon": "Caterpie", "status": "Caught"},
+    ],
+    "pokemons": {
+        "pokemon1": {"name": "Charmander"},
+        "pokemon2": {"name": "Caterpie"},
+    },
+}
+
+
+def _run_document():
+    return copy.deepcopy(PERSISTED_DOCUMENT)
+
+
+def test_unchanged_run_has_no_update():
+    assert build_run_update(PERSISTED_DOCUMENT, _run_document()) == ({}, [])
+
+
+def test_scalar_fields_are_set():
+    run_document = _run_document()
+    run_document["restarts"] = 1
+    run_document["party"] = ["pokemon1", "pokemon2"]
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == (
+        {"$set": {"restarts": 1, "party": ["pokemon1", "pokemon2"]}}, []
+    )
+
+
+def test_appended_box_pokemons_are_pushed():
+    run_document = _run_document()
+    run_document["box"].append("pokemon3")
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == (
+        {"$push": {"box": {"$each": ["pokemon3"]}}}, []
+    )
+
+
+def test_reordered_box_is_set():
+    run_document = _run_document()
+    run_document["box"] = ["pokemon2", "pokemon1"]
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == ({"$set": {"box": ["pokemon2", "pokemon1"]}}, [])
+
+
+def test_changed_encounters_are_set_by_route():
+    run_document = _run_document()
+    run_document["encounters"][0]["status"] = "Caught"
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == (
+        {"$set": {"encounters.$[encounter0]": run_document["encounters"][0]}},
+        [{"encounter0.route": "Route 1"}],
+    )
+
+
+def test_new_encounters_are_pushed():
+    run_document = _run_document()
+    new_encounter = {"route": "Route 3", "pokemon": "Spearow", "status": "Met"}
+    run_document["encounters"].append(new_encounter)
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == (
+        {"$push": {"encounters": {"$each": [new_encounter]}}}, []
+    )
+
+
+def test_changed_and_new_encounters_set_all_encounters():
+    run_document = _run_document()
+    run_document["encounters"][0]["status"] = "Caught"
+    run_document["encounters"].append({"route": "Route 3", "pokemon": "Spearow", "status": "Met"})
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == ({"$set": {"encounters": run_document["encounters"]}}, [])
+
+
+def test_removed_encounters_set_all_encounters():
+    run_document = _run_document()
+    run_document["encounters"].pop()
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == ({"$set": {"encounters": run_document["encounters"]}}, [])
+
+
+def test_won_battles_are_set_by_position():
+    run_document = _run_document()
+    run_document["battles"][1]["won"] = True
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == ({"$set": {"battles.1.won": True}}, [])
+
+
+def test_changed_battles_layout_sets_all_battles():
+    run_document = _run_document()
+    run_document["battles"].append({"rival": "Surge", "won": False})
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == ({"$set": {"battles": run_document["battles"]}}, [])
+
+
+def test_embedded_pokemons_are_set_and_unset_by_id():
+    run_document = _run_document()
+    run_document["pokemons"]["pokemon1"] = {"name": "Charmeleon"}
+    run_document["pokemons"]["pokemon3"] = {"name": "Pidgey"}
+    del run_document["pokemons"]["pokemon2"]
+    assert build_run_update(PERSISTED_DOCUMENT, run_document) == (
+        {
+            "$set": {"pokemons.pokemon1": {"name": "Charmeleon"}, "pokemons.pokemon3": {"name": "Pidgey"}},
+            "$unset": {"pokemons.pokemon2": ""},
+        },
+        [],
+    )
+
+
+def test_first_embedded_pokemons_are_set_whole():
+    persisted_document = _run_document()
+    del persisted_document["pokemons"]
+    run_document = _run_document()
+    assert build_run_update(persisted_document, run_document) == ({"$set": {"pokemons": run_document["pokemons"]}}, [])
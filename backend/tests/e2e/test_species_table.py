@@ -0,0 +1,32 @@
+import pytest
+from pokemendel_core.utils.definitions.types import Types
+from core.lockes import get_locke
+from core.lockes.base.base_locke import BaseLocke
+from core.lockes.genlocke.gen_locke import GenLocke
+from core.lockes.genlocke.utils import SELECTED_LOCKE
+from core.lockes.leg.leg_locke import LegLocke
+from core.lockes.leg.utils import LEG_TYPE_KEY, NumLegs
+from core.lockes.mono.mono_locke import MonoLocke
+from core.lockes.mono.utils import MONO_TYPE_KEY
+from core.lockes.wed.wed_locke import WedLocke
+from core.species_table import get_species_table
+from scripts.benchmark_run_options import walk_run_options
+
+
+@pytest.mark.parametrize("gen", [1, 2, 3])
+@pytest.mark.parametrize("locke_name, extra_info", [
+    (BaseLocke.name, None),
+    (WedLocke.name, None),
+    (MonoLocke.name, {MONO_TYPE_KEY: Types.WATER}),
+    (LegLocke.name, {LEG_TYPE_KEY: NumLegs.OTHER}),
+    (GenLocke.name, {SELECTED_LOCKE: MonoLocke.name, MONO_TYPE_KEY: Types.FIRE}),
+])
+def test_species_table_options_match_evolution_lines_walk(gen, locke_name, extra_info):
+    locke = get_locke(locke_name, extra_info)
+    species_table = get_species_table(gen)
+    table_options = [
+        (option.pokemon_name, option.base_pokemon, option.index)
+        for option in species_table.run_options(locke.relevance_mask(species_table))
+    ]
+    assert table_options == walk_run_options(gen, locke)
+    assert get_species_table(gen) is species_table
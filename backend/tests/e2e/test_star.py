@@ -39,6 +39,7 @@ from tests.e2e.helpers import (
     assert_run_potential_pokemons,
     assert_pokemon,
 )
+from core.lockes.star.star_index import get_star_index
 from typing import List, Tuple, Dict
 import pytest
 
@@ -159,6 +160,22 @@ def _create_run(client_fixture, game_name, expected_types: List[List[str]], type
     return run_id
 
 
+def test_star_index_filters_chosen_types_and_lines():
+    star_index = get_star_index(1)
+    assert get_star_index(1) is star_index
+    assert star_index.pokemon_to_base[PokemonGen1.CHARIZARD] == PokemonGen1.CHARMANDER
+    assert PokemonGen1.CHARMELEON not in star_index.pokemon_to_base
+
+    all_types = star_index.relevant_types({}, set())
+    assert set(all_types) == set(get_generation_types(1))
+    assert PokemonGen1.CHARIZARD in all_types[Types.FLYING]
+
+    types_left = star_index.relevant_types({Types.FIRE: PokemonGen1.CHARIZARD}, {PokemonGen1.CHARMANDER})
+    assert Types.FIRE not in types_left
+    assert PokemonGen1.CHARIZARD not in types_left[Types.FLYING]
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
 
+
@@ -0,0 +1,77 @@
+import pytest
+from dataclasses import asdict
+from datetime import datetime
+from pokemendel_core.data import fetch_pokemon
+from pokemendel_core.data.gen1 import PokemonGen1
+from pokemendel_core.utils.definitions.types import Types
+from core.box import Box
+from core.party import Party
+from core.run import Run
+from core.lockes import LOCKE_INSTANCES, get_locke
+from core.lockes.genlocke.gen_locke import GenLocke
+from core.lockes.genlocke.utils import SELECTED_LOCKE
+from core.lockes.mono.mono_locke import MonoLocke
+from core.lockes.wed.wed_locke import WedLocke
+from core.step_graph import get_step_graph
+from core.lockes.unique.utils import can_pokemon_be_in_party
+from definitions import Pokemon, PokemonMetadata, PokemonStatus
+from definitions.runs.steps_names import StepsNames
+
+
+def _locke_pokemon(pokemon_name: str, caught_index: int) -> Pokemon:
+    return Pokemon(
+        **asdict(fetch_pokemon(pokemon_name, 1)),
+        metadata=PokemonMetadata(id=pokemon_name, caught_index=caught_index),
+        status=PokemonStatus.ALIVE,
+    )
+
+
+@pytest.mark.parametrize("locke_name", [locke_name for locke_name in LOCKE_INSTANCES if locke_name != GenLocke.name])
+@pytest.mark.parametrize("gen", [1, 2, 3])
+def test_step_graph_orders_prerequisites_first(locke_name, gen):
+    locke = LOCKE_INSTANCES[locke_name]
+    if locke.min_gen > gen:
+        return
+    step_graph = get_step_graph(locke, gen)
+    assert set(step_graph.evaluation_order) == set(step_graph.steps_order)
+    assert set(step_graph.steps_mapper) >= set(step_graph.steps_order)
+    positions = {step_name: position for position, step_name in enumerate(step_graph.evaluation_order)}
+    for step_name, prerequisites in step_graph.prerequisites.items():
+        assert all(positions[prerequisite] < positions[step_name] for prerequisite in prerequisites)
+
+
+def test_step_graph_is_shared_by_runs():
+    fire_locke = get_locke(MonoLocke.name, {'mono_type': 'Fire'})
+    water_locke = get_locke(MonoLocke.name, {'mono_type': 'Water'})
+    assert get_step_graph(fire_locke, 1) is get_step_graph(water_locke, 1)
+    assert get_step_graph(fire_locke, 1) is not get_step_graph(fire_locke, 2)
+
+    mono_genlocke = get_locke(GenLocke.name, {SELECTED_LOCKE: MonoLocke.name, 'mono_type': 'Fire'})
+    wed_genlocke = get_locke(GenLocke.name, {SELECTED_LOCKE: WedLocke.name})
+    assert StepsNames.WEDLOCKE_PAIR not in get_step_graph(mono_genlocke, 2).steps_order
+    assert StepsNames.WEDLOCKE_PAIR in get_step_graph(wed_genlocke, 2).steps_order
+
+
+def test_facts_snapshot_is_shared_until_exit():
+    charmander = _locke_pokemon(PokemonGen1.CHARMANDER, 1)
+    squirtle = _locke_pokemon(PokemonGen1.SQUIRTLE, 0)
+    vulpix = _locke_pokemon(PokemonGen1.VULPIX, 2)
+    run = Run(
+        id='facts', run_name='facts', creation_date=datetime.now(), gen=1,
+        party=Party([charmander, squirtle]), box=Box([charmander, squirtle, vulpix]),
+    )
+    assert run.get_facts() is not run.get_facts()
+
+    with run.facts_snapshot() as facts:
+        assert run.get_facts() is facts
+        with run.facts_snapshot() as inner_facts:
+            assert inner_facts is facts
+        assert run.get_facts() is facts
+        assert facts.party_types == {Types.FIRE, Types.WATER}
+        assert [pokemon.metadata.id for pokemon in facts.sorted_party] == [PokemonGen1.SQUIRTLE, PokemonGen1.CHARMANDER]
+        assert facts.max_caught_index == 2
+        assert not can_pokemon_be_in_party(vulpix, run)
+    assert run.facts is None
+
+    run.party.remove_pokemon(charmander)
+    assert can_pokemon_be_in_party(vulpix, run)
@@ -4,6 +4,9 @@ const API_BASE_URL = process.env.NODE_ENV === 'test'
   ? 'https://pokemendel-lockes.onrender.com/locke_manager'
   : 'http://localhost:5222/locke_manager';
 
+// Images can be served by the async resources app (backend/resources_app.py) instead of the API
+const RESOURCES_BASE_URL = process.env.REACT_APP_RESOURCES_URL || API_BASE_URL;
+
 // Types
 export interface ListRun {
     run_id: string;
@@ -85,6 +88,20 @@ export interface RunUpdateResponse {
     id: string | null;
 }
 
+export interface SpriteFrame {
+    x: number;
+    y: number;
+    width: number;
+    height: number;
+}
+
+export interface SpritesAtlasResponse {
+    atlas: string | null;
+    frames: Record<string, SpriteFrame>;
+    size: number;
+    missing: string[];
+}
+
 export interface CreateRunRequest {
     run_name: string;
     locke_type: string;
@@ -263,12 +280,14 @@ const lockeApi = {
         }
     },
 
-    getPokemonImageUrl(pokemonName: string): string {
-        return `${API_BASE_URL}/resources/pokemon/${pokemonName.toLowerCase()}.png`;
+    getPokemonImageUrl(pokemonName: string, size?: number): string {
+        const sizeQuery = size ? `?size=${size}` : '';
+        return `${RESOURCES_BASE_URL}/resources/pokemon/${pokemonName.toLowerCase()}.png${sizeQuery}`;
     },
 
-    getGymLeaderImageUrl(gameName: string, gymName: string): string {
-        return `${API_BASE_URL}/resources/game/${gameName}/gyms/${gymName}`;
+    getGymLeaderImageUrl(gameName: string, gymName: string, size?: number): string {
+        const sizeQuery = size ? `?size=${size}` : '';
+        return `${RESOURCES_BASE_URL}/resources/game/${gameName}/gyms/${gymName}${sizeQuery}`;
     },
 
     async setStarter(runId: string, pokemonName: string): Promise<StatusResponse> {
@@ -387,6 +406,30 @@ const lockeApi = {
         return data;
     },
 
+    async getRunPokemonsActions(runId: string): Promise<Record<string, string[]>> {
+        const response = await fetch(`${API_BASE_URL}/run/${runId}/actions`);
+
+        if (!response.ok) {
+            throw new Error(`Failed to fetch run pokemons actions: ${response.statusText}`);
+        }
+
+        const data: Record<string, string[]> = await response.json();
+        console.log('Run pokemons actions response:', data);
+        return data;
+    },
+
+    async getRunSprites(runId: string, size?: number): Promise<SpritesAtlasResponse> {
+        const sizeQuery = size ? `?size=${size}` : '';
+        const response = await fetch(`${API_BASE_URL}/run/${runId}/sprites${sizeQuery}`);
+
+        if (!response.ok) {
+            throw new Error(`Failed to fetch run sprites: ${response.statusText}`);
+        }
+
+        const data: SpritesAtlasResponse = await response.json();
+        return data;
+    },
+
     async getPokemonActionInfo(runId: string, pokemonId: string, actionName: string): Promise<{input_type: string, input_options: string[]}> {
         const response = await fetch(`${API_BASE_URL}/run/${runId}/pokemon/${pokemonId}/action?action=${encodeURIComponent(actionName)}`);
 